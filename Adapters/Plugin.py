@@ -17,6 +17,7 @@ from qfluentwidgets import (
 )
 
 from Adapters.BasePlugin import BasePlugin, BasePluginLoader, BasePluginManager
+from MCSL2Lib.Controllers.startupProfiler import profiler
 from MCSL2Lib.Resources.icons import *  # noqa: F401
 from MCSL2Lib.Widgets.pluginWidget import singlePluginWidget, PluginSwitchButton
 from MCSL2Lib.utils import isDarkTheme, FileOpener
@@ -189,7 +190,8 @@ class PluginManager(BasePluginManager):
             return
         for pluginName in self.pathList:
             try:
-                self.readPlugin(pluginName)
+                with profiler.span(pluginName, "plugin"):
+                    self.readPlugin(pluginName)
             except Exception as e:
                 raise Warning(f"加载插件错误: {e}")
 
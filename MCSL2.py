@@ -15,33 +15,47 @@ Main entry.
 """
 import sys
 
-from PyQt5.QtCore import Qt, QLocale, QObject, QEvent
-from PyQt5.QtWidgets import QApplication
-from qfluentwidgets import FluentTranslator
-# from viztracer import VizTracer
-from MCSL2Lib.utils import initializeMCSL2
-from MCSL2Lib.utils import MCSL2Logger
+# 启动性能分析(--profile-startup)需要在导入任何第三方库之前开始
+from MCSL2Lib.Controllers.startupProfiler import profiler
 
+if __name__ == "__main__":
+    profiler.start(sys.argv)
 
-class MCSL2Application(QApplication):
-    def __init__(self, argv):
-        super().__init__(argv)
+if __name__ == "__main__":
+    # 区块清理等使用进程池，打包后的子进程需要在这里接管
+    from multiprocessing import freeze_support
 
-    def notify(self, a0: QObject, a1: QEvent) -> bool:
-        try:
-            done = super().notify(a0, a1)
-            return done
-        except Exception as e:
-            MCSL2Logger.critical(e)
-            return False
+    freeze_support()
 
+    # 进程池的子进程也会导入本文件，日志只在主进程中初始化
+    from MCSL2Lib.utils import initializeMCSL2
+    from MCSL2Lib.utils import MCSL2Logger
 
-if __name__ == "__main__":
-    # tracer = VizTracer()
-    # tracer.enable_thread_tracing()
-    # tracer.start()
     # 初始化
-    initializeMCSL2()
+    with profiler.span("initializeMCSL2"):
+        initializeMCSL2()
+
+    # 无界面模式，不加载任何控件
+    if "--headless" in sys.argv:
+        from MCSL2Lib.Controllers.daemonController import runHeadless
+
+        sys.exit(runHeadless(sys.argv))
+
+    from PyQt5.QtCore import Qt, QLocale, QObject, QEvent
+    from PyQt5.QtWidgets import QApplication
+    from qfluentwidgets import FluentTranslator
+
+    class MCSL2Application(QApplication):
+        def __init__(self, argv):
+            super().__init__(argv)
+
+        def notify(self, a0: QObject, a1: QEvent) -> bool:
+            try:
+                done = super().notify(a0, a1)
+                return done
+            except Exception as e:
+                MCSL2Logger.critical(e)
+                return False
 
     # 高DPI适配
     QApplication.setHighDpiScaleFactorRoundingPolicy(
@@ -52,13 +66,14 @@ if __name__ == "__main__":
     QApplication.setAttribute(Qt.AA_DontCreateNativeWidgetSiblings)
 
     # 启动
-    app = MCSL2Application(sys.argv)
-    translator = FluentTranslator(QLocale())
-    app.installTranslator(translator)
-    from MCSL2Lib.windowInterface import Window
+    with profiler.span("QApplication"):
+        app = MCSL2Application(sys.argv)
+        translator = FluentTranslator(QLocale())
+        app.installTranslator(translator)
+    with profiler.span("import windowInterface"):
+        from MCSL2Lib.windowInterface import Window
 
-    w = Window()
-    w.show()
-    app.exec_()
-    # tracer.stop()
-    # tracer.save()
\ No newline at end of file
+    with profiler.span("Window"):
+        w = Window()
+        w.show()
+    app.exec_()
\ No newline at end of file
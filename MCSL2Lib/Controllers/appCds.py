@@ -0,0 +1,194 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Per-server AppCDS (dynamic class-data sharing) archives for faster cold starts.
+"""
+
+from hashlib import blake2b
+from json import dumps, loads
+from os import path as osp, remove, replace, scandir
+from typing import List, Optional
+
+from MCSL2Lib.Controllers.javaDetector import fingerprint
+from MCSL2Lib.Controllers.jvmTuning import supportedFlags, warmUpFlags
+from MCSL2Lib.utils import MCSL2Logger
+
+archiveName = "MCSL2_AppCDS.jsa"
+stateName = "MCSL2_AppCDS.json"
+dumpFlag = "-XX:ArchiveClassesAtExit="
+shareFlag = "-XX:SharedArchiveFile="
+
+
+def modsDigest(serverDir: str) -> str:
+    """mods文件夹(含子文件夹)内文件的名称、大小与修改时间的摘要，不读取文件内容"""
+    entries = []
+    pending = [osp.join(serverDir, "mods")]
+    while pending:
+        try:
+            with scandir(pending.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        info = entry.stat()
+                        entries.append(
+                            f"{osp.relpath(entry.path, serverDir)}\0{info.st_size}\0{info.st_mtime_ns}"
+                        )
+        except OSError:
+            continue
+    return blake2b("\n".join(sorted(entries)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def withoutAppCdsArgs(args: List[str]) -> List[str]:
+    return [arg for arg in args if not arg.startswith((dumpFlag, shareFlag))]
+
+
+def appCdsMode(args: List[str]) -> Optional[str]:
+    """启动参数中的AppCDS模式：dump为本次退出时生成归档，shared为使用归档，未启用时为None"""
+    for arg in args:
+        if arg.startswith(dumpFlag):
+            return "dump"
+        if arg.startswith(shareFlag):
+            return "shared"
+    return None
+
+
+def cacheKey(
+    serverDir: str, coreFileName: Optional[str], javaPath: str, jvmArgs: List[str]
+) -> dict:
+    """
+    归档的有效条件\n
+    Java路径与文件指纹、核心文件指纹、mods内容与JVM参数任一改变，归档都需要重新生成
+    """
+    return {
+        "java": javaPath,
+        "javaFingerprint": fingerprint(javaPath),
+        "core": fingerprint(osp.join(serverDir, coreFileName)) if coreFileName else None,
+        "mods": modsDigest(serverDir),
+        "args": withoutAppCdsArgs(jvmArgs),
+    }
+
+
+def loadState(serverDir: str) -> dict:
+    try:
+        with open(osp.join(serverDir, stateName), "r", encoding="utf-8") as f:
+            state = loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def saveState(serverDir: str, state: dict):
+    statePath = osp.join(serverDir, stateName)
+    with open(f"{statePath}.tmp", "w", encoding="utf-8") as f:
+        f.write(dumps(state, indent=4))
+    replace(f"{statePath}.tmp", statePath)
+
+
+def appCdsArgs(
+    serverDir: str, coreFileName: Optional[str], javaPath: str, jvmArgs: List[str]
+) -> List[str]:
+    """
+    生成AppCDS参数\n
+    归档存在且仍然有效时使用-XX:SharedArchiveFile；否则删除旧归档，
+    本次以-XX:ArchiveClassesAtExit运行，服务器正常关闭时由JVM写出归档。\n
+    Java不支持动态归档(JDK 13以下)或还没有检查过该Java支持的参数时返回空列表
+    """
+    if (supported := supportedFlags(javaPath, probe=False)) is None:
+        warmUpFlags(javaPath)
+        return []
+    if "ArchiveClassesAtExit" not in supported:
+        return []
+    serverDir = osp.realpath(serverDir)
+    archive = osp.join(serverDir, archiveName)
+    key = cacheKey(serverDir, coreFileName, javaPath, jvmArgs)
+    state = loadState(serverDir)
+    if state.get("key") == key and osp.exists(archive):
+        return [f"{shareFlag}{archive}"]
+    if osp.exists(archive):
+        MCSL2Logger.info(f"AppCDS归档已失效，将在本次关闭服务器时重新生成：{archive}")
+        try:
+            remove(archive)
+        except OSError as e:
+            MCSL2Logger.warning(f"无法删除失效的AppCDS归档：{e}")
+            return []
+    state["key"] = key
+    try:
+        saveState(serverDir, state)
+    except OSError as e:
+        MCSL2Logger.warning(f"无法写入AppCDS状态：{e}")
+        return []
+    return [f"{dumpFlag}{archive}"]
+
+
+# 这些JVM选项的值是下一个参数，不能把值当成主类
+_optionsWithValue = {
+    "-cp", "-classpath", "--class-path", "-p", "--module-path", "--upgrade-module-path",
+    "--add-modules", "--limit-modules", "--add-opens", "--add-exports", "--add-reads",
+    "--patch-module",
+}  # fmt: skip
+
+
+def launchPosition(args: List[str]) -> int:
+    """JVM参数结束的位置：第一个-jar、@参数文件或主类，之后的参数都会传给服务器"""
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "-jar" or arg.startswith("@") or not arg.startswith("-"):
+            return i
+        i += 2 if arg in _optionsWithValue else 1
+    return len(args)
+
+
+def insertAppCdsArgs(serverDir: str, javaPath: str, args: List[str]) -> List[str]:
+    """
+    在完整的启动参数中插入AppCDS参数\n
+    参数插在JVM参数之后、-jar/@参数文件/主类之前；首次启动与重启都经过这里，归档的有效条件按同样的方式计算
+    """
+    args = withoutAppCdsArgs(args)
+    position = launchPosition(args)
+    coreFileName = (
+        args[position + 1]
+        if args[position : position + 1] == ["-jar"] and position + 1 < len(args)
+        else None
+    )
+    return (
+        args[:position]
+        + appCdsArgs(serverDir, coreFileName, javaPath, args[:position])
+        + args[position:]
+    )
+
+
+def refreshAppCdsArgs(serverDir: str, javaPath: str, args: List[str]) -> List[str]:
+    """
+    重启前刷新参数中的AppCDS部分\n
+    上次运行已生成归档时改为使用归档，归档失效时重新生成；参数中没有AppCDS参数时原样返回
+    """
+    if appCdsMode(args) is None:
+        return args
+    return insertAppCdsArgs(serverDir, javaPath, args)
+
+
+def recordStartup(serverDir: str, mode: str, seconds: float) -> Optional[float]:
+    """
+    记录启动到"Done"的耗时\n
+    dump模式(未使用归档)的耗时作为基准；返回基准耗时，供使用归档时对比
+    """
+    state = loadState(serverDir)
+    startup = state.setdefault("startup", {})
+    startup[mode] = round(seconds, 3)
+    try:
+        saveState(serverDir, state)
+    except OSError:
+        pass
+    return startup.get("dump")
@@ -0,0 +1,176 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Ordered, coalesced and scheduled writes to a server's stdin.
+"""
+
+from collections import deque
+from itertools import count
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from PyQt5.QtCore import QObject, QProcess, QTimer, pyqtSignal
+
+from MCSL2Lib.utils import MCSL2Logger
+
+# 定时任务可以是一条命令、一组命令，或者一个在到期时调用的函数
+TaskAction = Union[str, List[str], Callable[[], None]]
+
+
+class ScheduledCommand:
+    def __init__(self, taskId: int, action: TaskAction, interval: float, timer: QTimer):
+        self.taskId = taskId
+        self.action = action
+        self.interval = interval  # 秒，0表示只执行一次
+        self.timer = timer
+
+    @property
+    def recurring(self) -> bool:
+        return self.interval > 0
+
+    def describe(self) -> str:
+        if callable(self.action):
+            return getattr(self.action, "__name__", "action")
+        if isinstance(self.action, str):
+            return self.action
+        return "; ".join(self.action)
+
+
+class CommandQueue(QObject):
+    """
+    服务器命令队列\n
+    命令按提交顺序进入队列，同一轮事件循环内提交的命令合并为一次write写入stdin；
+    进程内部写缓冲(bytesToWrite)超过maxPendingBytes时视为管道已满，暂停写入，
+    等bytesWritten信号到来再继续，队列本身最多保存maxQueued条命令。\n
+    定时/周期任务(如每15分钟save-all、重启前广播)由QTimer驱动，只在服务器运行时执行，
+    服务器重启后周期任务继续有效，一次性任务在停止服务器时由cancelOnce取消。
+    """
+
+    # 因队列已满而丢弃命令时发出的信号(发送丢弃的条数)
+    dropped = pyqtSignal(int)
+
+    def __init__(
+        self,
+        encoding: Callable[[], str],
+        maxPendingBytes: int = 65536,
+        maxQueued: int = 10000,
+        parent=None,
+    ):
+        """
+        encoding: 返回当前输入编码的函数，编码可能在运行期间被检测出来后改变
+        """
+        super().__init__(parent)
+        self.encoding = encoding
+        self.maxPendingBytes = maxPendingBytes
+        self.maxQueued = maxQueued
+        self.process: Optional[QProcess] = None
+        self.pending = deque()
+        self.tasks: Dict[int, ScheduledCommand] = {}
+        self._taskIds = count(1)
+        self._flushScheduled = False
+        # 判断服务器是否在运行，由所属的ServerRuntime设置
+        self.isRunning: Callable[[], bool] = lambda: self.process is not None
+
+    def attach(self, process: QProcess):
+        """新的进程启动时调用，上一个进程未写出的命令随之丢弃"""
+        self.pending.clear()
+        self.process = process
+        process.bytesWritten.connect(lambda _: self.flush())
+
+    def send(self, command: str) -> bool:
+        return self.sendMany((command,))
+
+    def sendMany(self, commands: Iterable[str]) -> bool:
+        """批量提交命令，在下一轮事件循环合并写入；队列已满时丢弃并返回False"""
+        commands = [c for c in commands if c]
+        room = self.maxQueued - len(self.pending)
+        if len(commands) > room:
+            self.dropped.emit(len(commands) - max(room, 0))
+            MCSL2Logger.warning(
+                f"命令队列已满，丢弃{len(commands) - max(room, 0)}条命令"
+            )
+            commands = commands[: max(room, 0)]
+        self.pending.extend(commands)
+        if commands and not self._flushScheduled:
+            self._flushScheduled = True
+            QTimer.singleShot(0, self.flush)
+        return bool(commands)
+
+    def sendNow(self, command: str):
+        """立即写出队列中全部命令与command(如stop)，不受背压限制，保证不会越过之前的命令"""
+        self.pending.append(command)
+        self.flush(force=True)
+
+    def flush(self, force: bool = False):
+        self._flushScheduled = False
+        if not self.pending or self.process is None:
+            return
+        if self.process.state() != QProcess.Running:
+            return
+        budget = self.maxPendingBytes - self.process.bytesToWrite()
+        if budget <= 0 and not force:
+            # 管道已满，等待bytesWritten
+            return
+        encoding = self.encoding()
+        chunk = bytearray()
+        while self.pending and (force or len(chunk) < budget):
+            chunk += f"{self.pending.popleft()}\n".encode(encoding, errors="replace")
+        self.process.write(bytes(chunk))
+
+    def schedule(
+        self, action: TaskAction, delay: float, interval: float = 0
+    ) -> int:
+        """
+        delay秒后执行action，interval大于0时此后每interval秒重复执行\n
+        返回任务ID，可用cancel取消
+        """
+        taskId = next(self._taskIds)
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        task = ScheduledCommand(taskId, action, interval, timer)
+        timer.timeout.connect(lambda: self.runTask(task))
+        timer.start(int(delay * 1000))
+        self.tasks[taskId] = task
+        return taskId
+
+    def runTask(self, task: ScheduledCommand):
+        if task.recurring:
+            task.timer.start(int(task.interval * 1000))
+        else:
+            self.tasks.pop(task.taskId, None)
+            task.timer.deleteLater()
+        if not self.isRunning():
+            return
+        if callable(task.action):
+            task.action()
+        elif isinstance(task.action, str):
+            self.send(task.action)
+        else:
+            self.sendMany(task.action)
+
+    def cancel(self, taskId: int) -> bool:
+        task = self.tasks.pop(taskId, None)
+        if task is None:
+            return False
+        task.timer.stop()
+        task.timer.deleteLater()
+        return True
+
+    def cancelAll(self):
+        for taskId in list(self.tasks):
+            self.cancel(taskId)
+
+    def cancelOnce(self):
+        """取消全部一次性任务(如定时重启及其广播)，周期任务保留"""
+        for taskId, task in list(self.tasks.items()):
+            if not task.recurring:
+                self.cancel(taskId)
@@ -0,0 +1,157 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Single-pass classifier for Minecraft server console lines.
+"""
+
+from enum import IntEnum, IntFlag
+from re import compile as reCompile, escape
+from typing import NamedTuple
+
+from MCSL2Lib.singleton import Singleton
+
+
+class LogLevel(IntEnum):
+    """
+    日志等级，数值即着色优先级。\n
+    一行中同时出现多种关键字时取数值最大者，与旧版逐个覆盖颜色的结果一致。
+    """
+
+    NONE = 0
+    INFO = 1
+    WARN = 2
+    ERROR = 3
+    DEBUG = 4
+
+
+class LogEvent(IntFlag):
+    """日志行携带的事件标记"""
+
+    NONE = 0
+    DONE = 1  # 服务器启动完毕
+    LOGIN = 2  # 玩家加入
+    LOGOUT = 4  # 玩家离开
+    MOJIBAKE = 8  # 疑似编码错误
+    STARTING = 16  # 服务器开始加载
+    HIDDEN = 32  # 无需显示的噪音行
+
+
+class ClassifiedLine(NamedTuple):
+    level: LogLevel
+    text: str
+    events: LogEvent
+
+
+# fmt: off
+levelKeywords = {
+    LogLevel.INFO: ["INFO", "Info", "info", "tip", "tips", "hint", "提示"],
+    LogLevel.WARN: ["WARN", "Warning", "warn", "alert", "ALERT", "Alert", "CAUTION", "Caution", "警告"],
+    LogLevel.ERROR: [
+        "ERR", "Err", "Fatal", "FATAL", "Critical", "Danger", "DANGER", "错",
+        "at java", "at net", "at oolloo", "Caused by", "at sun",
+    ],
+    LogLevel.DEBUG: ["DEBUG", "Debug", "debug", "调试", "TEST", "Test", "Unknown command", "MCSL2"],
+}
+translations = {
+    "Preparing spawn area": "准备生成点区域中",
+    "main/INFO": "主类/信息",
+    "main/WARN": "主类/警告",
+    "main/ERROR": "主类/错误",
+    "main/FATAL": "主类/致命错误",
+    "main/DEBUG": "主类/调试信息",
+    "INFO": "信息",
+    "WARN": "警告",
+    "ERROR": "错误",
+    "FATAL": "致命错误",
+    "DEBUG": "调试信息",
+    "Server thread": "服务器线程",
+    "Server-Worker": "服务器工作进程",
+    "Forge Version Check": "Forge版本检查",
+    "ModLauncher running: args": "ModLauncher运行中: 参数",
+    "All chunks are saved": "所有区块已保存",
+    "Saving the game (this may take a moment!)": "保存游戏存档中（可能需要一些时间）",
+    "Saved the game": "已保存游戏存档",
+}
+hiddenKeywords = [
+    "Disabling terminal, you're running in an unsupported environment.",
+    "Advanced terminal features are not available in this environment",
+    "Unable to instantiate org.fusesource.jansi.WindowsAnsiOutputStream",
+]
+# fmt: on
+
+# ANSI颜色码：带ESC的完整序列，或ESC被吞掉后残留的"[38;2;r;g;bm"等，以及"[m["中的"[m"
+_ansiPattern = r"\x1b\[[0-9;]*m|\[[0-9]{1,3}(?:;[0-9]{1,3})*m|\[m(?=\[)"
+
+
+def _alternation(words) -> str:
+    # 长词优先，保证"main/INFO"先于"INFO"被匹配
+    return "|".join(escape(w) for w in sorted(set(words), key=len, reverse=True))
+
+
+@Singleton
+class ConsoleLogClassifier:
+    """
+    日志行分类器，所有匹配表只在首次构造时建立一次。\n
+    等级按优先级从高到低查找关键字，命中即返回；
+    ANSI清理与翻译由一条预编译的交替正则一次替换完成。\n
+    注：CPython的re对多字面量交替没有专门优化，实测用它判定等级反而比逐个子串查找更慢，
+    因此等级判定使用有序的子串查找，性能对比见Tools/Benchmarks/consoleClassifierBenchmark.py。
+    """
+
+    def __init__(self):
+        self.levelTable = tuple(
+            (level, tuple(levelKeywords[level]))
+            for level in sorted(levelKeywords, reverse=True)
+        )
+        self.ansiPattern = reCompile(_ansiPattern)
+        self.rewritePattern = reCompile(f"{_ansiPattern}|{_alternation(translations)}")
+        self.hiddenPattern = reCompile(_alternation(hiddenKeywords))
+        self._translate = lambda m, get=translations.get: get(m.group(0), "")
+
+    def level(self, line: str) -> LogLevel:
+        for level, keywords in self.levelTable:
+            for keyword in keywords:
+                if keyword in line:
+                    return level
+        return LogLevel.NONE
+
+    def clean(self, line: str) -> str:
+        """仅去除ANSI颜色码，不翻译"""
+        return self.ansiPattern.sub("", line)
+
+    def classify(self, line: str, translate: bool = True) -> ClassifiedLine:
+        level = self.level(line)
+        if self.hiddenPattern.search(line):
+            return ClassifiedLine(level, line, LogEvent.HIDDEN)
+        text = (
+            self.rewritePattern.sub(self._translate, line)
+            if translate
+            else self.ansiPattern.sub("", line)
+        )
+        return ClassifiedLine(level, text, self.events(text))
+
+    @staticmethod
+    def events(text: str) -> LogEvent:
+        """只判定事件标记，不做清理与翻译，供不需要显示的场景使用"""
+        events = LogEvent.NONE
+        if "Done" in text and "!" in text:
+            events |= LogEvent.DONE
+        if "logged in with entity id" in text:
+            events |= LogEvent.LOGIN
+        elif " left the game" in text:
+            events |= LogEvent.LOGOUT
+        if "Loading libraries, please wait..." in text:
+            events |= LogEvent.STARTING
+        if "�" in text:
+            events |= LogEvent.MOJIBAKE
+        return events
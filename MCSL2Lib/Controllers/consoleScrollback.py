@@ -0,0 +1,90 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+On-disk spill file for console lines evicted from the scrollback.
+"""
+
+from array import array
+from os import makedirs, path as osp
+from typing import List
+
+
+class ConsoleSpillFile:
+    """
+    终端溢出文件。\n
+    终端显示的每一行都顺序写入磁盘，每indexStride行记录一次字节偏移(稀疏索引)，
+    超出终端回滚上限而被挤掉的行可以按行号分页读回。\n
+    内存中只保留稀疏索引，一周不关服也只有几百KB。
+    """
+
+    def __init__(self, filePath: str, indexStride: int = 1024):
+        self.filePath = filePath
+        self.indexStride = indexStride
+        self._file = None
+        self._offsets = array("Q", [0])
+        self._count = 0
+        self._tell = 0
+
+    @property
+    def count(self) -> int:
+        """已写入的总行数"""
+        return self._count
+
+    def reset(self, filePath: str = ""):
+        """清空溢出文件，可同时切换到新的路径"""
+        self.close()
+        if filePath:
+            self.filePath = filePath
+        makedirs(osp.dirname(osp.abspath(self.filePath)), exist_ok=True)
+        self._file = open(self.filePath, "w+b")
+        self._offsets = array("Q", [0])
+        self._count = 0
+        self._tell = 0
+
+    def append(self, text: str):
+        """写入一段终端文本，其中的换行与终端一样会拆成多行"""
+        if self._file is None:
+            self.reset()
+        for line in text.split("\n"):
+            data = line.encode("utf-8", errors="replace") + b"\n"
+            self._file.write(data)
+            self._tell += len(data)
+            self._count += 1
+            if not self._count % self.indexStride:
+                self._offsets.append(self._tell)
+
+    def readLines(self, start: int, count: int) -> List[str]:
+        """读取第start行起的count行(行号从0开始)"""
+        start = max(0, start)
+        count = min(count, self._count - start)
+        if self._file is None or count <= 0:
+            return []
+        self._file.flush()
+        block, skip = divmod(start, self.indexStride)
+        rv = []
+        with open(self.filePath, "rb") as f:
+            f.seek(self._offsets[block])
+            for _ in range(skip):
+                f.readline()
+            for _ in range(count):
+                rv.append(f.readline()[:-1].decode("utf-8", errors="replace"))
+        return rv
+
+    def close(self):
+        """关闭溢出文件，行数与索引一并清零"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._offsets = array("Q", [0])
+        self._count = 0
+        self._tell = 0
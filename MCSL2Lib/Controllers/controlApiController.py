@@ -0,0 +1,485 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Local control API: an asyncio HTTP/SSE endpoint bridged onto the Qt thread.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import Future
+from itertools import islice
+from json import dumps, loads
+from secrets import token_urlsafe
+from time import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+from MCSL2Lib.Controllers.serverController import (
+    LaunchResult,
+    MojangEula,
+    ServerHandler,
+    ServerHelper,
+    ServerLauncher,
+    ServerRuntime,
+)
+from MCSL2Lib.Controllers.settingsController import SettingsController
+from MCSL2Lib.Controllers.worldBackup import BackupStore
+from MCSL2Lib.utils import MCSL2Logger, readGlobalServerConfig
+
+settingsController = SettingsController()
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Broadcast:
+    """
+    asyncio内的一对多唤醒\n
+    每次notify完成当前的Future并换上新的，任意多个等待者共享同一个Future
+    """
+
+    def __init__(self):
+        self._future: Optional[asyncio.Future] = None
+
+    def notify(self):
+        if self._future is not None and not self._future.done():
+            self._future.set_result(None)
+        self._future = None
+
+    async def wait(self):
+        if self._future is None:
+            self._future = asyncio.get_running_loop().create_future()
+        await asyncio.shield(self._future)
+
+
+class ConsoleTail:
+    """
+    单个服务器的终端尾部缓冲，所有订阅者共享\n
+    每行有递增的序号，订阅者只保存自己的游标，不复制日志；游标落后超出缓冲时报告丢弃的行数
+    """
+
+    def __init__(self, capacity: int = 2000):
+        self.lines = deque(maxlen=capacity)
+        self.next = 0
+        self.stats: Optional[dict] = None
+        self.linesChanged = Broadcast()
+        self.statsChanged = Broadcast()
+
+    @property
+    def first(self) -> int:
+        return self.next - len(self.lines)
+
+    def publish(self, lines: List[str]):
+        self.lines.extend(lines)
+        self.next += len(lines)
+        self.linesChanged.notify()
+
+    def publishStats(self, stats: dict):
+        self.stats = stats
+        self.statsChanged.notify()
+
+    def read(self, cursor: int) -> Tuple[List[str], int, int]:
+        """返回(游标之后的行, 新游标, 丢弃的行数)"""
+        dropped = max(0, self.first - cursor)
+        cursor = max(cursor, self.first)
+        return list(islice(self.lines, cursor - self.first, None)), self.next, dropped
+
+    async def waitLines(self, cursor: int):
+        while cursor >= self.next:
+            await self.linesChanged.wait()
+
+
+class ControlBridge(QObject):
+    """
+    位于Qt主线程的桥\n
+    API线程通过requested信号(跨线程自动排队)把操作投递到主线程执行，结果经concurrent.futures.Future返回；
+    服务器输出与资源采样则由主线程推送到asyncio线程内的ConsoleTail
+    """
+
+    requested = pyqtSignal(object)
+
+    def __init__(self, tailCapacity: int = 2000, parent=None):
+        super().__init__(parent)
+        self.tailCapacity = tailCapacity
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.tails: Dict[str, ConsoleTail] = {}
+        self.attached = set()
+        self.requested.connect(self.execute)
+        ServerHandler().runtimesChanged.connect(self.attachRuntimes)
+
+    def tail(self, name: str) -> ConsoleTail:
+        """只在asyncio线程内调用"""
+        tail = self.tails.get(name, None)
+        if tail is None:
+            tail = self.tails[name] = ConsoleTail(self.tailCapacity)
+        return tail
+
+    @pyqtSlot()
+    def attachRuntimes(self):
+        for name, runtime in ServerHandler().runtimes.items():
+            if name not in self.attached:
+                self.attached.add(name)
+                self.attach(runtime)
+
+    def attach(self, runtime: ServerRuntime):
+        name = runtime.name
+        runtime.serverLogOutput.connect(lambda line: self.push(name, [line]))
+        runtime.serverLogOutputBatch.connect(lambda lines: self.push(name, lines))
+        runtime.resourceSampled.connect(
+            lambda sample: self.pushStats(name, dict(time=time(), **sample._asdict()))
+        )
+
+    def push(self, name: str, lines: List[str]):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(lambda: self.tail(name).publish(lines))
+
+    def pushStats(self, name: str, stats: dict):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(lambda: self.tail(name).publishStats(stats))
+
+    async def call(self, func: Callable, *args):
+        """在Qt主线程执行func并等待结果"""
+        future = Future()
+        self.requested.emit((func, args, future))
+        return await asyncio.wrap_future(future)
+
+    @pyqtSlot(object)
+    def execute(self, job):
+        func, args, future = job
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+
+def runtimeState(runtime: ServerRuntime) -> str:
+    return runtime.state.name.lower()
+
+
+def listServers() -> List[dict]:
+    rv = []
+    for server in readGlobalServerConfig():
+        runtime = ServerHandler().getRuntime(server["name"])
+        rv.append(
+            {
+                "name": server["name"],
+                "state": runtimeState(runtime) if runtime is not None else "stopped",
+                "current": server["name"] == ServerHandler().currentServerName,
+            }
+        )
+    return rv
+
+
+def requireRuntime(name: str) -> ServerRuntime:
+    runtime = ServerHandler().getRuntime(name)
+    if runtime is None:
+        raise ApiError(404, f"server {name} has not been started")
+    return runtime
+
+
+def startServer(name: str) -> str:
+    serverNameList = [server["name"] for server in readGlobalServerConfig()]
+    if name not in serverNameList:
+        raise ApiError(404, f"no such server: {name}")
+    if ServerHandler().isServerActive(name):
+        return runtimeState(requireRuntime(name))
+    ServerHelper().loadServerConfig(index=serverNameList.index(name))
+    if not MojangEula().checkEula():
+        if not settingsController.fileSettings["acceptAllMojangEula"]:
+            raise ApiError(409, f"server {name} has not accepted the Minecraft EULA")
+        MojangEula().acceptEula()
+    if ServerLauncher().startServer() == LaunchResult.PRUNING:
+        raise ApiError(409, f"server {name} is pruning region files")
+    return runtimeState(requireRuntime(name))
+
+
+def stopServer(name: str) -> str:
+    runtime = requireRuntime(name)
+    runtime.requestStop()
+    return runtimeState(runtime)
+
+
+def killServer(name: str) -> str:
+    runtime = requireRuntime(name)
+    runtime.haltServer()
+    return runtimeState(runtime)
+
+
+def restartServer(name: str, delay: int = 0) -> str:
+    """delay大于0时定时重启，重启前在终端广播提醒"""
+    runtime = requireRuntime(name)
+    if delay > 0:
+        if not runtime.isServerRunning():
+            raise ApiError(409, f"server {name} is not running")
+        runtime.scheduleRestart(delay)
+    else:
+        runtime.restartServer()
+    return runtimeState(runtime)
+
+
+def sendCommand(name: str, commands: List[str]) -> str:
+    runtime = requireRuntime(name)
+    if not runtime.isServerRunning():
+        raise ApiError(409, f"server {name} is not running")
+    runtime.sendCommands(commands)
+    return runtimeState(runtime)
+
+
+def backupServer(name: str) -> str:
+    runtime = requireRuntime(name)
+    if not runtime.backupWorld():
+        raise ApiError(409, f"a backup or restore of server {name} is already running")
+    return runtimeState(runtime)
+
+
+def restoreServer(name: str, snapshotId: str) -> str:
+    runtime = requireRuntime(name)
+    if snapshotId not in BackupStore(name).snapshots():
+        raise ApiError(404, f"no such snapshot: {snapshotId}")
+    if not runtime.restoreWorld(snapshotId):
+        raise ApiError(409, f"server {name} must be stopped and idle to restore")
+    return runtimeState(runtime)
+
+
+class ControlApiServer(QThread):
+    """
+    本地控制API线程，运行独立的asyncio事件循环\n
+    默认只监听127.0.0.1；设置了controlApiUnixSocket时改为监听Unix套接字。
+    请求需带"Authorization: Bearer <token>"，controlApiToken为空时首次启动会随机生成并写入设置；
+    带Origin请求头的请求(浏览器中的网页发起的跨站请求)一律拒绝。\n
+    GET  /servers                      服务器列表与状态\n
+    POST /servers/<name>/start|stop|restart|kill\n
+    POST /servers/<name>/restart?delay=<秒>  定时重启，重启前广播提醒，停止服务器时取消\n
+    POST /servers/<name>/command       请求体为命令文本，或{"command": "..."}\n
+    GET  /servers/<name>/console       SSE终端输出，可用?since=<序号>续传\n
+    GET  /servers/<name>/stats         最近一次资源采样\n
+    GET  /servers/<name>/stats/stream  SSE资源采样\n
+    GET  /servers/<name>/backups       存档快照列表\n
+    POST /servers/<name>/backup        备份存档\n
+    POST /servers/<name>/restore       请求体为快照ID，服务器需已停止
+    """
+
+    actions = {
+        "start": startServer,
+        "stop": stopServer,
+        "restart": restartServer,
+        "kill": killServer,
+        "backup": backupServer,
+    }
+
+    def __init__(self, bridge: ControlBridge, parent=None):
+        super().__init__(parent)
+        self.bridge = bridge
+        self.host = settingsController.fileSettings["controlApiHost"]
+        self.port = settingsController.fileSettings["controlApiPort"]
+        self.unixSocket = settingsController.fileSettings["controlApiUnixSocket"]
+        self.token = settingsController.fileSettings["controlApiToken"]
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.bridge.loop = self.loop
+        try:
+            if self.unixSocket and hasattr(asyncio, "start_unix_server"):
+                server = self.loop.run_until_complete(
+                    asyncio.start_unix_server(self.handle, path=self.unixSocket)
+                )
+                MCSL2Logger.info(f"控制API已监听{self.unixSocket}")
+            else:
+                server = self.loop.run_until_complete(
+                    asyncio.start_server(self.handle, self.host, self.port)
+                )
+                MCSL2Logger.info(f"控制API已监听{self.host}:{self.port}")
+        except OSError as e:
+            MCSL2Logger.error(exc=e, msg="控制API启动失败")
+            self.bridge.loop = None
+            self.loop.close()
+            return
+        try:
+            self.loop.run_forever()
+        finally:
+            self.bridge.loop = None
+            server.close()
+            self.loop.run_until_complete(server.wait_closed())
+            self.loop.close()
+
+    def stop(self):
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.wait(3000)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            requestLine = (await reader.readline()).decode("latin-1").split()
+            if len(requestLine) != 3:
+                return
+            method, target, _ = requestLine
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+            if "origin" in headers:
+                raise ApiError(403, "cross-origin requests are not allowed")
+            if headers.get("authorization", "") != f"Bearer {self.token}":
+                raise ApiError(401, "unauthorized")
+            url = urlsplit(target)
+            await self.route(
+                method.upper(),
+                [unquote(part) for part in url.path.split("/") if part],
+                parse_qs(url.query),
+                body,
+                writer,
+            )
+        except ApiError as e:
+            await self.respond(writer, e.status, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            MCSL2Logger.error(exc=e, msg="控制API处理请求失败")
+            try:
+                await self.respond(writer, 500, {"error": repr(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, parts: List[str], query: dict, body: bytes, writer):
+        if parts == ["servers"] and method == "GET":
+            return await self.respond(writer, 200, await self.bridge.call(listServers))
+        if len(parts) < 3 or parts[0] != "servers":
+            raise ApiError(404, "not found")
+        name, action = parts[1], "/".join(parts[2:])
+        if method == "POST" and action == "restart" and "delay" in query:
+            delay = query["delay"][0]
+            if not delay.isdigit():
+                raise ApiError(400, "invalid delay")
+            state = await self.bridge.call(restartServer, name, int(delay))
+            return await self.respond(writer, 200, {"name": name, "state": state})
+        if method == "POST" and action in self.actions:
+            state = await self.bridge.call(self.actions[action], name)
+            return await self.respond(writer, 200, {"name": name, "state": state})
+        if method == "POST" and action == "command":
+            # 纯文本每行一条命令，或JSON {"command": "..."} / {"commands": [...]}
+            text = body.decode("utf-8", errors="replace").strip()
+            if text.startswith("{"):
+                try:
+                    data = loads(text)
+                except ValueError:
+                    raise ApiError(400, "invalid json")
+                if not isinstance(data, dict) or not isinstance(
+                    data.get("commands", []), list
+                ):
+                    raise ApiError(400, "invalid json")
+                commands = [str(c) for c in data.get("commands", [])]
+                if data.get("command"):
+                    commands.insert(0, str(data["command"]))
+            else:
+                commands = text.splitlines()
+            commands = [c.strip() for c in commands if c.strip()]
+            if not commands:
+                raise ApiError(400, "empty command")
+            state = await self.bridge.call(sendCommand, name, commands)
+            return await self.respond(writer, 200, {"name": name, "state": state})
+        if method == "POST" and action == "restore":
+            snapshotId = body.decode("utf-8", errors="replace").strip()
+            state = await self.bridge.call(restoreServer, name, snapshotId)
+            return await self.respond(writer, 200, {"name": name, "state": state})
+        if method == "GET" and action == "backups":
+            return await self.respond(writer, 200, BackupStore(name).snapshots())
+        if method == "GET" and action == "console":
+            since = query.get("since", [None])[0]
+            if since is not None and not since.isdigit():
+                raise ApiError(400, "invalid since")
+            return await self.streamConsole(writer, name, since)
+        if method == "GET" and action == "stats":
+            return await self.respond(writer, 200, self.bridge.tail(name).stats or {})
+        if method == "GET" and action == "stats/stream":
+            return await self.streamStats(writer, name)
+        raise ApiError(404, "not found")
+
+    @staticmethod
+    async def respond(writer, status: int, obj):
+        data = dumps(obj, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1")
+            + data
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def startStream(writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        await writer.drain()
+
+    async def streamConsole(self, writer, name: str, since: Optional[str]):
+        """推送终端输出，默认先补发缓冲区内的全部行"""
+        tail = self.bridge.tail(name)
+        cursor = tail.first if since is None else int(since)
+        await self.startStream(writer)
+        while True:
+            await tail.waitLines(cursor)
+            lines, end, dropped = tail.read(cursor)
+            chunks = []
+            if dropped:
+                chunks.append(f"event: dropped\ndata: {dropped}\n\n")
+            seq = end - len(lines)
+            for line in lines:
+                line = line.replace("\n", "\ndata: ")
+                chunks.append(f"id: {seq}\ndata: {line}\n\n")
+                seq += 1
+            cursor = end
+            writer.write("".join(chunks).encode("utf-8"))
+            await writer.drain()
+
+    async def streamStats(self, writer, name: str):
+        tail = self.bridge.tail(name)
+        await self.startStream(writer)
+        while True:
+            await tail.statsChanged.wait()
+            writer.write(f"data: {dumps(tail.stats)}\n\n".encode("utf-8"))
+            await writer.drain()
+
+
+def startControlApi(parent=None) -> Optional[ControlApiServer]:
+    """按设置启动控制API，须在Qt主线程调用"""
+    if not settingsController.fileSettings["controlApi"]:
+        return None
+    if not settingsController.fileSettings["controlApiToken"]:
+        settingsController._changeSettings({"controlApiToken": token_urlsafe(24)})
+        settingsController._saveSettings()
+        MCSL2Logger.info("已为控制API生成随机令牌，见MCSL2_Config.json中的controlApiToken")
+    bridge = ControlBridge(parent=parent)
+    bridge.attachRuntimes()
+    server = ControlApiServer(bridge, parent)
+    server.start()
+    return server
@@ -0,0 +1,163 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Headless daemon: run servers with QCoreApplication only, no widgets loaded.
+"""
+
+import signal
+import sys
+from typing import List
+
+from PyQt5.QtCore import QCoreApplication, QObject, QTimer
+
+from MCSL2Lib.Controllers.controlApiController import startControlApi
+from MCSL2Lib.Controllers.serverController import (
+    LaunchResult,
+    MojangEula,
+    ServerHandler,
+    ServerHelper,
+    ServerLauncher,
+    ServerRuntime,
+)
+from MCSL2Lib.Controllers.settingsController import SettingsController
+from MCSL2Lib.utils import MCSL2Logger, readGlobalServerConfig
+
+settingsController = SettingsController()
+
+
+class HeadlessDaemon(QObject):
+    """
+    无界面守护进程\n
+    复用ServerLauncher/ServerHandler启动服务器，崩溃重启沿用"restartServerWhenCrashed"设置，
+    终端输出写入标准输出与日志归档；收到SIGINT/SIGTERM时依次关闭全部服务器，全部关闭后退出。
+    开启了控制API时，服务器全部关闭后仍保持运行。\n
+    全程不导入PyQt5.QtWidgets、qfluentwidgets与图标资源。
+    """
+
+    def __init__(self, serverNames: List[str], acceptEula: bool = False, parent=None):
+        super().__init__(parent)
+        self.serverNames = serverNames
+        self.acceptEula = acceptEula
+        self.stopping = False
+        # 开启控制API时，服务器全部关闭后仍保持运行，等待API再次启动服务器
+        self.keepAlive = False
+        self.attached = set()
+        ServerHandler().runtimesChanged.connect(self.attachRuntimes)
+        # Python只在解释器取回控制权时处理信号，事件循环空转时需要定时让出
+        self.signalTimer = QTimer(self)
+        self.signalTimer.timeout.connect(lambda: None)
+        self.signalTimer.start(200)
+
+    def start(self) -> bool:
+        """启动全部选中的服务器，一个都没能启动时返回False"""
+        globalServerList = readGlobalServerConfig()
+        serverNameList = [server["name"] for server in globalServerList]
+        for name in self.serverNames:
+            if name not in serverNameList:
+                MCSL2Logger.warning(f"[守护进程] 找不到服务器{name}")
+                continue
+            ServerHelper().loadServerConfig(index=serverNameList.index(name))
+            if not MojangEula().checkEula():
+                if not (
+                    self.acceptEula
+                    or settingsController.fileSettings["acceptAllMojangEula"]
+                ):
+                    MCSL2Logger.warning(
+                        f"[守护进程] 服务器{name}未同意Minecraft EULA，已跳过。可使用--accept-eula同意"
+                    )
+                    continue
+                MojangEula().acceptEula()
+            if ServerLauncher().startServer() == LaunchResult.PRUNING:
+                MCSL2Logger.warning(f"[守护进程] 服务器{name}正在清理区块，已跳过")
+        return bool(ServerHandler().runtimes)
+
+    def attachRuntimes(self):
+        for name, runtime in ServerHandler().runtimes.items():
+            if name not in self.attached:
+                self.attached.add(name)
+                self.attach(runtime)
+
+    def attach(self, runtime: ServerRuntime):
+        runtime.serverLogOutput.connect(
+            lambda line: self.echo(runtime.name, [line])
+        )
+        runtime.serverLogOutputBatch.connect(
+            lambda lines: self.echo(runtime.name, lines)
+        )
+        runtime.stateChanged.connect(lambda _: self.checkAlive())
+
+    @staticmethod
+    def echo(serverName: str, lines: list):
+        sys.stdout.write("".join(f"[{serverName}] {line}\n" for line in lines))
+        sys.stdout.flush()
+
+    def isAlive(self) -> bool:
+        return ServerHandler().isAnyServerActive()
+
+    def checkAlive(self):
+        if self.keepAlive and not self.stopping:
+            return
+        if not self.isAlive():
+            MCSL2Logger.info("[守护进程] 全部服务器已关闭，退出")
+            QCoreApplication.quit()
+
+    def requestStop(self, *_):
+        """关闭全部服务器；再次收到信号时强制结束"""
+        if self.stopping:
+            MCSL2Logger.warning("[守护进程] 再次收到退出信号，强制结束全部服务器")
+            for runtime in ServerHandler().runtimes.values():
+                runtime.haltServer()
+            return
+        self.stopping = True
+        MCSL2Logger.info("[守护进程] 正在关闭全部服务器...")
+        ServerHandler().stopAllServers()
+        self.checkAlive()
+
+
+def runHeadless(argv: List[str]) -> int:
+    """
+    无界面模式入口\n
+    用法：MCSL2.py --headless [--server 名称]... [--accept-eula]\n
+    不指定--server时启动上次运行的服务器
+    """
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(prog="MCSL2", description="MCSL2 无界面模式")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument(
+        "--server", action="append", default=[], help="要启动的服务器名称，可重复指定"
+    )
+    parser.add_argument("--accept-eula", action="store_true", help="自动同意Minecraft EULA")
+    args, _ = parser.parse_known_args(argv[1:])
+
+    app = QCoreApplication(argv)
+    settingsController.initialize(firstLoad=True)
+    MCSL2Logger.setLevel(settingsController.fileSettings["logLevel"])
+    serverNames = args.server or [
+        name for name in (settingsController.fileSettings["lastServer"],) if name
+    ]
+    if not serverNames and not settingsController.fileSettings["controlApi"]:
+        MCSL2Logger.warning("[守护进程] 没有指定服务器，请使用--server指定")
+        return 2
+
+    daemon = HeadlessDaemon(serverNames, acceptEula=args.accept_eula)
+    signal.signal(signal.SIGINT, daemon.requestStop)
+    signal.signal(signal.SIGTERM, daemon.requestStop)
+    controlApi = startControlApi(daemon)
+    daemon.keepAlive = controlApi is not None
+    if not daemon.start() and controlApi is None:
+        return 1
+    rv = app.exec_()
+    if controlApi is not None:
+        controlApi.stop()
+    return rv
@@ -0,0 +1,151 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Detect the output encoding of a server from the first bytes of its stdout.
+"""
+
+from codecs import getincrementaldecoder, lookup
+from json import dumps, loads
+from locale import getpreferredencoding
+from os import path as osp
+from typing import Iterable, List, Optional, Tuple
+
+from MCSL2Lib.utils import MCSL2Logger
+
+defaultCandidates = ("utf-8", "gbk", "cp936")
+asciiBytes = bytes(range(0x80))
+
+
+def uniqueEncodings(names: Iterable[str]) -> List[str]:
+    """按规范名去重(cp936与gbk是同一个编码)，跳过当前平台不存在的编码"""
+    rv, seen = [], set()
+    for name in names:
+        try:
+            canonical = lookup(name).name
+        except LookupError:
+            continue
+        if canonical not in seen:
+            seen.add(canonical)
+            rv.append(name)
+    return rv
+
+
+class EncodingDetector:
+    """
+    服务器输出编码检测\n
+    纯ASCII的输出与编码无关，直接放行；出现非ASCII字节后开始暂存，
+    积累到minNonAscii个非ASCII字节或sampleBytes字节(或调用finish())时，
+    用每个候选编码的增量解码器解码样本，按"\\ufffd个数 / 非ASCII字节数"打分，错误率最低者胜出，
+    同分时按候选顺序取靠前的(UTF-8优先，GBK能无错解码不少UTF-8中文，反之则不行)。\n
+    判定后暂存的字节原样交还调用方，用新编码重新分行，不会丢失或重复解码任何输出。
+    """
+
+    def __init__(
+        self,
+        candidates: Optional[Iterable[str]] = None,
+        sampleBytes: int = 8192,
+        minNonAscii: int = 64,
+    ):
+        self.candidates = uniqueEncodings(
+            candidates or (*defaultCandidates, getpreferredencoding(False))
+        )
+        self.sampleBytes = sampleBytes
+        self.minNonAscii = minNonAscii
+        self.result: Optional[str] = None
+        self.scores: List[Tuple[str, float]] = []
+        self._held = bytearray()
+        self._nonAscii = 0
+
+    @property
+    def decided(self) -> bool:
+        return self.result is not None
+
+    def holding(self) -> bool:
+        """是否有因等待判定而暂存的字节"""
+        return bool(self._held)
+
+    def feed(self, data: bytes) -> bytes:
+        """送入一段原始输出，返回现在就可以交给分行器的字节"""
+        if self.result is not None:
+            return data
+        if not self._held and data.isascii():
+            return data
+        self._held.extend(data)
+        self._nonAscii += len(data.translate(None, asciiBytes))
+        if self._nonAscii >= self.minNonAscii or len(self._held) >= self.sampleBytes:
+            return self.finish()
+        return b""
+
+    def finish(self) -> bytes:
+        """用已有的样本立即判定(输出停顿或进程结束时)，返回暂存的字节"""
+        data = bytes(self._held)
+        self._held.clear()
+        if self.result is None and self._nonAscii:
+            self.result = self.decide(data)
+        return data
+
+    def decide(self, sample: bytes) -> str:
+        self.scores = [(name, self.errorRate(name, sample)) for name in self.candidates]
+        return min(self.scores, key=lambda score: score[1])[0]
+
+    def errorRate(self, encoding: str, sample: bytes) -> float:
+        # final=False：样本末尾被截断的多字节字符不计为错误
+        text = getincrementaldecoder(encoding)(errors="replace").decode(sample, False)
+        return text.count("\ufffd") / max(self._nonAscii, 1)
+
+
+def settingEncoding(encoding: str) -> Optional[str]:
+    """
+    把检测到的编码换成编码设置里的取值(utf-8、GB18030、ansi)\n
+    GBK/GB2312对应GB18030(其超集)，系统首选编码对应ansi，其余无法对应的返回None
+    """
+    if encoding in ("follow", "utf-8", "GB18030", "ansi", "auto"):
+        return encoding
+    try:
+        name = lookup(encoding).name
+        preferred = lookup(getpreferredencoding(False)).name
+    except LookupError:
+        return None
+    if name == "utf-8":
+        return "utf-8"
+    if name in ("gbk", "gb2312", "gb18030"):
+        return "GB18030"
+    if name == preferred:
+        return "ansi"
+    return None
+
+
+def rememberEncoding(serverName: str, encoding: str):
+    """
+    把检测结果写入该服务器的全局配置与单独配置，下次启动不再检测\n
+    只替换该服务器自己设置的"auto"，"follow"(跟随全局设置)等明确的设置保持不变；
+    encoding应为settingEncoding()换算后的设置取值
+    """
+    try:
+        with open(r"MCSL2/MCSL2_ServerList.json", "r", encoding="utf-8") as f:
+            globalServerList = loads(f.read())
+        for server in globalServerList["MCSLServerList"]:
+            if server["name"] == serverName and server.get("output_decoding") == "auto":
+                server["output_decoding"] = encoding
+        with open(r"MCSL2/MCSL2_ServerList.json", "w+", encoding="utf-8") as f:
+            f.write(dumps(globalServerList, indent=4))
+        serverConfigPath = f"Servers//{serverName}//MCSL2ServerConfig.json"
+        if osp.exists(serverConfigPath):
+            with open(serverConfigPath, "r", encoding="utf-8") as f:
+                serverConfig = loads(f.read())
+            if serverConfig.get("output_decoding") == "auto":
+                serverConfig["output_decoding"] = encoding
+                with open(serverConfigPath, "w+", encoding="utf-8") as f:
+                    f.write(dumps(serverConfig, indent=4))
+    except (OSError, ValueError, KeyError) as e:
+        MCSL2Logger.warning(f"保存服务器{serverName}的输出编码失败：{e}")
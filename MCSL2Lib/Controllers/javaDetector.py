@@ -15,14 +15,25 @@ An auto-detect Java function.
 '''
 
 import json
-from os import listdir, remove
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import total_ordering
+from os import cpu_count, remove, replace, scandir, stat
 from os import path as osp
-from platform import system
-from re import search
-
-from PyQt5.QtCore import QThread, pyqtSignal, QProcess
+from platform import machine, system
+from re import findall, match as reMatch, search
+from struct import error as StructError, unpack_from
+from subprocess import DEVNULL, PIPE, TimeoutExpired, run
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from zipfile import BadZipFile, ZipFile
+
+from PyQt5.QtCore import QThread, pyqtSignal
+from MCSL2Lib.Controllers.serverInstaller import ForgeInstaller, McVersion
+from MCSL2Lib.Controllers.settingsController import SettingsController
 from MCSL2Lib.utils import MCSL2Logger
 
+settingsController = SettingsController()
+
 
 
 foundJava = []
@@ -43,10 +54,53 @@ excludedKeywords = {
 
 
 # fmt: on
+@total_ordering
+class JavaVersion:
+    """
+    Java版本号\n
+    旧式的1.x写法(1.8.0_392、1.8.0.392)统一为8.0.392，各段按数字比较
+    """
+
+    def __init__(self, version: str):
+        head = reMatch(r"[\d._]*", str(version).strip()).group()
+        parts = [int(i) for i in findall(r"\d+", head)]
+        if len(parts) > 1 and parts[0] == 1:
+            parts = parts[1:]
+        while len(parts) > 1 and parts[-1] == 0:
+            parts.pop()
+        self.parts: Tuple[int, ...] = tuple(parts)
+
+    @property
+    def feature(self) -> int:
+        """大版本号，例如8、17、21；无法识别时为0"""
+        return self.parts[0] if self.parts else 0
+
+    def __eq__(self, other):
+        if isinstance(other, JavaVersion):
+            return self.parts == other.parts
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, JavaVersion):
+            return self.parts < other.parts
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.parts)
+
+    def __str__(self):
+        return ".".join(str(i) for i in self.parts) or "unknown"
+
+    def __repr__(self):
+        return str(self)
+
+
 class Java:
-    def __init__(self, path, ver):
+    def __init__(self, path, ver, vendor="", arch=""):
         self._path = path
         self._version = ver
+        self.vendor = vendor
+        self.arch = arch
 
     @property
     def path(self):
@@ -56,12 +110,21 @@ class Java:
     def version(self):
         return self._version
 
+    @property
+    def javaVersion(self) -> JavaVersion:
+        return JavaVersion(self._version)
+
     @property
     def json(self):
-        return {
+        rv = {
             "Path": self.path,
             "Version": self.version
         }
+        if self.vendor:
+            rv["Vendor"] = self.vendor
+        if self.arch:
+            rv["Arch"] = self.arch
+        return rv
 
     def __hash__(self):
         return hash((self._path, self._version))
@@ -74,30 +137,6 @@ class Java:
             return self._path == other._path and self._version == other._version
 
 
-def getJavaVersion(File):
-    """
-    获取Java版本，三端通用\n
-    有人问，为什么不Win32API读取文件：无法跨平台\n
-    有人问，为什么不读取Java安装目录下的release文件：万一没有呢\n
-    急死我了。 --LxHTT
-    """
-    process = QProcess()
-    process.start(File, ["-version"])
-    process.waitForFinished()
-    output = process.readAllStandardError().data().decode("utf-8")
-
-    # 从输出中提取版本信息
-    version_pattern = r"(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:[._](\d+))?(?:-(.+))?"
-    version_match = search(version_pattern, output)
-
-    # 输出版本信息
-    if version_match:
-        version = ".".join(filter(None, version_match.groups()))
-        return version
-    else:
-        return ""
-
-
 def findStr(s):
     for _s in excludedKeywords:
         if _s in s:
@@ -108,54 +147,6 @@ def findStr(s):
     return False
 
 
-def searchFile(Path, FileKeyword, FileExtended, FuzzySearch, _Match):
-    # construct _Match function
-    if "windows" in system().lower():
-        def Match(P, F):
-            return osp.join(P, F).endswith(r"bin\java.exe")
-    else:
-        def Match(P, F):
-            return osp.join(P, F).endswith(r"bin/java")
-
-    processes = searchingFile(Path, FileKeyword, FileExtended, FuzzySearch, Match)
-    rv = []
-    for process in processes:
-        process.waitForFinished()
-        try:
-            if match := _Match(process.readAllStandardError().data().decode("utf-8")):
-                rv.append(Java(process.program(), match))
-        except UnicodeDecodeError:
-            if match := _Match(process.readAllStandardError().data().decode("gbk")):
-                rv.append(Java(process.program(), match))
-    return rv
-
-
-def searchingFile(Path, FileKeyword, FileExtended, FuzzySearch, _Match):
-    processes = []
-    if FuzzySearch:
-        if osp.isfile(Path) or "x86_64-linux-gnu" in Path:
-            return processes
-        try:
-            for File in listdir(Path):
-                _Path = osp.join(Path, File)
-                if osp.isfile(_Path):
-                    if _Match(Path, File):
-                        process = QProcess()
-                        process.start(_Path, ["-version"])
-                        processes.append(process)
-                elif findStr(File.lower()):
-                    processes.extend(
-                        searchingFile(
-                            _Path, FileKeyword, FileExtended, FuzzySearch, _Match
-                        )
-                    )
-        except PermissionError:
-            pass
-        except FileNotFoundError as e:
-            pass
-    return processes
-
-
 def JavaVersionMatcher(s):
     pattern = r"(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:[._](\d+))?(?:-(.+))?"
     match = search(pattern, s)
@@ -166,34 +157,336 @@ def JavaVersionMatcher(s):
     return match
 
 
-def detectJava(FuzzySearch=True):
-    JavaPathList = []
-    foundJava.clear()
+def fingerprint(path: str) -> Optional[List[int]]:
+    """
+    文件指纹：修改时间、大小与inode\n
+    Java被升级、替换或删除后指纹随之改变，缓存失效
+    """
+    try:
+        info = stat(path)
+    except OSError:
+        return None
+    return [info.st_mtime_ns, info.st_size, info.st_ino]
+
+
+def _decodeOutput(data: bytes) -> str:
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("gbk", "replace")
+
+
+class JavaInfo(NamedTuple):
+    version: str
+    vendor: str
+    arch: str
+    # "release"表示读取自release文件，"process"表示运行了java
+    source: str
+
+
+_archAliases = {
+    "amd64": "x86_64", "x64": "x86_64", "x86_64": "x86_64",
+    "i386": "x86", "i586": "x86", "i686": "x86", "x86": "x86",
+    "arm64": "aarch64", "aarch64": "aarch64", "arm": "arm", "aarch32": "arm",
+    "ppc64le": "ppc64le", "ppc64": "ppc64", "s390x": "s390x", "riscv64": "riscv64",
+}  # fmt: skip
+# PE的Machine字段
+_peMachines = {0x8664: "x86_64", 0x014C: "x86", 0xAA64: "aarch64", 0x01C4: "arm"}
+# ELF的e_machine字段
+_elfMachines = {
+    0x03: "x86", 0x3E: "x86_64", 0xB7: "aarch64", 0x28: "arm",
+    0x15: "ppc64", 0x16: "s390x", 0xF3: "riscv64",
+}  # fmt: skip
+# Mach-O的cputype字段
+_machoCpuTypes = {0x01000007: "x86_64", 0x0100000C: "aarch64", 0x07: "x86"}
+
+
+def normalizeArch(arch: str) -> str:
+    arch = arch.strip().lower()
+    return _archAliases.get(arch, arch)
+
+
+def binaryArch(path: str) -> str:
+    """
+    读取可执行文件头(PE/ELF/Mach-O)得到架构，无法识别时返回空字符串\n
+    只读取文件开头4 KiB，不运行程序
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(4096)
+    except OSError:
+        return ""
+    try:
+        if head[:2] == b"MZ":
+            offset = unpack_from("<I", head, 0x3C)[0]
+            if head[offset : offset + 4] == b"PE\0\0":
+                return _peMachines.get(unpack_from("<H", head, offset + 4)[0], "")
+        elif head[:4] == b"\x7fELF":
+            order = "<" if head[5] == 1 else ">"
+            return _elfMachines.get(unpack_from(f"{order}H", head, 18)[0], "")
+        elif head[:4] in (b"\xcf\xfa\xed\xfe", b"\xce\xfa\xed\xfe"):
+            return _machoCpuTypes.get(unpack_from("<I", head, 4)[0], "")
+    except StructError:
+        pass
+    return ""
+
+
+def javaHome(path: str) -> str:
+    """<JAVA_HOME>/bin/java -> <JAVA_HOME>"""
+    return osp.dirname(osp.dirname(osp.abspath(path)))
+
+
+def readReleaseFile(path: str) -> Dict[str, str]:
+    """
+    读取java可执行文件对应的release文件\n
+    JDK 8的jre/bin/java在上一级目录中查找；没有release文件时返回空字典
+    """
+    home = javaHome(path)
+    candidates = [osp.join(home, "release")]
+    if osp.basename(home).lower() == "jre":
+        candidates.append(osp.join(osp.dirname(home), "release"))
+    for releasePath in candidates:
+        try:
+            with open(releasePath, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError:
+            continue
+        rv = {}
+        for line in text.splitlines():
+            key, sep, value = line.partition("=")
+            if sep:
+                rv[key.strip()] = value.strip().strip('"')
+        return rv
+    return {}
+
+
+def _fromRelease(path: str) -> Optional[JavaInfo]:
+    release = readReleaseFile(path)
+    if not release.get("JAVA_VERSION"):
+        return None
+    version = JavaVersionMatcher(release["JAVA_VERSION"])
+    if version == "unknown":
+        return None
+    arch = normalizeArch(release.get("OS_ARCH", ""))
+    # release文件与可执行文件架构不一致(例如被复制拼凑的目录)时不可信
+    if arch and (actual := binaryArch(path)) and actual != arch:
+        return None
+    return JavaInfo(
+        version, release.get("IMPLEMENTOR", ""), arch or binaryArch(path), "release"
+    )
+
+
+def _fromProcess(path: str, timeout: float) -> Optional[JavaInfo]:
+    kwargs = {}
     if "windows" in system().lower():
-        for i in range(65, 91):
-            Path = chr(i) + ":\\"
-            if osp.exists(Path):
-                JavaPathList.extend(
-                    searchFile(Path, "java", "exe", FuzzySearch, JavaVersionMatcher)
-                )
-    else:
-        JavaPathList.extend(
-            searchFile("/usr/lib", "java", "", FuzzySearch, JavaVersionMatcher)
+        # CREATE_NO_WINDOW，避免每个探测都弹出控制台窗口
+        kwargs["creationflags"] = 0x08000000
+    try:
+        result = run(
+            [path, "-XshowSettings:properties", "-version"],
+            stdin=DEVNULL,
+            stdout=DEVNULL,
+            stderr=PIPE,
+            timeout=timeout,
+            **kwargs,
         )
-    return JavaPathList
-
-
-def checkJavaAvailability(java: Java):
-    if osp.exists(java.path):
-        process = QProcess()
-        process.start(java.path, ["-version"])
-        process.waitForFinished()
-        output = process.readAllStandardError().data().decode("utf-8")
-        process.deleteLater()
-        matcher = JavaVersionMatcher(output)
-        if matcher == java.version:
-            return True
-    return False
+    except (OSError, TimeoutExpired):
+        return None
+    output = _decodeOutput(result.stderr)
+    properties = {}
+    for line in output.splitlines():
+        key, sep, value = line.partition(" = ")
+        if sep:
+            properties[key.strip()] = value.strip()
+    # Java 6不支持-XshowSettings，只能从-version的输出中匹配
+    version = JavaVersionMatcher(properties.get("java.version", output))
+    if version == "unknown":
+        return None
+    return JavaInfo(
+        version,
+        properties.get("java.vendor", ""),
+        normalizeArch(properties.get("os.arch", "")) or binaryArch(path),
+        "process",
+    )
+
+
+def probeJavaInfo(path: str, timeout: float = 10) -> Optional[JavaInfo]:
+    """
+    分级探测Java信息\n
+    先读取<JAVA_HOME>/release(JAVA_VERSION、IMPLEMENTOR、OS_ARCH)，不启动JVM；
+    release文件不存在或与可执行文件对不上时才运行java -XshowSettings:properties -version\n
+    无法运行或超时返回None；在线程池中调用，不依赖Qt事件循环
+    """
+    if not osp.isfile(path):
+        return None
+    return _fromRelease(path) or _fromProcess(path, timeout)
+
+
+def getJavaVersion(File):
+    """
+    获取Java版本，三端通用\n
+    优先读取Java安装目录下的release文件，没有的话再运行java
+    """
+    info = probeJavaInfo(File)
+    return info.version if info is not None else ""
+
+
+def searchRoots() -> List[str]:
+    """自动查找的起点目录"""
+    if "windows" in system().lower():
+        return [f"{chr(i)}:\\" for i in range(65, 91) if osp.exists(f"{chr(i)}:\\")]
+    roots = ["/usr/lib", "/usr/java", "/opt", "/Library/Java/JavaVirtualMachines"]
+    return [root for root in roots if osp.isdir(root)]
+
+
+def _isJavaBinary(dirName: str, fileName: str) -> bool:
+    if "windows" in system().lower():
+        return dirName.lower() == "bin" and fileName.lower() == "java.exe"
+    return dirName == "bin" and fileName == "java"
+
+
+def _scanDir(path: str, fuzzySearch: bool) -> Tuple[List[str], List[str]]:
+    """扫描单个目录，返回(需要继续深入的子目录, 找到的java可执行文件)"""
+    dirs, candidates = [], []
+    dirName = osp.basename(osp.normpath(path))
+    try:
+        with scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if "x86_64-linux-gnu" in entry.name:
+                            continue
+                        if not fuzzySearch or findStr(entry.name.lower()):
+                            dirs.append(entry.path)
+                    elif _isJavaBinary(dirName, entry.name) and entry.is_file():
+                        candidates.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return dirs, candidates
+
+
+def walkJavaCandidates(roots: List[str], fuzzySearch=True, workers: int = 0) -> List[str]:
+    """
+    用线程池并行遍历目录，返回所有候选的java可执行文件\n
+    每个目录一个任务，慢速磁盘上的目录不会阻塞其他目录的遍历
+    """
+    candidates = []
+    with ThreadPoolExecutor(max_workers=workers or min(16, (cpu_count() or 1) * 2)) as pool:
+        pending = {pool.submit(_scanDir, root, fuzzySearch) for root in roots}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dirs, found = future.result()
+                candidates.extend(found)
+                pending.update(pool.submit(_scanDir, d, fuzzySearch) for d in dirs)
+    return candidates
+
+
+def _cacheEntry(fp: List[int], info: Optional[JavaInfo]) -> dict:
+    if info is None:
+        return {"Fingerprint": fp, "Version": ""}
+    return {
+        "Fingerprint": fp,
+        "Version": info.version,
+        "Vendor": info.vendor,
+        "Arch": info.arch,
+    }
+
+
+def detectJava(FuzzySearch=True, workers: int = 0) -> List[Java]:
+    """
+    自动查找Java\n
+    遍历与探测都在线程池中进行，同时运行的java -version不超过workers个；
+    指纹未变的文件直接使用缓存中的版本，不再启动JVM
+    """
+    foundJava.clear()
+    candidates = walkJavaCandidates(searchRoots(), FuzzySearch)
+    cache = loadProbeCache()
+    results: Dict[str, dict] = {}
+    toProbe: List[Tuple[str, List[int]]] = []
+    for path in dict.fromkeys(candidates):
+        if (fp := fingerprint(path)) is None:
+            continue
+        cached = cache.get(path)
+        if cached is not None and cached.get("Fingerprint") == fp:
+            results[path] = cached
+        else:
+            toProbe.append((path, fp))
+    if toProbe:
+        with ThreadPoolExecutor(max_workers=workers or min(4, cpu_count() or 1)) as pool:
+            for (path, fp), info in zip(
+                toProbe, pool.map(probeJavaInfo, [path for path, _ in toProbe])
+            ):
+                results[path] = cache[path] = _cacheEntry(fp, info)
+        saveProbeCache(cache)
+    MCSL2Logger.info(
+        f"查找Java：{len(candidates)}个候选，{len(toProbe)}个需要重新探测"
+    )
+    foundJava.extend(
+        Java(path, e["Version"], e.get("Vendor", ""), e.get("Arch", ""))
+        for path, e in results.items()
+        if e.get("Version")
+    )
+    return list(foundJava)
+
+
+def checkJavaAvailability(java: Java, cache: Optional[Dict[str, dict]] = None):
+    """
+    检查Java是否仍然可用
+
+    指纹与探测缓存一致时直接比较缓存中的版本；否则分级探测，多数情况下只需读取release文件
+    """
+    if (fp := fingerprint(java.path)) is None:
+        return False
+    if cache is None:
+        cache = loadProbeCache()
+    cached = cache.get(java.path)
+    if cached is None or cached.get("Fingerprint") != fp:
+        cached = cache[java.path] = _cacheEntry(fp, probeJavaInfo(java.path))
+    return cached.get("Version") == java.version
+
+
+_javaListFile = "MCSL2/MCSL2_DetectedJava.json"
+_javaListLock = Lock()
+
+
+def _readJavaListFile() -> dict:
+    if not osp.exists(_javaListFile):
+        return {}
+    try:
+        with open(_javaListFile, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _writeJavaListFile(data: dict):
+    tmpPath = f"{_javaListFile}.tmp"
+    with open(tmpPath, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, sort_keys=True, indent=4)
+    replace(tmpPath, _javaListFile)
+
+
+def loadProbeCache() -> Dict[str, dict]:
+    """
+    读取探测缓存\n
+    格式为{路径: {"Fingerprint": [mtime_ns, size, inode], "Version": 版本}}，版本为空表示不是可用的Java
+    """
+    with _javaListLock:
+        cache = _readJavaListFile().get("cache", {})
+    return cache if isinstance(cache, dict) else {}
+
+
+def saveProbeCache(cache: Dict[str, dict]):
+    """写入探测缓存，去掉已不存在的文件，保留Java列表"""
+    with _javaListLock:
+        data = _readJavaListFile()
+        data["cache"] = {path: e for path, e in cache.items() if osp.exists(path)}
+        data.setdefault("java", [])
+        _writeJavaListFile(data)
 
 
 def loadJavaList():
@@ -207,41 +500,34 @@ def loadJavaList():
     if osp.exists("MCSL2/AutoDetectJavaHistory.json"):
         remove("MCSL2/AutoDetectJavaHistory.json")
 
-    if not osp.exists("MCSL2/MCSL2_DetectedJava.json"):
-        return []
-    with open(
-            "MCSL2/MCSL2_DetectedJava.json", "r", encoding="utf-8"
-    ) as f:
-        foundedJava = json.load(f)
-        l = [Java(e["Path"], e["Version"]) for e in foundedJava["java"]]
-        return l
+    with _javaListLock:
+        foundedJava = _readJavaListFile()
+    return [
+        Java(e["Path"], e["Version"], e.get("Vendor", ""), e.get("Arch", ""))
+        for e in foundedJava.get("java", [])
+    ]
 
 
 def saveJavaList(l: list):
-    with open(
-            "MCSL2/MCSL2_DetectedJava.json", "w", encoding="utf-8"
-    ) as f:
-        json.dump(
-            {"java": [j.json for j in l]},
-            f,
-            ensure_ascii=False,
-            sort_keys=True,
-            indent=4
-        )
+    """写入Java列表，保留探测缓存"""
+    with _javaListLock:
+        data = _readJavaListFile()
+        data["java"] = [j.json for j in l]
+        _writeJavaListFile(data)
 
 
 def sortJavaList(l: list, reverse=False):
     """
     为List[Java]排序
     """
-    l.sort(key=lambda x: x.version, reverse=reverse)
+    l.sort(key=lambda x: x.javaVersion, reverse=reverse)
 
 
 def sortedJavaList(l: list, reverse=False):
     """
     为List[Java]排序，并返回新列表
     """
-    return sorted(l, key=lambda x: x.version, reverse=reverse)
+    return sorted(l, key=lambda x: x.javaVersion, reverse=reverse)
 
 
 def combineJavaList(original: list, l: list,invaild:...,check=True):
@@ -253,15 +539,128 @@ def combineJavaList(original: list, l: list,invaild:...,check=True):
     s2 = set(l)
     s = s1.union(s2)
     if check:
+        cache = loadProbeCache()
         for e in s1 - s2:
-            if not checkJavaAvailability(e):
+            if not checkJavaAvailability(e, cache):
                 s.remove(e)
                 MCSL2Logger.warning(f"{e}已失效")
                 if isinstance(invaild,list):
                     invaild.append(e)
+        saveProbeCache(cache)
     return list(s)
 
 
+# (最低的Minecraft版本, 最低Java大版本, 最高Java大版本或None)，从新到旧排列
+# 旧版Forge等模组加载器对新Java的兼容性差，所以上限取保守值
+mcJavaRanges = [
+    ("1.20.5", 21, None),
+    ("1.20", 17, 21),
+    ("1.18", 17, 17),
+    ("1.17", 16, 17),
+    ("1.12", 8, 11),
+    ("1.0", 8, 8),
+]
+
+
+def parseMcVersion(version: str) -> Optional[McVersion]:
+    """从"1.20.1"、"paper-1.20.1-196.jar"等字符串中取出Minecraft版本，快照等无法识别时返回None"""
+    if isinstance(version, McVersion):
+        return version
+    if (m := search(r"(?<![\d.])1\.\d+(?:\.\d+)?(?![\d.]*\d)", str(version))) is None:
+        return None
+    try:
+        return McVersion(m.group())
+    except ValueError:
+        return None
+
+
+def mcJavaRange(mcVersion: McVersion) -> Tuple[int, Optional[int]]:
+    """Minecraft版本可用的Java大版本范围(最低, 最高)，最高为None表示不限"""
+    for minMcVersion, minJava, maxJava in mcJavaRanges:
+        if mcVersion >= McVersion(minMcVersion):
+            return minJava, maxJava
+    return 8, 8
+
+
+def readCoreMcVersion(corePath: str) -> Tuple[Optional[McVersion], int]:
+    """
+    读取核心jar中的version.json\n
+    返回(Minecraft版本, 核心要求的最低Java大版本)，原版与Paper等核心都带有此文件
+    """
+    try:
+        with ZipFile(corePath) as zipFile:
+            info = json.loads(zipFile.read("version.json"))
+    except (OSError, KeyError, ValueError, BadZipFile):
+        return None, 0
+    javaVersion = info.get("java_version", 0)
+    return (
+        parseMcVersion(info.get("id", "") or info.get("name", "")),
+        javaVersion if isinstance(javaVersion, int) else 0,
+    )
+
+
+def coreJavaRange(corePath: str, extraData: Optional[dict] = None):
+    """
+    推断服务器核心可用的Java范围\n
+    依次尝试extra_data中的mc_version、核心内的version.json、Forge安装器与核心文件名；
+    返回(Minecraft版本, 最低Java, 最高Java)，无法推断时返回None
+    """
+    mcVersion, requiredJava = readCoreMcVersion(corePath) if corePath else (None, 0)
+    if extraData and (v := parseMcVersion(extraData.get("mc_version", ""))):
+        mcVersion = v
+    if mcVersion is None and corePath:
+        try:
+            if (t := ForgeInstaller.isPossibleForgeInstaller(corePath)) is not None:
+                mcVersion = t[0]
+        except Exception:
+            pass
+    if mcVersion is None:
+        mcVersion = parseMcVersion(osp.basename(corePath or ""))
+    if mcVersion is None:
+        return None
+    minJava, maxJava = mcJavaRange(mcVersion)
+    minJava = max(minJava, requiredJava)
+    if maxJava is not None and maxJava < minJava:
+        maxJava = None
+    return mcVersion, minJava, maxJava
+
+
+def hasDefaultCDS(java: Java) -> bool:
+    """JDK自带默认CDS归档时类加载更快，启动也更快"""
+    home = javaHome(java.path)
+    return any(
+        osp.exists(osp.join(home, d, "server", "classes.jsa")) for d in ("lib", "bin")
+    )
+
+
+def selectBestJava(
+    javaList: List[Java], minJava: int, maxJava: Optional[int] = None
+) -> Optional[Java]:
+    """
+    从已知的Java中选择最合适的一个\n
+    在兼容范围内优先大版本最新的，其次是与系统架构一致、带默认CDS归档(启动更快)、小版本更新的；
+    没有兼容的Java时返回None
+    """
+    hostArch = normalizeArch(machine())
+
+    def rank(java: Java):
+        return (
+            java.javaVersion.feature,
+            not java.arch or java.arch == hostArch,
+            hasDefaultCDS(java),
+            java.javaVersion,
+        )
+
+    compatible = [
+        java
+        for java in javaList
+        if minJava <= java.javaVersion.feature
+        and (maxJava is None or java.javaVersion.feature <= maxJava)
+        and osp.exists(java.path)
+    ]
+    return max(compatible, key=rank) if compatible else None
+
+
 class JavaFindWorkThread(QThread):
     foundJavaSignal = pyqtSignal(list)
     finishSignal = pyqtSignal(int)
@@ -280,7 +679,9 @@ class JavaFindWorkThread(QThread):
         self._sequenceNumber = value
 
     def run(self):
-        self.foundJavaSignal.emit(detectJava(self._fuzzy))
+        self.foundJavaSignal.emit(
+            detectJava(self._fuzzy, settingsController.fileSettings["javaProbeWorkers"])
+        )
         self.finishSignal.emit(self._sequenceNumber)
 
 
@@ -0,0 +1,352 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+JVM flag profiles (Aikar's G1, ZGC, Shenandoah) tuned to the JDK and host, with per-JDK flag checks.
+"""
+
+from json import dumps, loads
+from os import path as osp, replace
+from platform import system
+from re import compile as reCompile
+from subprocess import DEVNULL, PIPE, TimeoutExpired, run
+from threading import Lock
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QThread
+from psutil import cpu_count, virtual_memory
+
+from MCSL2Lib.Controllers.javaDetector import JavaVersion, fingerprint, probeJavaInfo
+from MCSL2Lib.utils import MCSL2Logger
+
+# none: 不添加任何参数；auto: 按Java版本、内存与核心数自动选择
+profileNames = ["none", "auto", "aikar", "zgc", "shenandoah"]
+
+_flagsFile = "MCSL2/MCSL2_JvmFlags.json"
+_flagsLock = Lock()
+_flagsCache: Dict[str, dict] = {}
+# 正在后台检查的Java，QThread需要保留引用直到结束
+_probeThreads: Dict[str, "FlagProbeThread"] = {}
+# PrintFlagsFinal的输出，例如
+#      bool UseZGC                                   = false                                     {product} {default}
+#      bool UseG1GC                                 := true                                {product}
+_flagLine = reCompile(r"^\s*\S+\s+(\w+)\s+:?=\s*.*?\s*\{([^}]*)\}")
+_xxFlag = reCompile(r"^-XX:[+-]?(\w+)")
+_gcSelector = reCompile(r"^-XX:\+Use\w+GC$")
+
+
+def aikarFlags(heapMiB: int) -> List[str]:
+    """
+    Aikar的G1参数(https://mcflags.emc.gs)\n
+    堆大于12 GiB时使用更大的新生代与Region
+    """
+    large = heapMiB > 12 * 1024
+    return [
+        "-XX:+UseG1GC",
+        "-XX:+ParallelRefProcEnabled",
+        "-XX:MaxGCPauseMillis=200",
+        "-XX:+DisableExplicitGC",
+        "-XX:+AlwaysPreTouch",
+        f"-XX:G1NewSizePercent={40 if large else 30}",
+        f"-XX:G1MaxNewSizePercent={50 if large else 40}",
+        f"-XX:G1HeapRegionSize={'16M' if large else '8M'}",
+        f"-XX:G1ReservePercent={15 if large else 20}",
+        "-XX:G1HeapWastePercent=5",
+        "-XX:G1MixedGCCountTarget=4",
+        f"-XX:InitiatingHeapOccupancyPercent={20 if large else 15}",
+        "-XX:G1MixedGCLiveThresholdPercent=90",
+        "-XX:G1RSetUpdatingPauseTimePercent=5",
+        "-XX:SurvivorRatio=32",
+        "-XX:+PerfDisableSharedMem",
+        "-XX:MaxTenuringThreshold=1",
+        "-Dusing.aikars.flags=https://mcflags.emc.gs",
+        "-Daikars.new.flags=true",
+    ]
+
+
+def zgcFlags() -> List[str]:
+    """分代ZGC，Java 21+；Java 23起分代为默认，ZGenerational会在参数检查时被去掉"""
+    return [
+        "-XX:+UseZGC",
+        "-XX:+ZGenerational",
+        "-XX:+AlwaysPreTouch",
+        "-XX:+DisableExplicitGC",
+        "-XX:+PerfDisableSharedMem",
+    ]
+
+
+def shenandoahFlags() -> List[str]:
+    return [
+        "-XX:+UseShenandoahGC",
+        "-XX:+AlwaysPreTouch",
+        "-XX:+DisableExplicitGC",
+        "-XX:+ParallelRefProcEnabled",
+        "-XX:+PerfDisableSharedMem",
+    ]
+
+
+def largePageFlags() -> List[str]:
+    """
+    大页内存\n
+    Linux上预留了HugePages时使用UseLargePages，否则在透明大页可用(madvise/always)时使用UseTransparentHugePages；
+    Windows需要"锁定内存页"权限，无法可靠检测，不自动开启
+    """
+    if system().lower() != "linux":
+        return []
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("HugePages_Total:") and int(line.split()[1]) > 0:
+                    return ["-XX:+UseLargePages"]
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        with open("/sys/kernel/mm/transparent_hugepage/enabled", "r", encoding="utf-8") as f:
+            mode = f.read()
+    except OSError:
+        return []
+    if "[madvise]" in mode or "[always]" in mode:
+        return ["-XX:+UseTransparentHugePages"]
+    return []
+
+
+def toMiB(value: int, unit: str) -> int:
+    return int(value) * 1024 if unit.upper() == "G" else int(value)
+
+
+def physicalMemoryMiB() -> int:
+    try:
+        return virtual_memory().total // (1024 * 1024)
+    except Exception:
+        return 0
+
+
+def chooseProfile(profile: str, javaFeature: int, heapMiB: int, cores: int) -> str:
+    """
+    auto的选择规则：Java 21+、堆不小于8 GiB且至少4核时使用分代ZGC，
+    其余情况(包括Java 8)使用Aikar的G1参数
+    """
+    if profile != "auto":
+        return profile if profile in profileNames else "none"
+    if javaFeature >= 21 and heapMiB >= 8 * 1024 and cores >= 4:
+        return "zgc"
+    return "aikar" if javaFeature >= 8 else "none"
+
+
+def _readFlagsFile() -> dict:
+    if not osp.exists(_flagsFile):
+        return {}
+    try:
+        with open(_flagsFile, "r", encoding="utf-8") as f:
+            data = loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _writeFlagsFile(data: dict):
+    tmpPath = f"{_flagsFile}.tmp"
+    with open(tmpPath, "w", encoding="utf-8") as f:
+        f.write(dumps(data, indent=4, sort_keys=True))
+    replace(tmpPath, _flagsFile)
+
+
+def _printFlagsFinal(javaPath: str) -> Optional[Dict[str, str]]:
+    kwargs = {}
+    if "windows" in system().lower():
+        # CREATE_NO_WINDOW
+        kwargs["creationflags"] = 0x08000000
+    try:
+        result = run(
+            [
+                javaPath,
+                "-XX:+UnlockExperimentalVMOptions",
+                "-XX:+UnlockDiagnosticVMOptions",
+                "-XX:+PrintFlagsFinal",
+                "-version",
+            ],
+            stdin=DEVNULL,
+            stdout=PIPE,
+            stderr=DEVNULL,
+            timeout=30,
+            **kwargs,
+        )
+    except (OSError, TimeoutExpired):
+        return None
+    flags = {}
+    for line in result.stdout.decode("utf-8", "replace").splitlines():
+        if m := _flagLine.match(line):
+            flags[m.group(1)] = m.group(2).strip()
+    return flags or None
+
+
+def cachedFlagsEntry(javaPath: str) -> Optional[dict]:
+    """
+    缓存中该JDK的{"Fingerprint", "Flags", "Feature"}，文件指纹变化或没有缓存时返回None\n
+    不会启动JVM，可以在界面线程中调用
+    """
+    if (fp := fingerprint(javaPath)) is None:
+        return None
+    with _flagsLock:
+        if not _flagsCache:
+            _flagsCache.update(_readFlagsFile())
+        cached = _flagsCache.get(javaPath)
+    # 旧版本写入的缓存没有Feature，当作未缓存
+    if cached is None or cached.get("Fingerprint") != fp or "Feature" not in cached:
+        return None
+    return cached
+
+
+def supportedFlags(javaPath: str, probe: bool = True) -> Optional[Dict[str, str]]:
+    """
+    JDK支持的-XX参数及其类别(product、experimental、diagnostic等)\n
+    每个JDK只运行一次java -XX:+PrintFlagsFinal(最长30秒)，结果按文件指纹缓存在MCSL2_JvmFlags.json；
+    probe为False时只读缓存。无法运行或没有缓存时返回None
+    """
+    if (cached := cachedFlagsEntry(javaPath)) is not None:
+        return cached.get("Flags")
+    if not probe or (fp := fingerprint(javaPath)) is None:
+        return None
+    flags = _printFlagsFinal(javaPath)
+    if flags is None:
+        return None
+    info = probeJavaInfo(javaPath)
+    with _flagsLock:
+        _flagsCache[javaPath] = {
+            "Fingerprint": fp,
+            "Flags": flags,
+            "Feature": JavaVersion(info.version).feature if info else 0,
+        }
+        try:
+            _writeFlagsFile(
+                {path: e for path, e in _flagsCache.items() if osp.exists(path)}
+            )
+        except OSError as e:
+            MCSL2Logger.warning(f"无法写入JVM参数缓存：{e}")
+    return flags
+
+
+class FlagProbeThread(QThread):
+    """在后台运行java -XX:+PrintFlagsFinal并写入缓存"""
+
+    def __init__(self, javaPath: str, parent=None):
+        super().__init__(parent)
+        self.setObjectName("FlagProbeThread")
+        self.javaPath = javaPath
+
+    def run(self):
+        if supportedFlags(self.javaPath) is None:
+            MCSL2Logger.warning(f"无法检查{self.javaPath}支持的JVM参数")
+
+
+def warmUpFlags(javaPath: str):
+    """
+    没有缓存时在后台检查JDK支持的参数，供之后的启动使用\n
+    只能在界面线程中调用
+    """
+    if not javaPath or javaPath in _probeThreads or cachedFlagsEntry(javaPath) is not None:
+        return
+    thread = _probeThreads[javaPath] = FlagProbeThread(javaPath)
+    thread.finished.connect(lambda: _probeThreads.pop(javaPath, None))
+    thread.finished.connect(thread.deleteLater)
+    thread.start()
+
+
+def filterFlags(flags: List[str], supported: Dict[str, str]) -> List[str]:
+    """
+    去掉JDK不支持的-XX参数，并按需在开头补上UnlockExperimentalVMOptions/UnlockDiagnosticVMOptions
+    """
+    rv, unlock = [], []
+    for flag in flags:
+        if (m := _xxFlag.match(flag)) is None:
+            rv.append(flag)
+            continue
+        if (kind := supported.get(m.group(1))) is None:
+            MCSL2Logger.info(f"当前Java不支持{flag}，已跳过")
+            continue
+        if "experimental" in kind and "-XX:+UnlockExperimentalVMOptions" not in unlock:
+            unlock.append("-XX:+UnlockExperimentalVMOptions")
+        if "diagnostic" in kind and "-XX:+UnlockDiagnosticVMOptions" not in unlock:
+            unlock.append("-XX:+UnlockDiagnosticVMOptions")
+        rv.append(flag)
+    return unlock + rv
+
+
+def profileFlags(
+    javaPath: str, profile: str, heapMiB: int, userArgs: List[str]
+) -> List[str]:
+    """
+    生成调优参数\n
+    用户自己的jvm_arg中已经指定了GC时不添加任何调优参数，避免冲突；
+    只使用缓存中的参数检查结果，没有缓存时在后台检查，本次返回空列表
+    """
+    if profile == "none" or any(_gcSelector.match(arg) for arg in userArgs):
+        return []
+    if (cached := cachedFlagsEntry(javaPath)) is None:
+        # 检查参数需要启动一次JVM，不在界面线程中等待，本次启动不添加调优参数
+        MCSL2Logger.info("正在后台检查当前Java支持的JVM参数，调优参数将在下次启动时生效")
+        warmUpFlags(javaPath)
+        return []
+    feature, supported = cached["Feature"], cached["Flags"]
+    cores = cpu_count(logical=False) or cpu_count() or 1
+    chosen = chooseProfile(profile, feature, heapMiB, cores)
+    if chosen == "zgc" and feature < 21:
+        # 非分代ZGC在Minecraft上表现不如G1
+        chosen = "aikar"
+    if chosen == "none":
+        return []
+    flags = {
+        "aikar": aikarFlags,
+        "zgc": lambda _: zgcFlags(),
+        "shenandoah": lambda _: shenandoahFlags(),
+    }[chosen](heapMiB)
+    if _xxFlag.match(flags[0]).group(1) not in supported:
+        # 该JDK没有这个GC(例如Oracle JDK没有Shenandoah)，退回G1
+        MCSL2Logger.warning(f"当前Java不支持{flags[0]}，改用Aikar的G1参数")
+        chosen, flags = "aikar", aikarFlags(heapMiB)
+    flags = filterFlags(flags + largePageFlags(), supported)
+    MCSL2Logger.info(f"JVM调优方案：{chosen}（Java {feature}，堆{heapMiB}MiB，{cores}核）")
+    return flags
+
+
+def heapArgs(minMem: int, maxMem: int, memUnit: str, tune: bool) -> List[str]:
+    """
+    -Xms/-Xmx\n
+    启用调优时，最大堆不超过物理内存减去1 GiB，初始堆不超过最大堆
+    """
+    if tune and (physical := physicalMemoryMiB()):
+        limit = max(1024, physical - 1024)
+        maxMiB, minMiB = toMiB(maxMem, memUnit), toMiB(minMem, memUnit)
+        if maxMiB > limit:
+            MCSL2Logger.warning(f"最大内存{maxMiB}MiB超过物理内存，已调整为{limit}MiB")
+            return [f"-Xms{min(minMiB, limit)}M", f"-Xmx{limit}M"]
+    return [f"-Xms{minMem}{memUnit}", f"-Xmx{maxMem}{memUnit}"]
+
+
+def buildJvmArgs(
+    javaPath: str,
+    minMem: int,
+    maxMem: int,
+    memUnit: str,
+    userArgs: List[str],
+    profile: str = "none",
+) -> List[str]:
+    """
+    内存参数、调优参数与用户参数\n
+    用户参数放在最后，JVM以最后出现的为准，所以用户参数总能覆盖调优参数
+    """
+    tune = profile != "none"
+    args = heapArgs(minMem, maxMem, memUnit, tune)
+    if tune:
+        args.extend(profileFlags(javaPath, profile, toMiB(maxMem, memUnit), userArgs))
+    args.extend(userArgs)
+    return args
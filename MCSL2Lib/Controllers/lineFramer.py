@@ -0,0 +1,92 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Streaming line framer for server stdout.
+"""
+
+from codecs import getincrementaldecoder
+from locale import getpreferredencoding
+from typing import List
+
+
+def incrementalDecoder(encoding: str):
+    """创建增量解码器；"ansi"、"auto"等不是Python编码名(或在当前平台不存在)时回退到系统首选编码"""
+    try:
+        return getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        return getincrementaldecoder(getpreferredencoding(False))(errors="replace")
+
+
+class LineFramer:
+    """
+    服务器输出分行器\n
+    数据追加到同一个bytearray中，每次只在新到达的字节里查找换行，切片使用memoryview不复制；
+    行尾的\\r(若有)才会被去掉。\n
+    未结束的行超过maxLineLength字节时强制切出一段，超长行不会让缓冲无限增长。
+    强制切分可能落在多字节字符中间，因此使用增量解码器，被切开的GBK/UTF-8字符会在下一段中正确拼回。
+    """
+
+    def __init__(self, encoding: str = "utf-8", maxLineLength: int = 65536):
+        self.encoding = encoding
+        self.maxLineLength = maxLineLength
+        self._buffer = bytearray()
+        self._scanned = 0
+        self._decoder = incrementalDecoder(encoding)
+
+    def setEncoding(self, encoding: str):
+        """切换编码，已缓冲但未成行的字节按新编码解码"""
+        if encoding != self.encoding:
+            self.encoding = encoding
+            self._decoder = incrementalDecoder(encoding)
+
+    def reset(self):
+        self._buffer.clear()
+        self._scanned = 0
+        self._decoder.reset()
+
+    def pending(self) -> int:
+        """尚未成行的字节数"""
+        return len(self._buffer)
+
+    def feed(self, data: bytes) -> List[str]:
+        """送入一段原始输出，返回其中完整的行"""
+        buffer = self._buffer
+        buffer.extend(data)
+        lines = []
+        start = 0
+        pos = buffer.find(b"\n", self._scanned)
+        with memoryview(buffer) as view:
+            while pos != -1:
+                end = pos - 1 if pos > start and buffer[pos - 1] == 0x0D else pos
+                lines.append(self._decoder.decode(view[start:end], True))
+                start = pos + 1
+                pos = buffer.find(b"\n", start)
+            while len(buffer) - start > self.maxLineLength:
+                cut = start + self.maxLineLength
+                lines.append(self._decoder.decode(view[start:cut], False))
+                start = cut
+        if start:
+            del buffer[:start]
+        self._scanned = len(buffer)
+        return lines
+
+    def flush(self) -> List[str]:
+        """进程结束时取出最后一段没有换行的输出"""
+        if not self._buffer:
+            return []
+        data = bytes(self._buffer)
+        if data.endswith(b"\r"):
+            data = data[:-1]
+        self._buffer.clear()
+        self._scanned = 0
+        return [self._decoder.decode(data, True)]
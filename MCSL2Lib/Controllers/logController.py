@@ -1,11 +1,9 @@
-from inspect import getframeinfo, getmodulename, currentframe
+import sys
 from datetime import datetime
 from loguru import logger as loguru_logger
 from os import path as osp, getpid
 from typing import Optional
 from traceback import format_exception
-from datetime import datetime
-from qfluentwidgets import __version__ as pfwVer
 from psutil import Process
 from platform import (
     system as systemType,
@@ -17,22 +15,46 @@ from platform import (
 
 
 class _MCSL2Logger:
-    def __init__(self):
+    """
+    MCSL2日志前端。\n
+    调用者的模块、函数与行号交给loguru的opt(depth=1)在写入时取得，只取栈帧，不再读源码文件；
+    低于当前等级的日志在进入loguru之前就直接返回。
+    """
+
+    levels = {
+        "TRACE": 5,
+        "DEBUG": 10,
+        "INFO": 20,
+        "SUCCESS": 25,
+        "WARNING": 30,
+        "ERROR": 40,
+        "CRITICAL": 50,
+    }
+
+    def __init__(self, sink=None):
         self.time = datetime.now().strftime("%Y-%m-%d_%H")
         self.logger = loguru_logger
-        self.logger.add(
-            self._getLogFile(),
-            rotation="1 day",
-            retention="14 days",
+        self.levelNo = self.levels["DEBUG"]
+        self._caller = self.logger.opt(depth=1)
+        sinkOptions = dict(
             level="DEBUG",
             enqueue=True,
             backtrace=True,
             diagnose=True,
-            compression="zip",
             catch=True,
-            encoding="utf-8",
-            format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
+            format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {module}.{function}, at line {line} | {message}",
         )
+        if sink is None:
+            self.logger.add(
+                self._getLogFile(),
+                rotation="1 day",
+                retention="14 days",
+                compression="zip",
+                encoding="utf-8",
+                **sinkOptions,
+            )
+        else:
+            self.logger.add(sink, **sinkOptions)
         self.info(
             f"\nMCSL2 - 日志\n本次启动时刻：{str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))}\n{genSysReport()}"
         )
@@ -40,80 +62,42 @@ class _MCSL2Logger:
     def _getLogFile(self) -> str:
         return osp.join("MCSL2/Logs", f"MCSL2_{self.time}.log")
 
-    def _template(self, caller_info, msg) -> str:
-        return f"{caller_info['module']}.{caller_info['function']}, at line {caller_info['line']} | {msg}"
+    def setLevel(self, level: str):
+        """设置最低记录等级，如"INFO"，低于该等级的调用几乎没有开销"""
+        self.levelNo = self.levels.get(str(level).upper(), self.levels["DEBUG"])
+
+    def isEnabledFor(self, level: str) -> bool:
+        return self.levels[level] >= self.levelNo
 
     def info(self, msg: str):
-        frame = getframeinfo(currentframe().f_back)
-        caller_info = {
-            "module": getmodulename(frame.filename),
-            "filename": frame.filename,
-            "line": frame.lineno,
-            "function": frame.function,
-        }
-        self.logger.info(self._template(caller_info, msg))
+        if self.isEnabledFor("INFO"):
+            self._caller.info(msg)
 
     def warning(self, msg: str):
-        frame = getframeinfo(currentframe().f_back)
-        caller_info = {
-            "module": getmodulename(frame.filename),
-            "filename": frame.filename,
-            "line": frame.lineno,
-            "function": frame.function,
-        }
-        self.logger.warning(self._template(caller_info, msg))
+        if self.isEnabledFor("WARNING"):
+            self._caller.warning(msg)
 
     def success(self, msg: str):
-        frame = getframeinfo(currentframe().f_back)
-        caller_info = {
-            "module": getmodulename(frame.filename),
-            "filename": frame.filename,
-            "line": frame.lineno,
-            "function": frame.function,
-        }
-        self.logger.success(self._template(caller_info, msg))
+        if self.isEnabledFor("SUCCESS"):
+            self._caller.success(msg)
 
     def error(self, exc: Optional[Exception] = None, msg: Optional[str] = ""):
-        frame = getframeinfo(currentframe().f_back)
-        caller_info = {
-            "module": getmodulename(frame.filename),
-            "filename": frame.filename,
-            "line": frame.lineno,
-            "function": frame.function,
-        }
-        excStr = "".join(format_exception(type(exc), exc, exc.__traceback__))
-        self.logger.error(self._template(caller_info, f"{msg}\n{excStr}"))
+        if self.isEnabledFor("ERROR"):
+            excStr = "".join(format_exception(type(exc), exc, exc.__traceback__))
+            self._caller.error(f"{msg}\n{excStr}")
 
     def trace(self, msg: str):
-        frame = getframeinfo(currentframe().f_back)
-        caller_info = {
-            "module": getmodulename(frame.filename),
-            "filename": frame.filename,
-            "line": frame.lineno,
-            "function": frame.function,
-        }
-        self.logger.trace(self._template(caller_info, msg))
+        if self.isEnabledFor("TRACE"):
+            self._caller.trace(msg)
 
     def debug(self, msg: str):
-        frame = getframeinfo(currentframe().f_back)
-        caller_info = {
-            "module": getmodulename(frame.filename),
-            "filename": frame.filename,
-            "line": frame.lineno,
-            "function": frame.function,
-        }
-        self.logger.debug(self._template(caller_info, msg))
+        if self.isEnabledFor("DEBUG"):
+            self._caller.debug(msg)
 
     def critical(self, exc: Optional[Exception] = None, msg: Optional[str] = ""):
-        frame = getframeinfo(currentframe().f_back)
-        caller_info = {
-            "module": getmodulename(frame.filename),
-            "filename": frame.filename,
-            "line": frame.lineno,
-            "function": frame.function,
-        }
-        excStr = "".join(format_exception(type(exc), exc, exc.__traceback__))
-        self.logger.critical(self._template(caller_info, f"{msg}\n{excStr}"))
+        if self.isEnabledFor("CRITICAL"):
+            excStr = "".join(format_exception(type(exc), exc, exc.__traceback__))
+            self._caller.critical(f"{msg}\n{excStr}")
 
 
 # Example usage
@@ -128,6 +112,9 @@ class _MCSL2Logger:
 
 
 def genSysReport() -> str:
+    # 不主动导入控件库，无界面模式下它不会被加载
+    pfw = sys.modules.get("qfluentwidgets", None)
+    pfwVer = getattr(pfw, "__version__", "未加载")
     sysInfo = (
         f"{systemType()} {'11' if int(systemVersion().split('.')[-1]) >= 22000 else '10'} {systemVersion()}"
         if systemType() == "Windows" and systemRelease() == "10"
@@ -0,0 +1,167 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Per-server online player sessions parsed from console output.
+"""
+
+from json import dumps, loads
+from os import makedirs, path as osp
+from re import compile as reCompile
+from time import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from MCSL2Lib.Controllers.consoleLogClassifier import ConsoleLogClassifier, LogEvent
+
+consoleLogClassifier = ConsoleLogClassifier()
+
+# 取最后一个"]: "之后的内容，兼容Vanilla、Forge([minecraft/PlayerList])、Paper等前缀
+# Steve[/127.0.0.1:63854] logged in with entity id 229 at (7.2, 65.0, 11.0)
+# Steve[/[0:0:0:0:0:0:0:1]:63854]、Steve[local] 也可以被识别
+loginPattern = reCompile(
+    r"(?:.*\]: )?(?P<name>[^\[\]]+?)\[(?:/(?P<address>.*?)|local)\] "
+    r"logged in with entity id (?P<entityId>\d+)"
+)
+logoutPattern = reCompile(r"(?:.*\]: )?(?P<name>.+?) left the game")
+
+
+class PlayerSession(NamedTuple):
+    name: str
+    joinTime: float
+    ip: str
+    port: int
+    entityId: int
+    leaveTime: Optional[float] = None
+
+
+def splitAddress(address: Optional[str]):
+    """"127.0.0.1:63854"、"[::1]:63854" -> (ip, port)；无法识别时port为0"""
+    if not address:
+        return "local", 0
+    host, sep, port = address.rpartition(":")
+    if not sep or not port.isdigit():
+        return address, 0
+    return host.strip("[]"), int(port)
+
+
+def sessionsFile(serverName: str) -> str:
+    return osp.join("Servers", serverName, "MCSL2_PlayerSessions.jsonl")
+
+
+class PlayerSessionTracker:
+    """
+    单个服务器的玩家会话\n
+    在线玩家保存在以名字为键的dict中，加入/离开都是O(1)；
+    玩家离开或服务器关闭时，完整会话追加写入Servers/<name>/MCSL2_PlayerSessions.jsonl。\n
+    只有分类器判定为加入/离开的行才会进入正则解析。
+    """
+
+    def __init__(self, serverName: str, persist: bool = True):
+        self.serverName = serverName
+        self.persist = persist
+        self.online: Dict[str, PlayerSession] = {}
+        self._sorted: Optional[List[str]] = None
+
+    def __len__(self):
+        return len(self.online)
+
+    def __contains__(self, name: str):
+        return name in self.online
+
+    def feed(self, lines: Iterable[str]):
+        for line in lines:
+            events = consoleLogClassifier.events(line)
+            if events & LogEvent.LOGIN:
+                self.onLogin(consoleLogClassifier.clean(line))
+            elif events & LogEvent.LOGOUT:
+                self.onLogout(consoleLogClassifier.clean(line))
+            elif events & LogEvent.STARTING:
+                self.endAll()
+
+    def onLogin(self, line: str) -> Optional[PlayerSession]:
+        match = loginPattern.match(line)
+        if match is None:
+            return None
+        ip, port = splitAddress(match.group("address"))
+        session = PlayerSession(
+            name=match.group("name").strip(),
+            joinTime=time(),
+            ip=ip,
+            port=port,
+            entityId=int(match.group("entityId")),
+        )
+        # 重复登录(如掉线未被检测到)时先结束旧会话
+        self.end(session.name)
+        self.online[session.name] = session
+        self._sorted = None
+        return session
+
+    def onLogout(self, line: str) -> Optional[PlayerSession]:
+        match = logoutPattern.match(line)
+        if match is None:
+            return None
+        return self.end(match.group("name").strip())
+
+    def end(self, name: str, leaveTime: Optional[float] = None) -> Optional[PlayerSession]:
+        session = self.online.pop(name, None)
+        if session is None:
+            return None
+        self._sorted = None
+        session = session._replace(leaveTime=leaveTime or time())
+        self.save([session])
+        return session
+
+    def endAll(self):
+        """服务器关闭或重新启动时结束全部会话"""
+        if not self.online:
+            return
+        now = time()
+        sessions = [s._replace(leaveTime=now) for s in self.online.values()]
+        self.online.clear()
+        self._sorted = None
+        self.save(sessions)
+
+    def sortedNames(self) -> List[str]:
+        """按名字排序的在线玩家，变化后才重新排序"""
+        if self._sorted is None:
+            self._sorted = sorted(self.online, key=str.casefold)
+        return self._sorted
+
+    def save(self, sessions: List[PlayerSession]):
+        if not self.persist:
+            return
+        filePath = sessionsFile(self.serverName)
+        try:
+            makedirs(osp.dirname(filePath), exist_ok=True)
+            with open(filePath, "a", encoding="utf-8") as f:
+                f.write(
+                    "".join(
+                        dumps(s._asdict(), ensure_ascii=False) + "\n" for s in sessions
+                    )
+                )
+        except OSError:
+            pass
+
+    def history(self, limit: int = 1000) -> List[PlayerSession]:
+        """读取最近limit条已结束的会话"""
+        filePath = sessionsFile(self.serverName)
+        if not osp.exists(filePath):
+            return []
+        with open(filePath, "r", encoding="utf-8") as f:
+            lines = f.readlines()[-limit:]
+        rv = []
+        for line in lines:
+            try:
+                rv.append(PlayerSession(**loads(line)))
+            except (ValueError, TypeError):
+                continue
+        return rv
@@ -0,0 +1,203 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Anvil region (.mca) header analysis and low-InhabitedTime chunk pruning.
+"""
+
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count, path as osp, scandir
+from re import compile as reCompile
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from MCSL2Lib.Controllers.regionFile import HEADER_SIZE, SECTOR, pruneRegion
+from MCSL2Lib.utils import MCSL2Logger
+
+regionNamePattern = reCompile(r"^r\.(-?\d+)\.(-?\d+)\.mca$")
+# 正在清理区块的服务器，清理期间不能启动
+pruningServers: Set[str] = set()
+
+
+class RegionInfo(NamedTuple):
+    path: str
+    dimension: str
+    x: int
+    z: int
+    fileSize: int
+    chunks: int
+    usedBytes: int  # 头部加上已分配扇区
+    lastModified: int  # 区块时间戳中最新的一个(Unix秒)
+
+
+def findRegionDirs(worldDir: str) -> Dict[str, str]:
+    """维度名 -> region文件夹，兼容原版(DIM-1/DIM1)、Bukkit分世界存档与1.16+的dimensions"""
+    candidates = {
+        "overworld": osp.join(worldDir, "region"),
+        "the_nether": osp.join(worldDir, "DIM-1", "region"),
+        "the_end": osp.join(worldDir, "DIM1", "region"),
+    }
+    dimensionsDir = osp.join(worldDir, "dimensions")
+    if osp.isdir(dimensionsDir):
+        for namespace in scandir(dimensionsDir):
+            if namespace.is_dir():
+                for dimension in scandir(namespace.path):
+                    candidates[f"{namespace.name}:{dimension.name}"] = osp.join(
+                        dimension.path, "region"
+                    )
+    return {name: path for name, path in candidates.items() if osp.isdir(path)}
+
+
+def findServerRegions(serverDir: str) -> List[Tuple[str, str]]:
+    """服务器目录下全部存档的(维度, 区域文件路径)"""
+    rv = []
+    if not osp.isdir(serverDir):
+        return rv
+    for world in scandir(serverDir):
+        if not (world.is_dir() and osp.exists(osp.join(world.path, "level.dat"))):
+            continue
+        for dimension, regionDir in findRegionDirs(world.path).items():
+            label = dimension if world.name == "world" else f"{world.name}/{dimension}"
+            for entry in scandir(regionDir):
+                if regionNamePattern.match(entry.name):
+                    rv.append((label, entry.path))
+    return rv
+
+
+def readHeaders(paths: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    把每个文件前8KiB的位置表与时间戳表映射进内存，拷入同一个(n, 2048)的大端uint32数组\n
+    只映射头部，不会读取区块数据；不足8KiB的文件(新建的空区域)保持全零
+    """
+    headers = np.zeros((len(paths), 2 * 1024), dtype=">u4")
+    sizes = np.zeros(len(paths), dtype=np.int64)
+    for row, filePath in enumerate(paths):
+        try:
+            with open(filePath, "rb") as f:
+                size = osp.getsize(filePath)
+                sizes[row] = size
+                if size < HEADER_SIZE:
+                    continue
+                with mmap.mmap(f.fileno(), HEADER_SIZE, access=mmap.ACCESS_READ) as view:
+                    table = np.frombuffer(view, dtype=">u4", count=2 * 1024)
+                    headers[row] = table
+                    # 释放对映射的引用后才能关闭mmap
+                    del table
+        except (OSError, ValueError):
+            continue
+    return headers, sizes
+
+
+def scanRegions(regions: List[Tuple[str, str]]) -> List[RegionInfo]:
+    """在整张头部表上一次性计算区块数、占用与最后修改时间"""
+    if not regions:
+        return []
+    headers, sizes = readHeaders([filePath for _, filePath in regions])
+    locations, timestamps = headers[:, :1024], headers[:, 1024:]
+    chunks = np.count_nonzero(locations, axis=1)
+    usedBytes = ((locations & 0xFF).sum(axis=1, dtype=np.int64) + 2) * SECTOR
+    lastModified = timestamps.max(axis=1)
+    rv = []
+    for row, (dimension, filePath) in enumerate(regions):
+        match = regionNamePattern.match(osp.basename(filePath))
+        rv.append(
+            RegionInfo(
+                path=filePath,
+                dimension=dimension,
+                x=int(match.group(1)),
+                z=int(match.group(2)),
+                fileSize=int(sizes[row]),
+                chunks=int(chunks[row]),
+                usedBytes=int(usedBytes[row]) if chunks[row] else 0,
+                lastModified=int(lastModified[row]),
+            )
+        )
+    return rv
+
+
+def summarize(regions: List[RegionInfo]) -> Dict[str, dict]:
+    """按维度汇总：区域文件数、区块数、文件大小与可通过整理回收的空间"""
+    rv: Dict[str, dict] = {}
+    for region in regions:
+        summary = rv.setdefault(
+            region.dimension, {"regions": 0, "chunks": 0, "fileSize": 0, "wastedBytes": 0}
+        )
+        summary["regions"] += 1
+        summary["chunks"] += region.chunks
+        summary["fileSize"] += region.fileSize
+        summary["wastedBytes"] += max(region.fileSize - region.usedBytes, 0)
+    return rv
+
+
+def pruneRegions(paths: List[str], minInhabitedTime: int, workers: int = 0) -> Tuple[int, int]:
+    """在进程池中逐个区域文件清理，解压与NBT查找不占用界面进程的GIL"""
+    chunks = freed = 0
+    with ProcessPoolExecutor(max_workers=workers or min(4, cpu_count() or 1)) as pool:
+        for removed, size in pool.map(
+            pruneRegion, paths, [minInhabitedTime] * len(paths), chunksize=8
+        ):
+            chunks += removed
+            freed += size
+    return chunks, freed
+
+
+def isRegionPruning(serverName: str) -> bool:
+    return serverName in pruningServers
+
+
+class RegionAnalyzeThread(QThread):
+    """扫描服务器全部存档的区域文件头"""
+
+    done = pyqtSignal(list)
+
+    def __init__(self, serverDir: str, parent=None):
+        super().__init__(parent)
+        self.setObjectName("RegionAnalyzeThread")
+        self.serverDir = serverDir
+
+    def run(self):
+        try:
+            self.done.emit(scanRegions(findServerRegions(self.serverDir)))
+        except Exception as e:
+            MCSL2Logger.error(exc=e, msg="区域文件分析失败")
+            self.done.emit([])
+
+
+class RegionPruneThread(QThread):
+    """在工作进程中清理低InhabitedTime的区块，服务器必须已停止"""
+
+    done = pyqtSignal(object)  # (删除的区块数, 释放的字节数)
+    failed = pyqtSignal(str)
+
+    def __init__(
+        self, serverName: str, paths: List[str], minInhabitedTime: int, parent=None
+    ):
+        super().__init__(parent)
+        self.setObjectName("RegionPruneThread")
+        self.serverName = serverName
+        self.paths = paths
+        self.minInhabitedTime = minInhabitedTime
+        self.finished.connect(lambda: pruningServers.discard(self.serverName))
+
+    def start(self):
+        pruningServers.add(self.serverName)
+        super().start()
+
+    def run(self):
+        try:
+            self.done.emit(pruneRegions(self.paths, self.minInhabitedTime))
+        except Exception as e:
+            MCSL2Logger.error(exc=e, msg="区块清理失败")
+            self.failed.emit(str(e))
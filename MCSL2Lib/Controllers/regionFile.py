@@ -0,0 +1,140 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Anvil region (.mca) file layout and the chunk-pruning worker run in the process pool.
+"""
+
+import gzip
+import zlib
+from os import path as osp, remove, replace
+from struct import pack_into, unpack_from
+from typing import List, Optional, Tuple
+
+# 本模块在进程池的子进程中运行，不能导入MCSL2Lib.utils(会在子进程中重新初始化日志)或Qt
+
+SECTOR = 4096
+REGION_CHUNKS = 1024
+HEADER_SIZE = 2 * SECTOR
+# NBT: TAG_Long(4) + 名称长度13 + "InhabitedTime"，之后是8字节大端整数
+inhabitedTimeTag = b"\x04\x00\x0dInhabitedTime"
+# 与区域文件同名、按同样区块索引存放实体与兴趣点数据的文件夹(1.14+/1.17+)
+siblingFolders = ("entities", "poi")
+
+
+def splitRegion(data: bytes) -> Optional[Tuple[List[Optional[bytes]], List[int]]]:
+    """
+    把.mca区域文件拆成1024个区块\n
+    每个区块为"4字节长度 + 1字节压缩类型 + 数据"，与在文件中的位置无关；
+    头部损坏或区块越界时返回None，由调用方按普通文件整体保存
+    """
+    if len(data) < HEADER_SIZE:
+        return None
+    view = memoryview(data)
+    locations = unpack_from(">1024I", view, 0)
+    timestamps = list(unpack_from(">1024I", view, SECTOR))
+    chunks: List[Optional[bytes]] = [None] * REGION_CHUNKS
+    for index, location in enumerate(locations):
+        offset, sectors = location >> 8, location & 0xFF
+        if not offset and not sectors:
+            continue
+        start = offset * SECTOR
+        if offset < 2 or start + 5 > len(data):
+            return None
+        length = int.from_bytes(view[start : start + 4], "big")
+        end = start + 4 + length
+        if not length or end > len(data):
+            return None
+        chunks[index] = view[start:end]
+    return chunks, timestamps
+
+
+def joinRegion(chunks: List[Optional[bytes]], timestamps: List[int]) -> bytes:
+    """按顺序重新排列区块，扇区对齐后写回头部"""
+    out = bytearray(HEADER_SIZE)
+    for index, chunk in enumerate(chunks):
+        if chunk is None:
+            continue
+        sectors = -(-len(chunk) // SECTOR)
+        pack_into(">I", out, index * 4, (len(out) // SECTOR) << 8 | min(sectors, 0xFF))
+        out += chunk
+        out += bytes(sectors * SECTOR - len(chunk))
+    pack_into(">1024I", out, SECTOR, *timestamps)
+    return bytes(out)
+
+
+def inhabitedTime(chunk: bytes) -> Optional[int]:
+    """读取区块的InhabitedTime(刻)；外置(.mcc)、LZ4或无法解析的区块返回None"""
+    compression = chunk[4]
+    data = chunk[5:]
+    try:
+        if compression == 1:
+            data = gzip.decompress(data)
+        elif compression == 2:
+            data = zlib.decompress(data)
+        elif compression != 3:
+            return None
+    except (OSError, zlib.error, EOFError):
+        return None
+    pos = data.find(inhabitedTimeTag)
+    if pos == -1:
+        return None
+    start = pos + len(inhabitedTimeTag)
+    return int.from_bytes(data[start : start + 8], "big", signed=True)
+
+
+def rewriteRegion(filePath: str, removed: List[int]) -> int:
+    """从区域文件中删除指定区块并整理，返回释放的字节数；全部删除时删除文件"""
+    with open(filePath, "rb") as f:
+        data = f.read()
+    region = splitRegion(data)
+    if region is None:
+        return 0
+    chunks, timestamps = region
+    for index in removed:
+        chunks[index] = None
+        timestamps[index] = 0
+    if not any(chunk is not None for chunk in chunks):
+        remove(filePath)
+        return len(data)
+    newData = joinRegion([None if c is None else bytes(c) for c in chunks], timestamps)
+    with open(f"{filePath}.tmp", "wb") as f:
+        f.write(newData)
+    replace(f"{filePath}.tmp", filePath)
+    return len(data) - len(newData)
+
+
+def pruneRegion(filePath: str, minInhabitedTime: int) -> Tuple[int, int]:
+    """
+    删除InhabitedTime低于minInhabitedTime的区块，返回(删除的区块数, 释放的字节数)\n
+    同名的entities/poi区域文件中对应的区块一并删除；在工作进程中运行
+    """
+    with open(filePath, "rb") as f:
+        region = splitRegion(f.read())
+    if region is None:
+        return 0, 0
+    removed = []
+    for index, chunk in enumerate(region[0]):
+        if chunk is None:
+            continue
+        ticks = inhabitedTime(bytes(chunk))
+        if ticks is not None and ticks < minInhabitedTime:
+            removed.append(index)
+    if not removed:
+        return 0, 0
+    freed = rewriteRegion(filePath, removed)
+    dimensionDir, fileName = osp.split(osp.dirname(filePath))[0], osp.basename(filePath)
+    for folder in siblingFolders:
+        siblingPath = osp.join(dimensionDir, folder, fileName)
+        if osp.exists(siblingPath):
+            freed += rewriteRegion(siblingPath, removed)
+    return len(removed), freed
@@ -0,0 +1,213 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Off-GUI-thread resource sampling for server processes, with a history ring buffer.
+"""
+
+from time import monotonic
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+from psutil import AccessDenied, NoSuchProcess, Process, cpu_count, WINDOWS as isWindows
+
+
+class ResourceHistory:
+    """
+    资源占用历史，定长numpy环形缓冲区。\n
+    每行一个采样，列由fields决定(可在构造时指定，供遥测等其他时间序列复用)，写满后覆盖最旧的采样。
+    """
+
+    fields: Tuple[str, ...] = (
+        "time",
+        "cpu",
+        "mem",
+        "threads",
+        "handles",
+        "readRate",
+        "writeRate",
+        "processes",
+    )
+
+    def __init__(self, capacity: int = 3600, fields: Optional[Tuple[str, ...]] = None):
+        if fields is not None:
+            self.fields = tuple(fields)
+        self._data = np.zeros((capacity, len(self.fields)), dtype=np.float64)
+        self._head = 0
+        self._size = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._data.shape[0]
+
+    def __len__(self):
+        return self._size
+
+    def append(self, *values: float):
+        self._data[self._head] = values
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def snapshot(self) -> np.ndarray:
+        """按时间先后返回全部采样的副本"""
+        if self._size < self.capacity:
+            return self._data[: self._size].copy()
+        return np.roll(self._data, -self._head, axis=0)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.snapshot()[:, self.fields.index(name)]
+
+    def latest(self) -> Optional[np.ndarray]:
+        if not self._size:
+            return None
+        return self._data[(self._head - 1) % self.capacity].copy()
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+
+class ResourceSample(NamedTuple):
+    """一次对整棵进程树的采样结果"""
+
+    cpu: float  # CPU占用百分比，已按核心数归一化到0~100
+    mem: float  # 内存字节数(RSS或USS)
+    threads: int  # 线程数
+    handles: int  # 打开的文件句柄数(Windows为句柄数)
+    readRate: float  # 磁盘读取速率，字节/秒
+    writeRate: float  # 磁盘写入速率，字节/秒
+    processes: int  # 进程树中的进程数
+
+
+class ServerResourceSampler(QObject):
+    """
+    服务器进程树采样器，应被移动到工作线程中运行，不会阻塞GUI线程。\n
+    统计以服务器进程为根的整棵进程树(包括启动脚本拉起的JVM、插件启动的子进程)。
+    每个进程只持有一个psutil.Process句柄，每次在oneshot()内一次性读取；
+    进程树成员每treeRefreshTicks次采样才增量刷新一次，已知进程的句柄与CPU基准得以保留。\n
+    默认读取开销很小的RSS，只有开启useUSS时才读取需要遍历smaps的USS。
+    """
+
+    sampled = pyqtSignal(object)
+
+    def __init__(self, interval: int = 1000, useUSS: bool = False, treeRefreshTicks: int = 5):
+        super().__init__()
+        self.interval = interval
+        self.useUSS = useUSS
+        self.treeRefreshTicks = treeRefreshTicks
+        self.root: Optional[Process] = None
+        self.processes: Dict[int, Process] = {}
+        self.lastIO: Dict[int, Tuple[int, int]] = {}
+        self.lastSampleTime = 0.0
+        self.ticks = 0
+        self.timer: Optional[QTimer] = None
+        self.cpuCount = cpu_count() or 1
+
+    @pyqtSlot()
+    def start(self):
+        # 定时器必须在工作线程内创建
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.sample)
+        self.timer.start(self.interval)
+
+    @pyqtSlot()
+    def stop(self):
+        if self.timer is not None:
+            self.timer.stop()
+
+    @pyqtSlot(int)
+    def setPid(self, pid: int):
+        self.processes.clear()
+        self.lastIO.clear()
+        self.ticks = 0
+        self.root = self._track(pid) if pid > 0 else None
+
+    def _track(self, pid: int) -> Optional[Process]:
+        try:
+            process = Process(pid)
+            # 首次调用只建立基准，返回0
+            process.cpu_percent(interval=None)
+        except (NoSuchProcess, AccessDenied, PermissionError):
+            return None
+        self.processes[pid] = process
+        return process
+
+    def refreshTree(self):
+        """增量刷新进程树：只为新出现的子进程创建句柄，移除已退出的"""
+        try:
+            alive = {child.pid for child in self.root.children(recursive=True)}
+        except (NoSuchProcess, AccessDenied, PermissionError):
+            return
+        alive.add(self.root.pid)
+        for pid in list(self.processes):
+            if pid not in alive:
+                del self.processes[pid]
+                self.lastIO.pop(pid, None)
+        for pid in alive - self.processes.keys():
+            self._track(pid)
+
+    @pyqtSlot()
+    def sample(self):
+        if self.root is None:
+            return
+        if not self.ticks % self.treeRefreshTicks:
+            self.refreshTree()
+        self.ticks += 1
+        now = monotonic()
+        elapsed = now - self.lastSampleTime if self.lastSampleTime else 0.0
+        self.lastSampleTime = now
+        cpu = mem = 0.0
+        threads = handles = 0
+        readBytes = writeBytes = 0
+        for pid, process in list(self.processes.items()):
+            try:
+                with process.oneshot():
+                    cpu += process.cpu_percent(interval=None)
+                    mem += (
+                        process.memory_full_info().uss
+                        if self.useUSS
+                        else process.memory_info().rss
+                    )
+                    threads += process.num_threads()
+                    handles += (
+                        process.num_handles() if isWindows else process.num_fds()
+                    )
+                    try:
+                        io = process.io_counters()
+                        last = self.lastIO.get(pid)
+                        self.lastIO[pid] = (io.read_bytes, io.write_bytes)
+                        if last is not None:
+                            readBytes += io.read_bytes - last[0]
+                            writeBytes += io.write_bytes - last[1]
+                    except (AttributeError, NotImplementedError):
+                        # macOS等平台没有io_counters
+                        pass
+            except NoSuchProcess:
+                del self.processes[pid]
+                self.lastIO.pop(pid, None)
+                if process is self.root:
+                    self.root = None
+                    return
+            except (AccessDenied, PermissionError):
+                continue
+        self.sampled.emit(
+            ResourceSample(
+                cpu=cpu / self.cpuCount,
+                mem=mem,
+                threads=threads,
+                handles=handles,
+                readRate=readBytes / elapsed if elapsed else 0.0,
+                writeRate=writeBytes / elapsed if elapsed else 0.0,
+                processes=len(self.processes),
+            )
+        )
@@ -15,15 +15,46 @@
 Communicate with Minecraft servers.
 """
 
+from collections import deque
+from copy import deepcopy
 from datetime import datetime
+from enum import IntEnum
+from functools import partial
+from time import time
 from json import dumps
+from locale import getpreferredencoding
 from os import path as osp
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 
 from PyQt5.QtCore import QProcess, QObject, pyqtSignal, QThread, QTimer, pyqtSlot
-from psutil import NoSuchProcess, Process, AccessDenied
 
+from MCSL2Lib.Controllers.resourceMonitor import (
+    ResourceHistory,
+    ResourceSample,
+    ServerResourceSampler,
+)
+from MCSL2Lib.Controllers.appCds import (
+    appCdsMode,
+    insertAppCdsArgs,
+    recordStartup,
+    refreshAppCdsArgs,
+)
+from MCSL2Lib.Controllers.commandQueue import CommandQueue
+from MCSL2Lib.Controllers.encodingDetector import (
+    EncodingDetector,
+    rememberEncoding,
+    settingEncoding,
+)
+from MCSL2Lib.Controllers.jvmTuning import buildJvmArgs, warmUpFlags
+from MCSL2Lib.Controllers.lineFramer import LineFramer
+from MCSL2Lib.Controllers.regionAnalyzer import isRegionPruning
+from MCSL2Lib.Controllers.playerSessionTracker import PlayerSessionTracker
+from MCSL2Lib.Controllers.serverLogArchive import ServerLogArchiveWriter
+from MCSL2Lib.Controllers.serverLogBuffer import ServerLogBuffer
+from MCSL2Lib.Controllers.serverProperties import loadServerProperties
+from MCSL2Lib.Controllers.serverTelemetry import ServerTelemetry
 from MCSL2Lib.Controllers.settingsController import SettingsController
+from MCSL2Lib.Controllers.worldBackup import BackupStore, BackupThread, WorldBackup
 from MCSL2Lib.utils import readGlobalServerConfig
 from MCSL2Lib.singleton import Singleton
 from MCSL2Lib.variables import ServerVariables
@@ -59,6 +90,8 @@ class ServerHelper(QObject):
     def selectedServer(self, index):
         """选择了服务器"""
         self.loadServerConfig(index=index)
+        # 提前在后台检查该Java支持的JVM参数，启动时不用等待
+        warmUpFlags(serverVariables.javaPath)
         self.serverName.emit(readGlobalServerConfig()[index]["name"])
         self.startBtnStat.emit(True)
         # 防止和设置页冲突导致设置无效，得这样写，立刻保存变量以及文件
@@ -80,47 +113,203 @@ class Server:
         self.LastOutputSize = 0
 
 
-@Singleton
-class ServerHandler(QObject):
-    """服务器进程操控器"""
+class LaunchResult(IntEnum):
+    """ServerLauncher.startServer的结果"""
+
+    STARTED = 0  # 已启动，或已在运行并切换为当前服务器
+    EULA = 1  # 未同意Minecraft EULA
+    PRUNING = 2  # 正在清理区块
+
+
+class ServerState(IntEnum):
+    """服务器运行时的生命周期状态"""
+
+    STOPPED = 0
+    STARTING = 1
+    RUNNING = 2
+    STOPPING = 3
+    CRASHED = 4
+    BACKOFF = 5  # 崩溃后等待重启
+
+
+class ServerRuntime(QObject):
+    """
+    单个服务器的运行时\n
+    拥有独立的进程、输出缓冲、解码状态、日志归档与资源采样器，多个运行时可以同时运行
+    """
 
     # 当服务器输出日志时发出的信号(发送一个字符串)
     serverLogOutput = pyqtSignal(str)
 
+    # 批量模式下，按帧发出的一批日志(发送一个字符串列表)
+    serverLogOutputBatch = pyqtSignal(list)
+
+    # 批量模式下，缓冲区溢出丢弃日志时发出的信号(发送一个整数丢弃行数)
+    serverLogOverflow = pyqtSignal(int)
+
     # 当服务器关闭时发出的信号(发送一个整数exit code)
     serverClosed = pyqtSignal(int)
 
     # 当服务器重启时发出的信号
     serverRestarted = pyqtSignal()
 
-    def __init__(self):
+    # 资源占用(与MinecraftServerResMonitorUtil相同)
+    memPercent = pyqtSignal(float)
+    cpuPercent = pyqtSignal(float)
+    resourceSampled = pyqtSignal(object)
+
+    # 生命周期状态改变时发出的信号(发送一个ServerState)
+    stateChanged = pyqtSignal(int)
+
+    # 从终端输出中提取到性能遥测时发出的信号(发送一个TelemetryEvent)
+    telemetryEvent = pyqtSignal(object)
+
+    def __init__(self, name: str, variables, parent=None):
         """
-        初始化一个服务器处理器
+        name: 服务器名称\n
+        variables: 启动时ServerVariables的副本，运行期间不受全局选择的影响
         """
-        super().__init__()
+        super().__init__(parent)
+        self.name = name
+        self.variables = variables
         self.javaPath: str = ""
         self.processArgs = [""]
         self.workingDirectory: str = ""
-        self.partialData: str = b""
-        self.AServer = None
-        self.serverLogOutput.connect(MCSL2Logger.info)
+        self.framer: LineFramer
+        self.detector: Optional[EncodingDetector] = None
+        self.detectTimer = QTimer(self)
+        self.detectTimer.setSingleShot(True)
+        self.detectTimer.timeout.connect(self.finishDetection)
+        self.resetDecoding()
+        self.batchOutput: bool = False
+        self.recentLines = deque(maxlen=5000)
+        self.logBuffer = ServerLogBuffer(parent=self)
+        self.logBuffer.flushed.connect(self.serverLogOutputBatch)
+        self.logBuffer.overflowed.connect(self.serverLogOverflow)
+        self.logArchive: Optional[ServerLogArchiveWriter] = None
+        self.monitor: Optional[MinecraftServerResMonitorUtil] = None
+        self.state = ServerState.STOPPED
+        self.restartPending = False
+        self.killRequested = False
+        self.crashTimes = deque()
+        self.stopTimer = QTimer(self)
+        self.stopTimer.setSingleShot(True)
+        self.stopTimer.timeout.connect(self.onStopTimeout)
+        self.backoffTimer = QTimer(self)
+        self.backoffTimer.setSingleShot(True)
+        self.backoffTimer.timeout.connect(self.onBackoffTimeout)
+        self.players = PlayerSessionTracker(name)
+        self.commands = CommandQueue(
+            self.commandEncoding,
+            settingsController.fileSettings["commandQueueMaxPendingBytes"],
+            parent=self,
+        )
+        self.commands.isRunning = self.isServerRunning
+        autoSaveInterval = settingsController.fileSettings["autoSaveInterval"] * 60
+        if autoSaveInterval > 0:
+            self.commands.schedule("save-all", autoSaveInterval, autoSaveInterval)
+        self.backup: Optional[Union[WorldBackup, BackupThread]] = None
+        autoBackupInterval = settingsController.fileSettings["autoBackupInterval"] * 60
+        if autoBackupInterval > 0:
+            self.commands.schedule(
+                lambda: self.isServerRunning() and self.backupWorld(),
+                autoBackupInterval,
+                autoBackupInterval,
+            )
+        self.telemetry = ServerTelemetry(
+            settingsController.fileSettings["monitorHistorySize"]
+        )
+        self.serverLogOutput.connect(lambda line: self.consumeLogs([line]))
+        self.serverLogOutputBatch.connect(self.consumeLogs)
+        self.serverLogOverflow.connect(
+            lambda dropped: MCSL2Logger.warning(
+                f"服务器{self.name}输出过快，已丢弃{dropped}行日志"
+            )
+        )
         self.Server = self.getServerProcess()
 
+    def configureLogBuffer(self):
+        """按设置启用或关闭批量日志模式"""
+        self.logBuffer.flushAll()
+        self.batchOutput = settingsController.fileSettings["consoleOutputBatching"]
+        self.logBuffer.configure(
+            capacity=settingsController.fileSettings["consoleBufferCapacity"],
+            interval=settingsController.fileSettings["consoleFlushInterval"],
+            maxBatchLines=settingsController.fileSettings["consoleFlushMaxLines"],
+        )
+        recentLimit = settingsController.fileSettings["consoleMaxBlockCount"] or 5000
+        if recentLimit != self.recentLines.maxlen:
+            self.recentLines = deque(self.recentLines, maxlen=recentLimit)
+
+    def openLogArchive(self):
+        """按设置为该服务器开启独立的终端日志归档"""
+        self.closeLogArchive()
+        if settingsController.fileSettings["serverConsoleArchive"]:
+            self.logArchive = ServerLogArchiveWriter(self.name)
+            self.logArchive.finished.connect(self.logArchive.deleteLater)
+            self.logArchive.start()
+
+    def closeLogArchive(self):
+        if self.logArchive is not None:
+            self.logArchive.close()
+            self.logArchive = None
+
+    def consumeLogs(self, lines: list):
+        """
+        处理服务器日志：记录最近输出、更新玩家会话与性能遥测并写入归档\n
+        开启了独立归档时写入Servers/<name>/MCSL2_ConsoleArchive，否则仍写入MCSL2全局日志
+        """
+        self.recentLines.extend(lines)
+        self.players.feed(lines)
+        for event in self.telemetry.feed(lines):
+            if event.kind == "startup":
+                self.recordAppCdsStartup(event)
+            self.telemetryEvent.emit(event)
+        if self.logArchive is not None:
+            self.logArchive.submit(lines)
+        else:
+            MCSL2Logger.info("\n".join(lines))
+
+    def recordAppCdsStartup(self, event):
+        """启用了AppCDS时记录启动到"Done"的耗时，使用归档时与生成归档那次的耗时对比"""
+        if (mode := appCdsMode(self.processArgs)) is None:
+            return
+        reported, wall = event.values
+        seconds = wall or reported
+        baseline = recordStartup(self.workingDirectory, mode, seconds)
+        if mode == "shared" and baseline:
+            self.outputLog(
+                f"[MCSL2 | 提示]：启动耗时{seconds:.1f}秒（使用AppCDS归档，未使用时为{baseline:.1f}秒）。"
+            )
+        elif mode == "dump":
+            self.outputLog(
+                f"[MCSL2 | 提示]：启动耗时{seconds:.1f}秒，正常关闭服务器后将生成AppCDS归档以加快下次启动。"
+            )
+
+    def outputLog(self, text: str):
+        """
+        输出一行日志\n
+        批量模式下进入缓冲区，由缓冲区按帧发出serverLogOutputBatch，否则直接发出serverLogOutput
+        """
+        if self.batchOutput:
+            self.logBuffer.append(text)
+        else:
+            self.serverLogOutput.emit(text)
+
     def getServerProcess(self) -> Server:
         """
         获取一个服务器进程，但是并没有运行，只是创建了一个QProcess对象
         """
         self.AServer = Server()
-        self.AServer.serverProcess = QProcess()
+        self.AServer.serverProcess = QProcess(self)
         self.AServer.serverProcess.setProgram(self.javaPath)
         self.AServer.serverProcess.setArguments(self.processArgs)
         self.AServer.serverProcess.setWorkingDirectory(self.workingDirectory)
-        self.AServer.serverProcess.started.connect(
-            lambda: self.serverLogOutput.emit("[MCSL2 | 提示]：服务器正在启动，请稍后...")
-        )
+        self.AServer.serverProcess.started.connect(self.onProcessStarted)
         self.AServer.serverProcess.readyReadStandardOutput.connect(
             self.serverLogOutputHandler
         )
+        self.AServer.serverProcess.errorOccurred.connect(self.onProcessError)
         self.AServer.serverProcess.finished.connect(
             lambda: self.serverClosed.emit(self.AServer.serverProcess.exitCode())
         )
@@ -129,33 +318,171 @@ class ServerHandler(QObject):
         )
         return self.AServer
 
+    def setState(self, state: ServerState):
+        if state != self.state:
+            self.state = state
+            self.stateChanged.emit(int(state))
+
+    def isActive(self) -> bool:
+        """进程存在，或正在等待崩溃重启"""
+        return self.state not in (ServerState.STOPPED, ServerState.CRASHED)
+
+    def onProcessStarted(self):
+        self.setState(ServerState.RUNNING)
+        self.outputLog("[MCSL2 | 提示]：服务器正在启动，请稍后...")
+
+    def onProcessError(self, error):
+        # 启动失败时QProcess不会发出finished
+        if error == QProcess.FailedToStart:
+            self.outputLog(
+                f"[MCSL2 | 提示]：服务器进程启动失败：{self.Server.serverProcess.errorString()}"
+            )
+            self.stopTimer.stop()
+            self.restartPending = False
+            self.releaseResources(-1)
+            self.setState(ServerState.STOPPED)
+
+    def releaseResources(self, exitCode: int):
+        """进程结束后释放本次运行的缓冲、归档与采样器"""
+        self.logBuffer.flushAll()
+        self.players.endAll()
+        self.closeLogArchive()
+        if self.monitor is not None:
+            # 采样线程真正退出后再释放，避免销毁仍在运行的QThread
+            self.monitor.samplerThread.finished.connect(self.monitor.deleteLater)
+            self.monitor.onServerClosedHandler(exitCode)
+            self.monitor = None
+
     def serverCrashed(self, exitCode):
-        if exitCode:
-            if exitCode != 62097:
-                self.serverLogOutput.emit(f"[MCSL2 | 提示]：服务器崩溃！")
-                if settingsController.fileSettings["restartServerWhenCrashed"]:
-                    self.Server.serverProcess.waitForFinished()
-                    self.Server.serverProcess.start()
-                    self.serverLogOutput.emit(f"[MCSL2 | 提示]：正在重新启动服务器...")
+        """
+        进程结束时由finished驱动的状态转移\n
+        用户请求的关闭/重启 -> STOPPED/重新启动；意外退出 -> CRASHED，按设置进入BACKOFF等待重启
+        """
+        self.stopTimer.stop()
+        # 最后一段没有换行的输出
+        self.finishDetection()
+        self.emitOutputs(self.framer.flush())
+        self.releaseResources(exitCode)
+        expected = self.state == ServerState.STOPPING
+        if self.restartPending:
+            self.restartPending = False
+            self.outputLog("[MCSL2 | 提示]：服务器已关闭，正在重新启动...")
+            self.launch()
+            self.serverRestarted.emit()
+            return
+        if not exitCode or expected:
+            if exitCode and not self.killRequested:
+                self.outputLog(f"[MCSL2 | 提示]：服务器关闭时出错，退出码{exitCode}。")
+            elif exitCode:
+                self.outputLog("[MCSL2 | 提示]：服务器已被强制结束。")
             else:
-                self.serverLogOutput.emit(f"[MCSL2 | 提示]：服务器崩溃，但可能是被强制结束进程。")
-        else:
-            self.serverLogOutput.emit(f"[MCSL2 | 提示]：服务器已关闭！")
+                self.outputLog("[MCSL2 | 提示]：服务器已关闭！")
+            self.setState(ServerState.STOPPED)
+            return
+        if exitCode == 62097:
+            self.outputLog("[MCSL2 | 提示]：服务器崩溃，但可能是被强制结束进程。")
+            self.setState(ServerState.STOPPED)
+            return
+        self.outputLog(f"[MCSL2 | 提示]：服务器崩溃！退出码{exitCode}。")
+        self.setState(ServerState.CRASHED)
+        if settingsController.fileSettings["restartServerWhenCrashed"]:
+            self.scheduleCrashRestart()
+
+    def scheduleCrashRestart(self):
+        """指数退避后重启；窗口期内崩溃次数达到上限则判定为崩溃循环，不再重启"""
+        now = time()
+        window = settingsController.fileSettings["crashLoopWindow"]
+        self.crashTimes.append(now)
+        while self.crashTimes and now - self.crashTimes[0] > window:
+            self.crashTimes.popleft()
+        crashes = len(self.crashTimes)
+        if crashes >= settingsController.fileSettings["crashLoopLimit"]:
+            self.outputLog(
+                f"[MCSL2 | 警告]：服务器在{window}秒内已崩溃{crashes}次，判定为崩溃循环，已停止自动重启。请检查服务器日志。"
+            )
+            self.crashTimes.clear()
+            return
+        delay = min(
+            settingsController.fileSettings["crashRestartBaseDelay"] * 2 ** (crashes - 1),
+            settingsController.fileSettings["crashRestartMaxDelay"],
+        )
+        self.outputLog(f"[MCSL2 | 提示]：将在{delay}秒后重新启动服务器...")
+        self.setState(ServerState.BACKOFF)
+        self.backoffTimer.start(int(delay * 1000))
+
+    def onBackoffTimeout(self):
+        if self.state == ServerState.BACKOFF:
+            self.outputLog("[MCSL2 | 提示]：正在重新启动服务器...")
+            self.launch()
+
+    def onStopTimeout(self):
+        if self.state == ServerState.STOPPING and not self.isProcessDead():
+            self.outputLog(
+                f"[MCSL2 | 警告]：服务器在{settingsController.fileSettings['serverStopTimeout']}秒内未能关闭，正在强制结束..."
+            )
+            self.killRequested = True
+            self.Server.serverProcess.kill()
+
+    def isProcessDead(self) -> bool:
+        return (
+            self.Server.serverProcess is None
+            or self.Server.serverProcess.state() == QProcess.NotRunning
+        )
 
     def serverLogOutputHandler(self):
         """
         When the server outputs change, emit a signal with the updated output.
         """
-        newData = self.Server.serverProcess.readAllStandardOutput().data()
-        self.partialData += newData  # Append the incoming data to the buffer
-        lines = self.partialData.split(b"\n")  # Split the buffer into lines
-        self.partialData = (
-            lines.pop()
-        )  # The last element might be incomplete, so keep it in the buffer
+        data = self.Server.serverProcess.readAllStandardOutput().data()
+        if self.detector is not None:
+            data = self.detector.feed(data)
+            if self.detector.decided:
+                self.applyDetectedEncoding()
+            elif self.detector.holding() and not self.detectTimer.isActive():
+                # 非ASCII输出太少时不无限等待样本
+                self.detectTimer.start(1000)
+        self.emitOutputs(self.framer.feed(data))
+
+    def resetDecoding(self):
+        """按输出编码设置重建分行器；设置为"auto"时先按UTF-8分行，同时开始检测"""
+        encoding = self.variables.outputDecoding
+        self.detectTimer.stop()
+        self.detector = EncodingDetector() if encoding == "auto" else None
+        self.framer = LineFramer(
+            "utf-8" if self.detector is not None else encoding,
+            settingsController.fileSettings["consoleMaxLineBytes"],
+        )
+
+    def finishDetection(self):
+        """用已暂存的样本立即判定，并把暂存的输出交给分行器"""
+        if self.detector is None or not self.detector.holding():
+            return
+        data = self.detector.finish()
+        if self.detector.decided:
+            self.applyDetectedEncoding()
+        self.emitOutputs(self.framer.feed(data))
 
-        for line in lines:
-            newOutput = line.decode(serverVariables.outputDecoding, errors="replace")
-            self.serverLogOutput.emit(newOutput[:-1])
+    def applyDetectedEncoding(self):
+        """切换分行器的解码器，并把结果记入该服务器的配置"""
+        encoding = self.detector.result
+        self.detector = None
+        self.detectTimer.stop()
+        self.framer.setEncoding(encoding)
+        self.variables.outputDecoding = encoding
+        if self.variables.inputEncoding == "auto":
+            self.variables.inputEncoding = encoding
+        if (value := settingEncoding(encoding)) is not None:
+            rememberEncoding(self.name, value)
+        self.outputLog(f"[MCSL2 | 提示]：检测到服务器输出编码为{encoding}，已自动切换。")
+
+    def emitOutputs(self, outputs: List[str]):
+        if not outputs:
+            return
+        if self.batchOutput:
+            self.logBuffer.extend(outputs)
+        else:
+            for newOutput in outputs:
+                self.serverLogOutput.emit(newOutput)
 
     def startServer(self, javaPath: str, processArgs: List[str], workingDirectory: str):
         """
@@ -166,50 +493,369 @@ class ServerHandler(QObject):
         self.javaPath = javaPath
         self.processArgs = processArgs
         self.workingDirectory = workingDirectory
+        self.recentLines.clear()
+        self.crashTimes.clear()
+        self.launch()
+
+    def launch(self):
+        """以当前参数启动一次进程，启动、重启与崩溃重启共用"""
+        self.backoffTimer.stop()
+        self.restartPending = False
+        self.killRequested = False
+        self.resetDecoding()
+        self.configureLogBuffer()
+        self.openLogArchive()
+        if self.Server.serverProcess is not None and self.isProcessDead():
+            self.Server.serverProcess.deleteLater()
+        # 重启时上次运行可能已经写出了AppCDS归档
+        self.processArgs = refreshAppCdsArgs(
+            self.workingDirectory, self.javaPath, self.processArgs
+        )
         self.Server = self.getServerProcess()
+        self.commands.attach(self.Server.serverProcess)
+        self.monitor = MinecraftServerResMonitorUtil(self, self)
+        self.monitor.memPercent.connect(self.memPercent)
+        self.monitor.cpuPercent.connect(self.cpuPercent)
+        self.monitor.resourceSampled.connect(self.resourceSampled)
+        self.setState(ServerState.STARTING)
+        self.telemetry.markLaunch()
         self.Server.serverProcess.start()
 
     def stopServer(self):
         """
         停止服务器
         """
-        if self.isServerRunning():
-            if settingsController.fileSettings["sendStopInsteadOfKill"]:
-                self.Server.serverProcess.write(b"stop\n")
-                # self.Server.serverProcess.waitForFinished()
-            else:
-                self.haltServer()
+        if settingsController.fileSettings["sendStopInsteadOfKill"]:
+            self.requestStop()
+        else:
+            self.haltServer()
+
+    def requestStop(self):
+        """
+        发送stop正常关闭服务器，不等待进程退出\n
+        超过serverStopTimeout秒仍未退出时强制结束；正在等待崩溃重启时直接取消重启。
+        尚未执行的定时重启等一次性任务一并取消
+        """
+        self.commands.cancelOnce()
+        if self.state == ServerState.BACKOFF:
+            self.backoffTimer.stop()
+            self.outputLog("[MCSL2 | 提示]：已取消自动重启。")
+            self.setState(ServerState.STOPPED)
+            return
+        if self.isProcessDead() or self.state == ServerState.STOPPING:
+            return
+        self.setState(ServerState.STOPPING)
+        self.commands.sendNow("stop")
+        self.stopTimer.start(settingsController.fileSettings["serverStopTimeout"] * 1000)
 
     def restartServer(self):
         """
-        重启服务器
+        重启服务器，进程退出后由finished接着启动，不会阻塞
         """
-        self.Server.serverProcess.write(b"stop\n")
-        self.Server.serverProcess.waitForFinished()
-        self.Server.serverProcess.start()
-        self.serverRestarted.emit()
+        if self.isProcessDead():
+            self.launch()
+            self.serverRestarted.emit()
+            return
+        self.restartPending = True
+        self.requestStop()
 
     def haltServer(self):
         """
         强制停止服务器
         """
-        if self.isServerRunning():
+        self.commands.cancelOnce()
+        if self.state == ServerState.BACKOFF:
+            self.requestStop()
+            return
+        if not self.isProcessDead():
+            self.restartPending = False
+            self.killRequested = True
+            self.setState(ServerState.STOPPING)
             self.Server.serverProcess.kill()
-            self.Server.serverProcess.waitForFinished()
+
+    def commandEncoding(self) -> str:
+        encoding = self.variables.inputEncoding
+        if encoding == "auto":
+            # 输出编码尚未检测出来时使用系统首选编码
+            encoding = getpreferredencoding(False)
+        return encoding
 
     def sendCommand(self, command: str):
         """
         用户向服务器发送命令
         """
-        self.Server.serverProcess.write(
-            f"{command}\n".encode(serverVariables.inputEncoding)
+        self.commands.send(command)
+
+    def sendCommands(self, commands: List[str]):
+        """
+        批量发送命令，合并为一次写入
+        """
+        self.commands.sendMany(commands)
+
+    def scheduleRestart(self, delay: int, warnings=(300, 60, 30, 10, 5)) -> List[int]:
+        """
+        delay秒后重启服务器，重启前在剩余warnings秒时依次广播提醒\n
+        返回定时任务ID，可用commands.cancel取消；期间停止服务器时会自动取消
+        """
+        taskIds = [
+            self.commands.schedule(f"say 服务器将在{left}秒后重启", delay - left)
+            for left in warnings
+            if left < delay
+        ]
+        taskIds.append(self.commands.schedule(self.restartServer, delay))
+        return taskIds
+
+    def isBackupRunning(self) -> bool:
+        return self.backup is not None
+
+    def backupWorld(self) -> bool:
+        """
+        备份存档，运行中的服务器会先暂停自动保存\n
+        已有备份或还原在进行时返回False
+        """
+        if self.isBackupRunning():
+            return False
+        self.backup = WorldBackup(
+            self,
+            saveTimeout=settingsController.fileSettings["backupSaveTimeout"],
+            keep=settingsController.fileSettings["backupKeepSnapshots"],
+            workers=settingsController.fileSettings["backupWorkers"],
+            parent=self,
         )
+        self.backup.finished.connect(self.onBackupFinished)
+        self.backup.start()
+        return True
+
+    def onBackupFinished(self, *_):
+        """WorldBackup.finished与BackupThread.finished都在备份线程结束后才发出，此时可以释放"""
+        self.backup.deleteLater()
+        self.backup = None
+
+    def restoreWorld(self, snapshotId: str) -> bool:
+        """
+        把存档还原为指定快照，只能在服务器停止时进行
+        """
+        if self.isActive() or self.isBackupRunning():
+            return False
+        self.outputLog(f"[MCSL2 | 提示]：正在还原存档快照{snapshotId}...")
+        self.backup = BackupThread(
+            BackupStore(self.name), osp.join("Servers", self.name), snapshotId, parent=self
+        )
+        self.backup.done.connect(
+            lambda _: self.outputLog(f"[MCSL2 | 提示]：存档已还原为快照{snapshotId}。")
+        )
+        self.backup.failed.connect(
+            lambda message: self.outputLog(f"[MCSL2 | 错误]：存档还原失败：{message}")
+        )
+        self.backup.finished.connect(self.onBackupFinished)
+        self.backup.start()
+        return True
 
     def isServerRunning(self):
         if self.Server.serverProcess is None:
             return False
         return self.Server.serverProcess.state() == QProcess.Running
 
+
+@Singleton
+class ServerHandler(QObject):
+    """
+    服务器运行时注册表\n
+    可同时运行多个服务器，每个服务器一个ServerRuntime；
+    本类的信号只转发"当前"服务器(终端页正在查看的那个)的信号，原有单服务器的调用方式保持不变
+    """
+
+    # 当服务器输出日志时发出的信号(发送一个字符串)
+    serverLogOutput = pyqtSignal(str)
+
+    # 批量模式下，按帧发出的一批日志(发送一个字符串列表)
+    serverLogOutputBatch = pyqtSignal(list)
+
+    # 批量模式下，缓冲区溢出丢弃日志时发出的信号(发送一个整数丢弃行数)
+    serverLogOverflow = pyqtSignal(int)
+
+    # 当服务器关闭时发出的信号(发送一个整数exit code)
+    serverClosed = pyqtSignal(int)
+
+    # 当服务器重启时发出的信号
+    serverRestarted = pyqtSignal()
+
+    # 当前服务器的资源占用
+    memPercent = pyqtSignal(float)
+    cpuPercent = pyqtSignal(float)
+    resourceSampled = pyqtSignal(object)
+
+    # 当前服务器的生命周期状态(发送一个ServerState)
+    stateChanged = pyqtSignal(int)
+
+    # 当前服务器的性能遥测(发送一个TelemetryEvent)
+    telemetryEvent = pyqtSignal(object)
+
+    # 切换当前服务器时发出的信号(发送服务器名称)
+    currentServerChanged = pyqtSignal(str)
+
+    # 运行时增减时发出的信号
+    runtimesChanged = pyqtSignal()
+
+    relayedSignals = (
+        "serverLogOutput",
+        "serverLogOutputBatch",
+        "serverLogOverflow",
+        "serverClosed",
+        "serverRestarted",
+        "memPercent",
+        "cpuPercent",
+        "resourceSampled",
+        "stateChanged",
+        "telemetryEvent",
+    )
+
+    def __init__(self):
+        """
+        初始化服务器运行时注册表
+        """
+        super().__init__()
+        self.runtimes: Dict[str, ServerRuntime] = {}
+        self.current: Optional[ServerRuntime] = None
+
+    def getRuntime(self, name: str) -> Optional[ServerRuntime]:
+        return self.runtimes.get(name, None)
+
+    def createRuntime(self, name: str) -> ServerRuntime:
+        """
+        获取名为name的运行时，不存在则以当前ServerVariables的深拷贝创建\n
+        各运行时不共享serverProperties、extraData等容器
+        """
+        runtime = self.runtimes.get(name, None)
+        if runtime is None:
+            runtime = ServerRuntime(name, deepcopy(serverVariables), self)
+            for signalName in self.relayedSignals:
+                getattr(runtime, signalName).connect(
+                    partial(self._relay, runtime, signalName)
+                )
+            self.runtimes[name] = runtime
+            self.runtimesChanged.emit()
+        else:
+            runtime.variables = deepcopy(serverVariables)
+        return runtime
+
+    def _relay(self, runtime: ServerRuntime, signalName: str, *args):
+        if runtime is self.current:
+            getattr(self, signalName).emit(*args)
+
+    def removeRuntime(self, name: str) -> bool:
+        """移除一个已停止的运行时"""
+        runtime = self.runtimes.get(name, None)
+        if runtime is None or runtime.isActive():
+            return False
+        del self.runtimes[name]
+        if runtime is self.current:
+            self.current = None
+        runtime.deleteLater()
+        self.runtimesChanged.emit()
+        return True
+
+    def setCurrentServer(self, name: str):
+        """切换终端页正在查看的服务器，不会影响任何服务器的运行"""
+        runtime = self.runtimes.get(name, None)
+        if runtime is None or runtime is self.current:
+            return
+        self.current = runtime
+        self.currentServerChanged.emit(name)
+
+    @property
+    def currentServerName(self) -> str:
+        return self.current.name if self.current is not None else serverVariables.serverName
+
+    @property
+    def currentVariables(self):
+        return self.current.variables if self.current is not None else serverVariables
+
+    @property
+    def Server(self) -> Optional[Server]:
+        return self.current.Server if self.current is not None else None
+
+    @property
+    def AServer(self) -> Optional[Server]:
+        return self.Server
+
+    def runningServers(self) -> List[str]:
+        return [name for name, rt in self.runtimes.items() if rt.isServerRunning()]
+
+    def activeServers(self) -> List[str]:
+        return [name for name, rt in self.runtimes.items() if rt.isActive()]
+
+    def isAnyServerRunning(self) -> bool:
+        return any(rt.isServerRunning() for rt in self.runtimes.values())
+
+    def isAnyServerActive(self) -> bool:
+        return any(rt.isActive() for rt in self.runtimes.values())
+
+    def startServer(self, javaPath: str, processArgs: List[str], workingDirectory: str):
+        """
+        以当前ServerVariables运行服务器，并切换为当前服务器\n
+        javaPath: Java路径\n
+        processArgs: 服务器参数,列表形式，形如["-jar","server.jar","nogui","-Xms1G","-Xmx1G"]\n
+        """
+        runtime = self.createRuntime(serverVariables.serverName)
+        self.current = runtime
+        runtime.startServer(javaPath, processArgs, workingDirectory)
+        self.currentServerChanged.emit(runtime.name)
+
+    def stopServer(self):
+        """
+        停止当前服务器
+        """
+        if self.current is not None:
+            self.current.stopServer()
+
+    def stopAllServers(self):
+        """正常关闭全部服务器，超时的会被强制结束"""
+        for runtime in self.runtimes.values():
+            runtime.requestStop()
+
+    def restartServer(self):
+        """
+        重启当前服务器
+        """
+        if self.current is not None:
+            self.current.restartServer()
+
+    def haltServer(self):
+        """
+        强制停止当前服务器
+        """
+        if self.current is not None:
+            self.current.haltServer()
+
+    def sendCommand(self, command: str):
+        """
+        用户向当前服务器发送命令
+        """
+        if self.current is not None:
+            self.current.sendCommand(command)
+
+    def sendCommands(self, commands: List[str]):
+        """
+        向当前服务器批量发送命令
+        """
+        if self.current is not None:
+            self.current.sendCommands(commands)
+
+    def isServerRunning(self, name: Optional[str] = None):
+        runtime = self.current if name is None else self.runtimes.get(name, None)
+        if runtime is None:
+            return False
+        return runtime.isServerRunning()
+
+    def isServerActive(self, name: Optional[str] = None):
+        """服务器进程存在，或正在等待崩溃重启"""
+        runtime = self.current if name is None else self.runtimes.get(name, None)
+        if runtime is None:
+            return False
+        return runtime.isActive()
+
+
 @Singleton
 class MojangEula:
     """有关Mojang Eula的部分。"""
@@ -253,36 +899,47 @@ class ServerLauncher:
         self.jvmArg: List[str] = [""]
         self.javaPath: str = ""
 
-    def startServer(self) -> bool:
+    def startServer(self) -> LaunchResult:
         """
         供调用的方法。\n
         1.检查Mojang Eula\n
         2.生成开服命令参数\n
-        3.启动进程
+        3.启动进程\n
+        该服务器已在运行时只切换为当前服务器；正在清理区块时不启动
         """
+        if ServerHandler().isServerActive(serverVariables.serverName):
+            ServerHandler().setCurrentServer(serverVariables.serverName)
+            return LaunchResult.STARTED
+        if isRegionPruning(serverVariables.serverName):
+            return LaunchResult.PRUNING
         if not MojangEula().checkEula():
-            return False
+            return LaunchResult.EULA
         else:
             self.reGetNewJava()
             self.setjvmArg()
             self.launch()
-            return True
+            return LaunchResult.STARTED
 
     def reGetNewJava(self):
         self.javaPath = serverVariables.javaPath
 
     def setjvmArg(self):
         """生成开服命令参数"""
-        self.jvmArg = [
-            f"-Xms{serverVariables.minMem}{serverVariables.memUnit}",
-            f"-Xmx{serverVariables.maxMem}{serverVariables.memUnit}",
-        ]
-        # add jvm args
         if isinstance(serverVariables.jvmArg, list):
-            self.jvmArg.extend(serverVariables.jvmArg)
+            userArgs = [arg for arg in serverVariables.jvmArg if arg.strip()]
         else:
-            if serverVariables.jvmArg:
-                self.jvmArg.append(serverVariables.jvmArg)
+            userArgs = [serverVariables.jvmArg] if serverVariables.jvmArg else []
+        # 内存、调优参数(extra_data中的jvm_flag_profile优先于全局设置)与用户参数
+        self.jvmArg = buildJvmArgs(
+            javaPath=self.javaPath,
+            minMem=serverVariables.minMem,
+            maxMem=serverVariables.maxMem,
+            memUnit=serverVariables.memUnit,
+            userArgs=userArgs,
+            profile=(serverVariables.extraData or {}).get(
+                "jvm_flag_profile", settingsController.fileSettings["jvmFlagProfile"]
+            ),
+        )
 
         # adjust to different server type
         if serverVariables.serverType == "forge":
@@ -293,6 +950,15 @@ class ServerLauncher:
 
         # add "nogui" arg
         self.jvmArg.append("nogui")
+
+        # AppCDS归档(extra_data中的app_cds优先于全局设置)
+        if (serverVariables.extraData or {}).get(
+            "app_cds", settingsController.fileSettings["appCdsEnabled"]
+        ):
+            self.jvmArg = insertAppCdsArgs(
+                f"Servers//{serverVariables.serverName}", self.javaPath, self.jvmArg
+            )
+
         MCSL2Logger.info(f"生成JVM参数：\n{self.jvmArg}")
 
     def launch(self):
@@ -335,75 +1001,67 @@ class readLastServerConfigThread(QThread):
 
 class MinecraftServerResMonitorUtil(QObject):
     """
-    获取服务器资源占用的线程
+    获取服务器资源占用\n
+    采样在独立线程中进行，结果写入history供终端页绘制历史曲线
     """
 
     memPercent = pyqtSignal(float)
     cpuPercent = pyqtSignal(float)
+    # 整棵进程树的完整采样(发送一个ResourceSample)
+    resourceSampled = pyqtSignal(object)
+    pidChanged = pyqtSignal(int)
+    stopSampling = pyqtSignal()
 
-    def __init__(self, parent=None):
+    def __init__(self, runtime: "ServerRuntime", parent=None):
         super().__init__(parent)
+        self.runtime = runtime
         self.setObjectName("MinecraftServerResMonitorThread")
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.getServerMem)
-        self.timer.timeout.connect(self.getServerCPU)
-        self.timer.start(1000)  # 每隔1秒获取一次
+        self.history = ResourceHistory(
+            settingsController.fileSettings["monitorHistorySize"]
+        )
+        self.samplerThread = QThread(self)
+        self.sampler = ServerResourceSampler(
+            interval=1000,  # 每隔1秒获取一次
+            useUSS=settingsController.fileSettings["monitorUseUSS"],
+        )
+        self.sampler.moveToThread(self.samplerThread)
+        self.samplerThread.started.connect(self.sampler.start)
+        self.samplerThread.finished.connect(self.sampler.deleteLater)
+        self.pidChanged.connect(self.sampler.setPid)
+        self.stopSampling.connect(self.sampler.stop)
+        self.sampler.sampled.connect(self.onSampled)
+        self.samplerThread.start()
 
-    def getServerMem(self):
-        divisionNumList = {"G": 1073741824, "M": 1048576}
-        divisionNum = divisionNumList[serverVariables.memUnit]
-        try:
-            if ServerHandler().isServerRunning():
-                serverMem = (
-                    Process(ServerHandler().AServer.serverProcess.processId())
-                    .memory_full_info()
-                    .uss
-                    / divisionNum
-                )
-                self.memPercent.emit(float("{:.4f}".format(serverMem)))
-            else:
-                self.memPercent.emit(0.0000)
-        except NoSuchProcess:
-            pass
-        except PermissionError:
-            pass
-        except AccessDenied:
-            pass
+        serverProcess = runtime.Server.serverProcess
+        serverProcess.started.connect(
+            lambda: self.pidChanged.emit(serverProcess.processId())
+        )
+        if serverProcess.processId():
+            self.pidChanged.emit(serverProcess.processId())
 
-    def getServerCPU(self):
-        try:
-            if ServerHandler().isServerRunning():
-                serverCPU = Process(
-                    ServerHandler().AServer.serverProcess.processId()
-                ).cpu_percent(interval=0.01)
-                self.cpuPercent.emit(float("{:.4f}".format(serverCPU / 10)))
-            else:
-                self.cpuPercent.emit(0.0000)
-        except NoSuchProcess:
-            pass
-        except PermissionError:
-            pass
-        except AccessDenied:
-            pass
+    @pyqtSlot(object)
+    def onSampled(self, sample: ResourceSample):
+        self.history.append(time(), *sample)
+        divisionNumList = {"G": 1073741824, "M": 1048576}
+        divisionNum = divisionNumList[self.runtime.variables.memUnit]
+        self.memPercent.emit(float("{:.4f}".format(sample.mem / divisionNum)))
+        self.cpuPercent.emit(float("{:.4f}".format(sample.cpu)))
+        self.resourceSampled.emit(sample)
 
     @pyqtSlot(int)
     def onServerClosedHandler(self, _):
         self.cpuPercent.emit(0.0)
         self.memPercent.emit(0.0)
-        self.timer.stop()
+        self.stopSampling.emit()
+        self.samplerThread.quit()
 
 
-def readServerProperties():
+def readServerProperties(serverName: Optional[str] = None):
+    """读取server.properties到serverVariables.serverProperties，文件没有变化时使用缓存"""
     serverVariables.serverProperties.clear()
     try:
-        with open(
-            f"./Servers/{serverVariables.serverName}/server.properties", "r"
-        ) as serverPropertiesFile:
-            lines = serverPropertiesFile.readlines()
-            for line in lines:
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    key, value = line.split("=", 1)
-                    serverVariables.serverProperties[key.strip()] = value.strip()
+        serverVariables.serverProperties.update(
+            loadServerProperties(serverName or serverVariables.serverName).items()
+        )
     except FileNotFoundError:
         serverVariables.serverProperties.update({"msg": "File not found"})
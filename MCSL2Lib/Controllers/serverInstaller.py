@@ -33,6 +33,7 @@ from PyQt5.QtCore import (
 )
 from PyQt5.QtNetwork import QNetworkRequest, QNetworkReply, QNetworkAccessManager
 
+from MCSL2Lib.Controllers.lineFramer import LineFramer
 from MCSL2Lib.Controllers.settingsController import SettingsController
 from MCSL2Lib.utils import ServerUrl, workingThreads
 from MCSL2Lib.variables import ConfigureServerVariables, EditServerVariables
@@ -122,7 +123,7 @@ class Installer(QObject):
         self.file = file
         self.logDecode = logDecode
         self.workingProcess: Optional[QProcess] = None
-        self.logPartialData = b""
+        self.logFramer = LineFramer(logDecode)
         self.installerLogOutput.connect(MCSL2Logger.info)
         self.cancelled = False
         # self.workThread = QThread()
@@ -148,19 +149,11 @@ class Installer(QObject):
             self._cancelTimer.deleteLater()
 
     def _installerLogHandler(self, prefix: str = ""):
-        newData = self.workingProcess.readAllStandardOutput().data()
-        self.logPartialData += newData  # Append the incoming data to the buffer
-        lines = self.logPartialData.split(b"\n")  # Split the buffer into lines
-        self.partialData = (
-            lines.pop()
-        )  # The last element might be incomplete, so keep it in the buffer
-
-        _ = []
-        for line in lines:
-            newOutput = line.decode(self.logDecode, errors="replace")
-            _.append(">>".join([prefix, newOutput]))
-
-        self.installerLogOutput.emit("\n".join(_))
+        lines = self.logFramer.feed(self.workingProcess.readAllStandardOutput().data())
+        if lines:
+            self.installerLogOutput.emit(
+                "\n".join(">>".join([prefix, line]) for line in lines)
+            )
 
     def __enter__(self):
         return self
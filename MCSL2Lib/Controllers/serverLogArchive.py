@@ -0,0 +1,255 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Per-server rotating, compressed console archive with a sidecar block index.
+"""
+
+from datetime import datetime
+from glob import glob
+from re import compile as reCompile
+from os import makedirs, path as osp, remove
+from queue import Empty, Queue
+from struct import Struct
+from time import time
+from typing import Iterable, List, Optional
+from zlib import compressobj, decompress, DEFLATED, MAX_WBITS
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from MCSL2Lib.Controllers.consoleLogClassifier import ConsoleLogClassifier, LogLevel
+from MCSL2Lib.utils import MCSL2Logger
+
+# 索引记录：块内首行时间、末行时间、块在.log.gz中的偏移、块长度、行数、等级位图
+indexRecord = Struct("<ddQIIB")
+consoleLogClassifier = ConsoleLogClassifier()
+# 每条记录占一行、字段以制表符分隔，写入前转义文本中的反斜杠与控制字符
+_escapes = {chr(i): f"\\x{i:02x}" for i in range(0x20)}
+_escapes.update({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_escapeTable = str.maketrans(_escapes)
+_unescapes = {v: k for k, v in _escapes.items()}
+_escaped = reCompile(r"\\(?:x[0-9a-f]{2}|[\\tnr])")
+
+
+def escapeText(text: str) -> str:
+    return text.translate(_escapeTable)
+
+
+def unescapeText(text: str) -> str:
+    return _escaped.sub(lambda m: _unescapes[m.group()], text)
+
+
+def archiveDir(serverName: str) -> str:
+    return osp.join("Servers", serverName, "MCSL2_ConsoleArchive")
+
+
+def levelMask(levels: Iterable[LogLevel]) -> int:
+    mask = 0
+    for level in levels:
+        mask |= 1 << int(level)
+    return mask
+
+
+class ServerLogArchiveWriter(QThread):
+    """
+    终端日志归档后台写入线程。\n
+    归档按段文件轮转，每段是若干个独立的gzip成员(块)拼接而成，整段仍可被普通gzip工具解压；
+    每写完一个块就在同名.idx中追加一条索引记录，搜索时只解压时间与等级都命中的块。
+    """
+
+    def __init__(
+        self,
+        serverName: str,
+        blockLines: int = 256,
+        segmentBytes: int = 64 * 1024 * 1024,
+        maxSegments: int = 32,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.serverName = serverName
+        self.directory = archiveDir(serverName)
+        self.blockLines = blockLines
+        self.segmentBytes = segmentBytes
+        self.maxSegments = maxSegments
+        self._queue = Queue()
+        self._block: List[str] = []
+        self._blockFirst = 0.0
+        self._blockLast = 0.0
+        self._blockMask = 0
+        self._segment = None
+        self._index = None
+
+    def submit(self, lines: List[str]):
+        """由GUI线程调用，只入队不做IO"""
+        self._queue.put((time(), lines))
+
+    def close(self):
+        """写完剩余日志后结束线程"""
+        self._queue.put(None)
+
+    def run(self):
+        makedirs(self.directory, exist_ok=True)
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=2)
+                except Empty:
+                    # 空闲时把不足一块的日志也落盘，避免崩溃丢失
+                    self._writeBlock()
+                    continue
+                if item is None:
+                    break
+                timestamp, lines = item
+                for line in lines:
+                    self._appendLine(timestamp, line)
+        finally:
+            self._writeBlock()
+            self._closeSegment()
+
+    def _appendLine(self, timestamp: float, line: str):
+        level = consoleLogClassifier.level(line)
+        if not self._block:
+            self._blockFirst = timestamp
+        self._blockLast = timestamp
+        self._blockMask |= 1 << int(level)
+        text = escapeText(consoleLogClassifier.clean(line))
+        self._block.append(f"{timestamp:.3f}\t{level.name}\t{text}\n")
+        if len(self._block) >= self.blockLines:
+            self._writeBlock()
+
+    def _writeBlock(self):
+        if not self._block:
+            return
+        if self._segment is None or self._segment.tell() >= self.segmentBytes:
+            self._rotate()
+        compressor = compressobj(6, DEFLATED, MAX_WBITS | 16)
+        data = compressor.compress("".join(self._block).encode("utf-8"))
+        data += compressor.flush()
+        offset = self._segment.tell()
+        self._segment.write(data)
+        self._segment.flush()
+        self._index.write(
+            indexRecord.pack(
+                self._blockFirst,
+                self._blockLast,
+                offset,
+                len(data),
+                len(self._block),
+                self._blockMask,
+            )
+        )
+        self._index.flush()
+        self._block.clear()
+        self._blockMask = 0
+
+    def _rotate(self):
+        self._closeSegment()
+        name = f"console-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        basePath = osp.join(self.directory, name)
+        self._segment = open(f"{basePath}.log.gz", "ab")
+        self._index = open(f"{basePath}.idx", "ab")
+        segments = sorted(glob(osp.join(self.directory, "console-*.log.gz")))
+        for old in segments[: max(0, len(segments) - self.maxSegments)]:
+            for file in (old, f"{old[:-len('.log.gz')]}.idx"):
+                try:
+                    remove(file)
+                except OSError:
+                    pass
+
+    def _closeSegment(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._index.close()
+            self._segment = None
+            self._index = None
+
+
+def searchServerLogArchive(
+    serverName: str,
+    levels: Optional[Iterable[LogLevel]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    keyword: str = "",
+    limit: int = 5000,
+) -> List[str]:
+    """
+    在服务器的日志归档中搜索。\n
+    先只读.idx按时间与等级筛出候选块，再逐块解压过滤，不会扫描整份归档。\n
+    返回形如"2023-10-17 02:13:05 | ERROR | ..."的行，最多limit行。
+    """
+    # levels会被遍历两次，生成器需要先转成列表
+    levels = list(levels) if levels else None
+    startTs = start.timestamp() if start else float("-inf")
+    endTs = end.timestamp() if end else float("inf")
+    mask = levelMask(levels) if levels else 0xFF
+    levelNames = {level.name for level in levels} if levels else None
+    rv = []
+    for segment in sorted(glob(osp.join(archiveDir(serverName), "console-*.log.gz"))):
+        indexPath = f"{segment[:-len('.log.gz')]}.idx"
+        if not osp.exists(indexPath):
+            continue
+        with open(indexPath, "rb") as f:
+            index = f.read()
+        usable = len(index) - len(index) % indexRecord.size
+        candidates = [
+            record
+            for record in indexRecord.iter_unpack(index[:usable])
+            if record[1] >= startTs and record[0] <= endTs and record[5] & mask
+        ]
+        if not candidates:
+            continue
+        with open(segment, "rb") as f:
+            for _, _, offset, length, _, _ in candidates:
+                f.seek(offset)
+                block = decompress(f.read(length), MAX_WBITS | 16).decode(
+                    "utf-8", errors="replace"
+                )
+                # 只按\n分行，str.splitlines还会在\r、\x1c、\u2028等字符处断开
+                for line in block.split("\n"):
+                    try:
+                        timestamp, level, text = line.split("\t", 2)
+                        timestamp = float(timestamp)
+                    except ValueError:
+                        continue
+                    text = unescapeText(text)
+                    if not startTs <= timestamp <= endTs:
+                        continue
+                    if levelNames is not None and level not in levelNames:
+                        continue
+                    if keyword and keyword not in text:
+                        continue
+                    rv.append(
+                        f"{datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')} | {level} | {text}"
+                    )
+                    if len(rv) >= limit:
+                        return rv
+    return rv
+
+
+class ServerLogSearchThread(QThread):
+    """在后台线程中搜索日志归档，参数同searchServerLogArchive"""
+
+    done = pyqtSignal(list)
+
+    def __init__(self, serverName: str, parent=None, **kwargs):
+        super().__init__(parent)
+        self.setObjectName("ServerLogSearchThread")
+        self.serverName = serverName
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            result = searchServerLogArchive(self.serverName, **self.kwargs)
+        except Exception as e:
+            MCSL2Logger.error(exc=e, msg=f"搜索服务器{self.serverName}的日志归档失败")
+            result = []
+        self.done.emit(result)
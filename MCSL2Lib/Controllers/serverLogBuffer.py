@@ -0,0 +1,95 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+A ring buffer which delivers server output to the GUI in batches.
+"""
+
+from collections import deque
+from typing import List
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class ServerLogBuffer(QObject):
+    """
+    服务器日志环形缓冲区。\n
+    日志行先进入缓冲区，再由定时器按固定帧间隔一次性以列表形式发出，
+    每帧最多发出maxBatchLines行，避免刷屏时卡死界面。\n
+    缓冲区满时丢弃最旧的行并计数，在下一次刷出前通过overflowed信号报告。
+    """
+
+    # 一批日志(发送一个字符串列表)
+    flushed = pyqtSignal(list)
+
+    # 自上次刷出以来被丢弃的行数(发送一个整数)
+    overflowed = pyqtSignal(int)
+
+    def __init__(self, capacity=20000, interval=50, maxBatchLines=500, parent=None):
+        super().__init__(parent)
+        self._lines = deque(maxlen=capacity)
+        self._dropped = 0
+        self.maxBatchLines = maxBatchLines
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.flush)
+
+    def configure(self, capacity: int, interval: int, maxBatchLines: int):
+        """按设置调整缓冲区，会保留尚未刷出的行"""
+        if capacity != self._lines.maxlen:
+            self._lines = deque(self._lines, maxlen=max(1, capacity))
+        self.timer.setInterval(max(1, interval))
+        self.maxBatchLines = max(1, maxBatchLines)
+
+    def append(self, line: str):
+        if len(self._lines) == self._lines.maxlen:
+            self._dropped += 1
+        self._lines.append(line)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def extend(self, lines: List[str]):
+        overflow = len(self._lines) + len(lines) - self._lines.maxlen
+        if overflow > 0:
+            self._dropped += overflow
+        self._lines.extend(lines)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        """刷出一帧日志，缓冲区清空后停止定时器"""
+        if self._dropped:
+            dropped, self._dropped = self._dropped, 0
+            self.overflowed.emit(dropped)
+        if not self._lines:
+            self.timer.stop()
+            return
+        count = min(self.maxBatchLines, len(self._lines))
+        popleft = self._lines.popleft
+        batch = [popleft() for _ in range(count)]
+        if not self._lines:
+            self.timer.stop()
+        self.flushed.emit(batch)
+
+    def flushAll(self):
+        """不受帧预算限制地刷出全部日志，用于服务器关闭等场景"""
+        while self._lines or self._dropped:
+            self.flush()
+        self.timer.stop()
+
+    def clear(self):
+        self._lines.clear()
+        self._dropped = 0
+        self.timer.stop()
+
+    def __len__(self):
+        return len(self._lines)
@@ -0,0 +1,261 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+server.properties reader/writer that keeps comments, order and Java escapes.
+"""
+
+from os import path as osp, replace, stat
+from re import compile as reCompile
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+_unescapes = {"t": "\t", "n": "\n", "r": "\r", "f": "\f"}
+# java.util.Properties只把\r\n、\r与\n当作换行，str.splitlines还会在\f、\x1c、\u2028等字符处断开
+_lineBreak = reCompile(r"\r\n|\r|\n")
+_escapes = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\f": "\\f"}
+
+
+def unescape(text: str) -> str:
+    """按java.util.Properties的规则还原转义(\\t \\n \\r \\f \\uXXXX)，其余转义只去掉反斜杠"""
+    if "\\" not in text:
+        return text
+    rv = []
+    i, length = 0, len(text)
+    while i < length:
+        c = text[i]
+        i += 1
+        if c != "\\" or i >= length:
+            rv.append(c)
+            continue
+        c = text[i]
+        i += 1
+        if c == "u" and i + 4 <= length:
+            try:
+                rv.append(chr(int(text[i : i + 4], 16)))
+                i += 4
+                continue
+            except ValueError:
+                pass
+        rv.append(_unescapes.get(c, c))
+    text = "".join(rv)
+    try:
+        text.encode("utf-8")
+    except UnicodeEncodeError:
+        # \uXXXX写出的代理对合并为一个字符
+        text = text.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+    return text
+
+
+def escape(text: str, isKey: bool = False, asciiOnly: bool = True) -> str:
+    """
+    转义为Properties格式\n
+    非ASCII字符写成\\uXXXX，新旧版本服务端(ISO-8859-1或UTF-8读取)都能正确读出；
+    asciiOnly为False时(用于编辑框显示)只转义不可打印的字符
+    """
+    rv = []
+    for index, c in enumerate(text):
+        if c in _escapes:
+            rv.append(_escapes[c])
+        elif c in "=:#!" and (isKey or index == 0):
+            rv.append(f"\\{c}")
+        elif c == " " and (isKey or index == 0):
+            rv.append("\\ ")
+        elif ord(c) < 0x20 or (ord(c) > 0x7E and (asciiOnly or not c.isprintable())):
+            rv.append("".join(f"\\u{unit:04x}" for unit in _utf16Units(c)))
+        else:
+            rv.append(c)
+    return "".join(rv)
+
+
+def _utf16Units(c: str) -> List[int]:
+    code = ord(c)
+    if code <= 0xFFFF:
+        return [code]
+    code -= 0x10000
+    return [0xD800 + (code >> 10), 0xDC00 + (code & 0x3FF)]
+
+
+def _continues(line: str) -> bool:
+    """行尾有奇数个反斜杠时下一行是续行"""
+    count = len(line) - len(line.rstrip("\\"))
+    return count % 2 == 1
+
+
+def splitEntry(logical: str) -> Tuple[str, str]:
+    """拆分键值：键在第一个未转义的"="、":"或空白处结束"""
+    i, length = 0, len(logical)
+    while i < length:
+        c = logical[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c in "=: \t\f":
+            break
+        i += 1
+    key = logical[:i]
+    while i < length and logical[i] in " \t\f":
+        i += 1
+    if i < length and logical[i] in "=:":
+        i += 1
+    while i < length and logical[i] in " \t\f":
+        i += 1
+    return unescape(key), unescape(logical[i:])
+
+
+class PropertiesFile:
+    """
+    server.properties文件\n
+    按物理行保存原文，注释、空行与顺序原样保留；写入时只替换有改动的键所在的行，
+    新键追加在末尾，删除的键去掉对应的行，最后写入临时文件再替换，不会留下写了一半的文件。
+    """
+
+    def __init__(self, filePath: str):
+        self.filePath = filePath
+        self.encoding = "utf-8"
+        self.newline = "\n"
+        # 每一项为(键或None, 原文物理行列表)，注释与空行的键为None
+        self.blocks: List[Tuple[Optional[str], List[str]]] = []
+        self.values: Dict[str, str] = {}
+        self.signature: Optional[Tuple[int, int]] = None
+
+    def __getitem__(self, key: str) -> str:
+        return self.values[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.values)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.values.get(key, default)
+
+    def items(self):
+        return self.values.items()
+
+    def load(self) -> "PropertiesFile":
+        with open(self.filePath, "rb") as f:
+            data = f.read()
+        info = stat(self.filePath)
+        self.signature = (info.st_mtime_ns, info.st_size)
+        try:
+            text = data.decode("utf-8")
+            self.encoding = "utf-8"
+        except UnicodeDecodeError:
+            # 旧版服务端按ISO-8859-1写入
+            text = data.decode("iso-8859-1")
+            self.encoding = "iso-8859-1"
+        self.newline = "\r\n" if "\r\n" in text else "\n"
+        self.parse(text)
+        return self
+
+    def parse(self, text: str):
+        self.blocks.clear()
+        self.values.clear()
+        lines = _lineBreak.split(text)
+        if lines and not lines[-1]:
+            # 末尾的换行不产生新的一行
+            lines.pop()
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            stripped = line.lstrip(" \t\f")
+            if not stripped or stripped[0] in "#!":
+                self.blocks.append((None, [line]))
+                i += 1
+                continue
+            physical = [line]
+            logical = stripped
+            while _continues(logical) and i + 1 < len(lines):
+                i += 1
+                physical.append(lines[i])
+                logical = logical[:-1] + lines[i].lstrip(" \t\f")
+            i += 1
+            key, value = splitEntry(logical)
+            self.blocks.append((key, physical))
+            self.values[key] = value
+
+    def update(self, changes: Mapping[str, Optional[str]]) -> List[str]:
+        """
+        写入改动，值为None表示删除该键\n
+        返回实际发生变化的键；没有变化时不会写文件
+        """
+        changed = [
+            key
+            for key, value in changes.items()
+            if (value is None and key in self.values)
+            or (value is not None and self.values.get(key) != value)
+        ]
+        if not changed:
+            return []
+        pending = {key: changes[key] for key in changed}
+        blocks = []
+        for key, physical in self.blocks:
+            if key is None or key not in pending:
+                blocks.append((key, physical))
+                continue
+            value = pending[key]
+            if value is None:
+                continue
+            # 同一个键重复出现时只保留最后生效的那一行
+            blocks = [block for block in blocks if block[0] != key]
+            blocks.append((key, [f"{escape(key, True)}={escape(value)}"]))
+        present = {key for key, _ in blocks}
+        for key, value in pending.items():
+            if value is not None and key not in present:
+                blocks.append((key, [f"{escape(key, True)}={escape(value)}"]))
+        text = self.newline.join(line for _, physical in blocks for line in physical)
+        tmpPath = f"{self.filePath}.tmp"
+        with open(tmpPath, "w", encoding=self.encoding, newline="") as f:
+            f.write(text + self.newline)
+        replace(tmpPath, self.filePath)
+        self.blocks = blocks
+        for key, value in pending.items():
+            if value is None:
+                self.values.pop(key, None)
+            else:
+                self.values[key] = value
+        info = stat(self.filePath)
+        self.signature = (info.st_mtime_ns, info.st_size)
+        return changed
+
+
+_cache: Dict[str, PropertiesFile] = {}
+
+
+def serverPropertiesPath(serverName: str) -> str:
+    return osp.join("Servers", serverName, "server.properties")
+
+
+def loadProperties(filePath: str) -> PropertiesFile:
+    """
+    读取properties文件，修改时间与大小都没有变化时直接返回缓存\n
+    文件不存在时抛出FileNotFoundError
+    """
+    key = osp.abspath(filePath)
+    info = stat(filePath)
+    cached = _cache.get(key)
+    if cached is not None and cached.signature == (info.st_mtime_ns, info.st_size):
+        return cached
+    properties = _cache[key] = PropertiesFile(filePath).load()
+    return properties
+
+
+def loadServerProperties(serverName: str) -> PropertiesFile:
+    return loadProperties(serverPropertiesPath(serverName))
+
+
+def updateServerProperties(
+    serverName: str, changes: Mapping[str, Optional[str]]
+) -> List[str]:
+    """修改服务器的server.properties，只重写有变化的键"""
+    return loadServerProperties(serverName).update(changes)
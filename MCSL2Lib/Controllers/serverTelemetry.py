@@ -0,0 +1,138 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Performance telemetry (startup time, overload, TPS/MSPT, Chunky pregen) parsed from console output.
+"""
+
+from re import compile as reCompile
+from time import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from MCSL2Lib.Controllers.consoleLogClassifier import ConsoleLogClassifier
+from MCSL2Lib.Controllers.resourceMonitor import ResourceHistory
+
+consoleLogClassifier = ConsoleLogClassifier()
+
+_number = reCompile(r"\d+(?:\.\d+)?")
+# [Server thread/INFO]: Done (12.345s)! For help, type "help"
+donePattern = reCompile(r"Done \((?P<seconds>\d+(?:[.,]\d+)?)s\)!")
+# Can't keep up! Is the server overloaded? Running 2012ms or 40 ticks behind
+overloadPattern = reCompile(r"Running (?P<ms>\d+)ms or (?P<ticks>\d+) ticks behind")
+# [Chunky] Task running for minecraft:overworld. Processed: 1234 chunks (5.67%), ETA: 0:12:34, Rate: 123.4 cps, Current: 1, 2
+pregenPattern = reCompile(
+    r"Processed: (?P<chunks>\d+) chunks \((?P<percent>[\d.]+)%\).*?Rate: (?P<rate>[\d.]+) cps"
+)
+
+
+def payload(line: str) -> str:
+    """去掉ANSI颜色码与"[12:00:00 INFO]: "等前缀，避免时间戳里的数字被误取"""
+    return consoleLogClassifier.clean(line).rpartition("]: ")[2]
+
+
+class TelemetryEvent(NamedTuple):
+    kind: str  # startup/overload/tps/mspt/pregen/pregenDone
+    time: float
+    values: Tuple[float, ...]
+
+
+class ServerTelemetry:
+    """
+    服务器性能遥测\n
+    从终端输出中提取启动耗时、"Can't keep up!"过载警告、Paper的tps/mspt命令输出与Chunky预生成进度，
+    每类写入一个ResourceHistory时间序列，与资源采样使用同样的存储。\n
+    每行先做子串预筛，只有命中的行才进入正则。
+    """
+
+    series: Dict[str, Tuple[str, ...]] = {
+        "startup": ("time", "reportedSeconds", "wallSeconds"),
+        "overload": ("time", "behindMs", "behindTicks"),
+        "tps": ("time", "tps1m", "tps5m", "tps15m"),
+        "mspt": ("time", "avg", "min", "max"),
+        "pregen": ("time", "chunks", "percent", "rate"),
+    }
+
+    def __init__(self, capacity: int = 3600):
+        self.histories = {
+            kind: ResourceHistory(capacity, fields) for kind, fields in self.series.items()
+        }
+        self.launchTime: Optional[float] = None
+        self._msptPending = False
+
+    def markLaunch(self):
+        """进程启动时调用，用于计算实际启动耗时"""
+        self.launchTime = time()
+        self._msptPending = False
+
+    def latest(self, kind: str) -> Optional[Tuple[float, ...]]:
+        row = self.histories[kind].latest()
+        return None if row is None else tuple(row)
+
+    def feed(self, lines: Iterable[str]) -> List[TelemetryEvent]:
+        events = []
+        for line in lines:
+            event = self.parse(line)
+            if event is not None:
+                self.histories[event.kind if event.kind != "pregenDone" else "pregen"].append(
+                    event.time, *event.values
+                )
+                events.append(event)
+        return events
+
+    def parse(self, line: str) -> Optional[TelemetryEvent]:
+        now = time()
+        if self._msptPending:
+            # mspt命令的数据在标题的下一行："◴ 1.2/0.8/3.4, 1.3/0.8/5.0, 1.5/0.7/9.1"
+            self._msptPending = False
+            values = [float(v) for v in _number.findall(payload(line))]
+            if len(values) >= 3:
+                return TelemetryEvent("mspt", now, tuple(values[:3]))
+        if "Done (" in line:
+            match = donePattern.search(line)
+            if match is not None:
+                wall = now - self.launchTime if self.launchTime else 0.0
+                return TelemetryEvent(
+                    "startup",
+                    now,
+                    (float(match.group("seconds").replace(",", ".")), wall),
+                )
+        elif "Can't keep up!" in line:
+            match = overloadPattern.search(line)
+            if match is not None:
+                return TelemetryEvent(
+                    "overload", now, (float(match.group("ms")), float(match.group("ticks")))
+                )
+        elif "TPS from last" in line:
+            # "TPS from last 1m, 5m, 15m: 20.0, 20.0, 20.0"，保留最后三个数值
+            values = [float(v) for v in _number.findall(payload(line))]
+            if len(values) >= 3:
+                return TelemetryEvent("tps", now, tuple(values[-3:]))
+        elif "Server tick times" in line:
+            self._msptPending = True
+        elif "[Chunky]" in line:
+            match = pregenPattern.search(line)
+            if match is not None:
+                return TelemetryEvent(
+                    "pregen",
+                    now,
+                    (
+                        float(match.group("chunks")),
+                        float(match.group("percent")),
+                        float(match.group("rate")),
+                    ),
+                )
+            if "Task finished" in line:
+                last = self.latest("pregen")
+                return TelemetryEvent(
+                    "pregenDone", now, (last[1] if last else 0.0, 100.0, 0.0)
+                )
+        return None
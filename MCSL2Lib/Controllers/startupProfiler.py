@@ -0,0 +1,190 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Startup profiler writing Chrome trace JSON (chrome://tracing, Perfetto, speedscope).
+"""
+
+import builtins
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from json import dumps
+from platform import platform
+from time import perf_counter_ns
+from typing import Dict, List, Optional
+
+# 只依赖标准库：需要在PyQt5、loguru等第三方库导入之前启动
+
+
+class StartupProfiler:
+    """
+    启动性能分析\n
+    使用"MCSL2.py --profile-startup"或设置环境变量MCSL2_PROFILE_STARTUP=1开启。
+    记录每个模块首次导入、页面构造、aria2启动、插件加载与配置读取的耗时，
+    在启动完成后写入MCSL2/Logs/Startup_<时间>.json(Chrome Trace格式)，
+    可拖进chrome://tracing、ui.perfetto.dev或speedscope查看火焰图，不同版本的文件可以直接对比。\n
+    未开启时所有方法都立即返回，不影响正常启动。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.finished = False
+        self.origin = perf_counter_ns()
+        self.events: List[dict] = []
+        self.filePath: Optional[str] = None
+        self.minImportMicros = 50
+        self._pending: Dict[int, tuple] = {}
+        self._asyncIds = 0
+        self._lock = threading.Lock()
+        self._originalImport = None
+
+    def start(self, argv: List[str]):
+        if self.enabled or not (
+            "--profile-startup" in argv or os.environ.get("MCSL2_PROFILE_STARTUP")
+        ):
+            return
+        self.enabled = True
+        self.filePath = os.path.join(
+            "MCSL2", "Logs", f"Startup_{datetime.now():%Y-%m-%d_%H-%M-%S}.json"
+        )
+        self._originalImport = builtins.__import__
+        builtins.__import__ = self._profiledImport
+
+    def now(self) -> float:
+        """自分析器创建(即进程启动后不久)以来的微秒数"""
+        return (perf_counter_ns() - self.origin) / 1000
+
+    def record(self, event: dict):
+        event.setdefault("pid", os.getpid())
+        event.setdefault("tid", threading.get_ident())
+        with self._lock:
+            self.events.append(event)
+
+    def complete(self, name: str, category: str, start: float, end: float, **args):
+        self.record(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start,
+                "dur": end - start,
+                "args": args,
+            }
+        )
+
+    @contextmanager
+    def span(self, name: str, category: str = "startup", **args):
+        if not self.enabled:
+            yield
+            return
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.complete(name, category, start, self.now(), **args)
+
+    def begin(self, name: str, category: str = "startup") -> int:
+        """跨回调的异步区间(如后台线程启动aria2)，用end(返回值)结束"""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            self._asyncIds += 1
+            asyncId = self._asyncIds
+        self._pending[asyncId] = (name, category)
+        self.record(
+            {"name": name, "cat": category, "ph": "b", "id": asyncId, "ts": self.now()}
+        )
+        return asyncId
+
+    def end(self, asyncId: int):
+        if not self.enabled or asyncId not in self._pending:
+            return
+        name, category = self._pending.pop(asyncId)
+        self.record(
+            {"name": name, "cat": category, "ph": "e", "id": asyncId, "ts": self.now()}
+        )
+        if self.finished:
+            # 启动完成后才结束的区间(aria2可能比启动画面晚)，补写到同一个文件
+            self.save()
+
+    def instant(self, name: str, category: str = "startup"):
+        if self.enabled:
+            self.record(
+                {"name": name, "cat": category, "ph": "i", "s": "p", "ts": self.now()}
+            )
+
+    def _profiledImport(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # 只记录首次导入；已在sys.modules中的模块不产生事件
+        if level or name in sys.modules:
+            return self._originalImport(name, globals, locals, fromlist, level)
+        start = self.now()
+        try:
+            return self._originalImport(name, globals, locals, fromlist, level)
+        finally:
+            end = self.now()
+            if end - start >= self.minImportMicros:
+                self.complete(name, "import", start, end)
+
+    def finish(self):
+        """启动完成：停止记录导入并写出文件"""
+        if not self.enabled or self.finished:
+            return
+        self.finished = True
+        if self._originalImport is not None:
+            builtins.__import__ = self._originalImport
+        self.complete("MCSL2 startup", "startup", 0, self.now())
+        self.save()
+
+    def save(self):
+        threadNames = {t.ident: t.name for t in threading.enumerate()}
+        with self._lock:
+            events = list(self.events)
+        metadata = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in threadNames.items()
+        ]
+        try:
+            from MCSL2Lib import MCSL2VERSION
+        except ImportError:
+            MCSL2VERSION = ""
+        try:
+            os.makedirs(os.path.dirname(self.filePath), exist_ok=True)
+            with open(self.filePath, "w", encoding="utf-8") as f:
+                f.write(
+                    dumps(
+                        {
+                            "traceEvents": metadata + events,
+                            "displayTimeUnit": "ms",
+                            "otherData": {
+                                "version": MCSL2VERSION,
+                                "python": sys.version,
+                                "platform": platform(),
+                                "argv": sys.argv,
+                            },
+                        },
+                        ensure_ascii=False,
+                    )
+                )
+        except OSError:
+            pass
+
+
+profiler = StartupProfiler()
@@ -0,0 +1,362 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Incremental, deduplicated world backups with per-chunk region storage.
+"""
+
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from hashlib import blake2b
+from json import dumps, loads
+from os import (
+    cpu_count,
+    listdir,
+    makedirs,
+    path as osp,
+    remove,
+    replace,
+    scandir,
+    stat,
+    walk,
+)
+from shutil import copyfileobj, rmtree
+from time import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from MCSL2Lib.Controllers.regionFile import joinRegion, splitRegion
+from MCSL2Lib.utils import MCSL2Logger
+
+
+def digest(data) -> str:
+    return blake2b(data, digest_size=20).hexdigest()
+
+
+def findWorlds(serverDir: str) -> List[str]:
+    """服务器目录下含有level.dat的文件夹(world、world_nether、world_the_end等)"""
+    if not osp.isdir(serverDir):
+        return []
+    return sorted(
+        entry.name
+        for entry in scandir(serverDir)
+        if entry.is_dir() and osp.exists(osp.join(entry.path, "level.dat"))
+    )
+
+
+class BackupStore:
+    """
+    去重备份仓库\n
+    MCSL2/Backups/<服务器名>/objects 下按内容哈希保存数据块，snapshots 下每个快照一个gzip压缩的JSON清单。
+    .mca区域文件按区块保存，其他文件整体保存；相同内容只存一份，
+    大小与修改时间都没有变化的文件直接沿用上一个快照的记录，不再读取。\n
+    哈希与写入在线程池中进行，blake2b与文件读写都会释放GIL。
+    """
+
+    def __init__(self, serverName: str, root: str = osp.join("MCSL2", "Backups")):
+        self.serverName = serverName
+        self.root = osp.join(root, serverName)
+        self.objectsDir = osp.join(self.root, "objects")
+        self.snapshotsDir = osp.join(self.root, "snapshots")
+
+    def objectPath(self, key: str) -> str:
+        return osp.join(self.objectsDir, key[:2], key)
+
+    def putObject(self, data) -> Tuple[str, int]:
+        """保存一个数据块，返回(哈希, 新写入的字节数)"""
+        key = digest(data)
+        objectPath = self.objectPath(key)
+        if osp.exists(objectPath):
+            return key, 0
+        makedirs(osp.dirname(objectPath), exist_ok=True)
+        tmpPath = f"{objectPath}.{id(data)}.tmp"
+        with open(tmpPath, "wb") as f:
+            f.write(data)
+        replace(tmpPath, objectPath)
+        return key, len(data)
+
+    def readObject(self, key: str) -> bytes:
+        with open(self.objectPath(key), "rb") as f:
+            return f.read()
+
+    def snapshots(self) -> List[str]:
+        if not osp.isdir(self.snapshotsDir):
+            return []
+        return sorted(
+            name[: -len(".json.gz")]
+            for name in listdir(self.snapshotsDir)
+            if name.endswith(".json.gz")
+        )
+
+    @staticmethod
+    def newSnapshotId(existing: List[str]) -> str:
+        """按时间命名，同一秒内的多个快照追加序号"""
+        base = snapshotId = datetime.now().strftime("%Y%m%d-%H%M%S")
+        serial = 1
+        while snapshotId in existing:
+            serial += 1
+            snapshotId = f"{base}-{serial}"
+        return snapshotId
+
+    def loadManifest(self, snapshotId: str) -> dict:
+        with gzip.open(
+            osp.join(self.snapshotsDir, f"{snapshotId}.json.gz"), "rt", encoding="utf-8"
+        ) as f:
+            return loads(f.read())
+
+    def saveManifest(self, manifest: dict):
+        makedirs(self.snapshotsDir, exist_ok=True)
+        filePath = osp.join(self.snapshotsDir, f"{manifest['id']}.json.gz")
+        with gzip.open(f"{filePath}.tmp", "wt", encoding="utf-8") as f:
+            f.write(dumps(manifest, ensure_ascii=False))
+        replace(f"{filePath}.tmp", filePath)
+
+    def storeFile(self, filePath: str) -> Tuple[dict, int]:
+        """保存一个文件，返回(清单记录, 新写入的字节数)"""
+        with open(filePath, "rb") as f:
+            data = f.read()
+        if filePath.endswith(".mca"):
+            region = splitRegion(data)
+            if region is not None:
+                chunks, timestamps = region
+                keys, written = [], 0
+                for chunk in chunks:
+                    if chunk is None:
+                        keys.append(None)
+                        continue
+                    key, size = self.putObject(chunk)
+                    keys.append(key)
+                    written += size
+                return {"chunks": keys, "timestamps": timestamps}, written
+        key, written = self.putObject(data)
+        return {"hash": key}, written
+
+    def createSnapshot(self, serverDir: str, workers: int = 0) -> dict:
+        worlds = findWorlds(serverDir)
+        snapshots = self.snapshots()
+        previous = self.loadManifest(snapshots[-1])["files"] if snapshots else {}
+        files: Dict[str, dict] = {}
+        jobs = []
+        for world in worlds:
+            for dirPath, _, fileNames in walk(osp.join(serverDir, world)):
+                for fileName in fileNames:
+                    if fileName == "session.lock":
+                        continue
+                    fullPath = osp.join(dirPath, fileName)
+                    relPath = osp.relpath(fullPath, serverDir).replace("\\", "/")
+                    info = stat(fullPath)
+                    old = previous.get(relPath)
+                    if old and old["size"] == info.st_size and old["mtime"] == info.st_mtime_ns:
+                        files[relPath] = old
+                    else:
+                        jobs.append((relPath, fullPath, info))
+        written = 0
+        with ThreadPoolExecutor(max_workers=workers or min(8, cpu_count() or 1)) as pool:
+            results = pool.map(lambda job: self.storeFile(job[1]), jobs)
+            for (relPath, _, info), (entry, size) in zip(jobs, results):
+                entry.update(size=info.st_size, mtime=info.st_mtime_ns)
+                files[relPath] = entry
+                written += size
+        manifest = {
+            "id": self.newSnapshotId(snapshots),
+            "server": self.serverName,
+            "time": time(),
+            "worlds": worlds,
+            "files": files,
+            "stats": {
+                "files": len(files),
+                "changedFiles": len(jobs),
+                "writtenBytes": written,
+            },
+        }
+        self.saveManifest(manifest)
+        return manifest
+
+    def restoreSnapshot(self, snapshotId: str, serverDir: str):
+        """
+        把快照还原到服务器目录\n
+        先在world.restoring中完整重建，成功后才删除原存档并替换，中途失败不会破坏现有存档
+        """
+        manifest = self.loadManifest(snapshotId)
+        for world in manifest["worlds"]:
+            tmpDir = osp.join(serverDir, f"{world}.restoring")
+            rmtree(tmpDir, ignore_errors=True)
+            prefix = f"{world}/"
+            for relPath, entry in manifest["files"].items():
+                if not relPath.startswith(prefix):
+                    continue
+                target = osp.join(tmpDir, relPath[len(prefix) :])
+                makedirs(osp.dirname(target), exist_ok=True)
+                if "chunks" in entry:
+                    with open(target, "wb") as f:
+                        f.write(
+                            joinRegion(
+                                [self.readObject(k) if k else None for k in entry["chunks"]],
+                                entry["timestamps"],
+                            )
+                        )
+                else:
+                    with open(self.objectPath(entry["hash"]), "rb") as src:
+                        with open(target, "wb") as dst:
+                            copyfileobj(src, dst)
+            worldDir = osp.join(serverDir, world)
+            rmtree(worldDir, ignore_errors=True)
+            replace(tmpDir, worldDir)
+
+    def prune(self, keep: int) -> int:
+        """只保留最近keep个快照，删除不再被引用的数据块，返回删除的快照数"""
+        snapshots = self.snapshots()
+        if keep <= 0 or len(snapshots) <= keep:
+            return 0
+        for snapshotId in snapshots[:-keep]:
+            remove(osp.join(self.snapshotsDir, f"{snapshotId}.json.gz"))
+        referenced: Set[str] = set()
+        for snapshotId in snapshots[-keep:]:
+            for entry in self.loadManifest(snapshotId)["files"].values():
+                if "chunks" in entry:
+                    referenced.update(k for k in entry["chunks"] if k)
+                else:
+                    referenced.add(entry["hash"])
+        for dirPath, _, fileNames in walk(self.objectsDir):
+            for fileName in fileNames:
+                if fileName not in referenced:
+                    remove(osp.join(dirPath, fileName))
+        return len(snapshots) - keep
+
+
+class BackupThread(QThread):
+    """
+    在后台执行备份或还原\n
+    snapshotId为None时创建快照，否则还原该快照
+    """
+
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(
+        self,
+        store: BackupStore,
+        serverDir: str,
+        snapshotId: Optional[str] = None,
+        keep: int = 0,
+        workers: int = 0,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.setObjectName("BackupThread")
+        self.store = store
+        self.serverDir = serverDir
+        self.snapshotId = snapshotId
+        self.keep = keep
+        self.workers = workers
+
+    def run(self):
+        try:
+            if self.snapshotId is None:
+                manifest = self.store.createSnapshot(self.serverDir, self.workers)
+                self.store.prune(self.keep)
+                self.done.emit(manifest)
+            else:
+                self.store.restoreSnapshot(self.snapshotId, self.serverDir)
+                self.done.emit({"id": self.snapshotId})
+        except Exception as e:
+            MCSL2Logger.error(exc=e, msg=f"服务器{self.store.serverName}备份/还原失败")
+            self.failed.emit(str(e))
+
+
+class WorldBackup(QObject):
+    """
+    一次存档备份\n
+    服务器运行时先发送save-off与save-all flush，等到"Saved the game"(最多saveTimeout秒)后开始复制，
+    完成后再发送save-on；服务器未运行时直接备份
+    """
+
+    finished = pyqtSignal(object)  # 成功时为快照清单，失败时为None
+
+    def __init__(
+        self, runtime, saveTimeout: int = 60, keep: int = 0, workers: int = 0, parent=None
+    ):
+        super().__init__(parent)
+        self.runtime = runtime
+        self.keep = keep
+        self.workers = workers
+        self.store = BackupStore(runtime.name)
+        self.savingOff = False
+        self.thread: Optional[BackupThread] = None
+        self.manifest: Optional[dict] = None
+        self.saveTimer = QTimer(self)
+        self.saveTimer.setSingleShot(True)
+        self.saveTimer.setInterval(saveTimeout * 1000)
+        self.saveTimer.timeout.connect(self.onSaveTimeout)
+
+    def serverDir(self) -> str:
+        return osp.join("Servers", self.runtime.name)
+
+    def start(self):
+        self.runtime.outputLog("[MCSL2 | 提示]：正在备份存档...")
+        if not self.runtime.isServerRunning():
+            self.runWorker()
+            return
+        self.savingOff = True
+        self.runtime.serverLogOutput.connect(self.onOutput)
+        self.runtime.serverLogOutputBatch.connect(self.onOutputBatch)
+        self.saveTimer.start()
+        self.runtime.sendCommands(["save-off", "save-all flush"])
+
+    def onOutput(self, line: str):
+        self.onOutputBatch([line])
+
+    def onOutputBatch(self, lines: list):
+        if self.saveTimer.isActive() and any(
+            "Saved the game" in line or "Saved the world" in line for line in lines
+        ):
+            self.onSaved()
+
+    def onSaveTimeout(self):
+        self.runtime.outputLog("[MCSL2 | 警告]：等待服务器保存存档超时，仍继续备份。")
+        self.onSaved()
+
+    def onSaved(self):
+        self.saveTimer.stop()
+        self.runtime.serverLogOutput.disconnect(self.onOutput)
+        self.runtime.serverLogOutputBatch.disconnect(self.onOutputBatch)
+        self.runWorker()
+
+    def runWorker(self):
+        self.thread = BackupThread(
+            self.store, self.serverDir(), keep=self.keep, workers=self.workers, parent=self
+        )
+        self.thread.done.connect(self.onDone)
+        self.thread.failed.connect(self.onFailed)
+        # 线程真正结束后再通知，收到finished的一方可以安全地释放本对象
+        self.thread.finished.connect(lambda: self.finished.emit(self.manifest))
+        self.thread.start()
+
+    def resumeSaving(self):
+        if self.savingOff and self.runtime.isServerRunning():
+            self.runtime.sendCommand("save-on")
+        self.savingOff = False
+
+    def onDone(self, manifest: dict):
+        self.resumeSaving()
+        stats = manifest["stats"]
+        self.runtime.outputLog(
+            f"[MCSL2 | 提示]：存档已备份为快照{manifest['id']}，共{stats['files']}个文件，"
+            f"其中{stats['changedFiles']}个有变化，新增{stats['writtenBytes'] / 1048576:.1f}MB。"
+        )
+        self.manifest = manifest
+
+    def onFailed(self, message: str):
+        self.resumeSaving()
+        self.runtime.outputLog(f"[MCSL2 | 错误]：存档备份失败：{message}")
@@ -649,7 +649,7 @@ class MCSLv1(QWidget):
         self.MCSLv1ImportStatusText.setText("未选择")
         self.MCSLv1ValidateArgsMemUnitComboBox.addItems(["M", "G"])
         self.MCSLv1ValidateArgsOutputDeEncodingComboBox.addItems(
-            ["跟随全局", "UTF-8", "GB18030", "ANSI(推荐)"]
+            ["跟随全局", "UTF-8", "GB18030", "ANSI(推荐)", "自动检测"]
         )
         self.MCSLv1ValidateArgsInputDeEncodingComboBox.addItems(
             ["跟随全局", "UTF-8", "GB18030", "ANSI(推荐)"]
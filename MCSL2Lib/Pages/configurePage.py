@@ -1357,7 +1357,7 @@ class ConfigurePage(QWidget):
         self.extendedMaxMemLineEdit.setPlaceholderText("整数")
         self.extendedServerNameLineEdit.setPlaceholderText("不能包含非法字符")
         self.extendedOutputDeEncodingComboBox.addItems(
-            ["跟随全局", "UTF-8", "GB18030", "ANSI(推荐)"]
+            ["跟随全局", "UTF-8", "GB18030", "ANSI(推荐)", "自动检测"]
         )
         self.extendedOutputDeEncodingComboBox.setCurrentIndex(0)
         self.extendedInputDeEncodingComboBox.addItems(
@@ -1497,12 +1497,13 @@ class ConfigurePage(QWidget):
         )
         if selectedJavaPath != "":
             selectedJavaPath = selectedJavaPath.replace("/", "\\")
-            if v := javaDetector.getJavaVersion(selectedJavaPath):
+            if info := javaDetector.probeJavaInfo(selectedJavaPath):
+                v = info.version
                 currentJavaPaths = configureServerVariables.javaPath
                 if (
-                        java := javaDetector.Java(selectedJavaPath, v)
+                        java := javaDetector.Java(selectedJavaPath, v, info.vendor, info.arch)
                 ) not in currentJavaPaths:
-                    currentJavaPaths.append(javaDetector.Java(selectedJavaPath, v))
+                    currentJavaPaths.append(java)
                     javaDetector.sortJavaList(currentJavaPaths)
                     InfoBar.success(
                         title="已添加",
@@ -1573,6 +1574,7 @@ class ConfigurePage(QWidget):
                 title=f"Java: {java.version} 已失效",
                 content=f"位于{java.path}的{java.version}已失效",
             )
+        self.showAutoSelectedJava()
 
     @pyqtSlot(int)
     def onJavaFindWorkThreadFinished(self, sequenceNumber):
@@ -1608,6 +1610,7 @@ class ConfigurePage(QWidget):
                 duration=3000,
                 parent=self,
             )
+            self.showAutoSelectedJava()
         else:
             InfoBar.warning(
                 title="未添加",
@@ -1641,6 +1644,7 @@ class ConfigurePage(QWidget):
                 duration=3000,
                 parent=self,
             )
+            self.showAutoSelectedJava()
         else:
             InfoBar.warning(
                 title="未添加",
@@ -1656,6 +1660,10 @@ class ConfigurePage(QWidget):
 
     def checkJavaSet(self):
         """检查Java设置"""
+        if configureServerVariables.selectedJavaPath == "" and (
+                java := self.autoSelectJava()
+        ) is not None:
+            return f"Java检查: 正常（已自动选择Java {java.version}）", 0
         if configureServerVariables.selectedJavaPath != "":
             return "Java检查: 正常", 0
         else:
@@ -1837,6 +1845,51 @@ class ConfigurePage(QWidget):
     def setJavaPath(self, selectedJavaPath):
         """选择Java后处理Java路径"""
         configureServerVariables.selectedJavaPath = selectedJavaPath
+        configureServerVariables.javaAutoSelected = False
+
+    def autoSelectJava(self):
+        """
+        按服务器核心对应的Minecraft版本自动选择Java\n
+        手动选择过的Java不会被覆盖；没有找到兼容的Java时返回None
+        """
+        if (
+                configureServerVariables.selectedJavaPath
+                and not configureServerVariables.javaAutoSelected
+        ):
+            return None
+        if (
+                javaRange := javaDetector.coreJavaRange(
+                    configureServerVariables.corePath, configureServerVariables.extraData
+                )
+        ) is None:
+            return None
+        if not configureServerVariables.javaPath:
+            configureServerVariables.javaPath = javaDetector.loadJavaList()
+        mcVersion, minJava, maxJava = javaRange
+        if (
+                java := javaDetector.selectBestJava(
+                    configureServerVariables.javaPath, minJava, maxJava
+                )
+        ) is None:
+            return None
+        self.setJavaPath(java.path)
+        self.setJavaVer(java.version)
+        configureServerVariables.javaAutoSelected = True
+        MCSL2Logger.info(f"Minecraft {mcVersion}：自动选择Java {java.version}（{java.path}）")
+        return java
+
+    def showAutoSelectedJava(self):
+        """添加核心或查找Java后尝试自动选择Java，并提示结果"""
+        if (java := self.autoSelectJava()) is not None:
+            InfoBar.info(
+                title="已自动选择Java",
+                content=f"版本：{java.version}\n路径：{java.path}\n如需更换，请到Java列表中选取。",
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=3000,
+                parent=self,
+            )
 
     def setJavaVer(self, selectedJavaVer):
         """选择Java后处理Java版本"""
@@ -15,6 +15,10 @@
 Minecraft server console page.
 """
 
+from re import split as reSplit
+from time import localtime, strftime
+from typing import List
+
 from PyQt5.QtCore import QSize, Qt, pyqtSlot, pyqtSignal
 from PyQt5.QtGui import QTextCharFormat, QColor, QBrush
 from PyQt5.QtWidgets import (
@@ -41,15 +45,35 @@ from qfluentwidgets import (
     InfoBar,
     InfoBarPosition,
 )
-from re import search, sub
+from MCSL2Lib.Controllers.consoleLogClassifier import (
+    ConsoleLogClassifier,
+    LogEvent,
+    LogLevel,
+)
+from MCSL2Lib.Controllers.consoleScrollback import ConsoleSpillFile
+from MCSL2Lib.Controllers.regionAnalyzer import (
+    RegionAnalyzeThread,
+    RegionPruneThread,
+    summarize,
+)
 from MCSL2Lib.Controllers.serverController import ServerHandler, readServerProperties
+from MCSL2Lib.Controllers.serverProperties import updateServerProperties
+from MCSL2Lib.Widgets.consoleHistoryWidget import ConsoleHistoryWidget
+from MCSL2Lib.Widgets.consoleSearchWidget import ConsoleSearchWidget
 from MCSL2Lib.Widgets.playersControllerMainWidget import playersController
+from MCSL2Lib.Controllers.settingsController import SettingsController
 from MCSL2Lib.singleton import Singleton
 from MCSL2Lib.variables import ServerVariables, GlobalMCSL2Variables
-from MCSL2Lib.utils import MCSL2Logger
 
 
 serverVariables = ServerVariables()
+consoleLogClassifier = ConsoleLogClassifier()
+settingsController = SettingsController()
+
+
+def splitPlayers(text: str) -> List[str]:
+    """快捷菜单中一次可以填写多名玩家，以空格或逗号分隔"""
+    return [player for player in reSplit(r"[\s,，]+", text) if player]
 
 
 @Singleton
@@ -61,7 +85,22 @@ class ConsolePage(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
 
-        self.playersList = []
+        self.replaying = False
+        self.resourceDetail = ""
+        self.telemetryDetail = {}
+        self.lastOverloadTip = 0.0
+        self.scrollbackLimit = 0
+        self.spillFile = ConsoleSpillFile("MCSL2/Logs/ConsoleSpill/console.log")
+        self.levelFormats = {}
+        for level, color in (
+            (LogLevel.INFO, QColor(52, 185, 96)),
+            (LogLevel.WARN, QColor(196, 139, 33)),
+            (LogLevel.ERROR, QColor(214, 39, 21)),
+            (LogLevel.DEBUG, QColor(22, 122, 232)),
+        ):
+            fmt = QTextCharFormat()
+            fmt.setForeground(QBrush(color))
+            self.levelFormats[level] = fmt
         self.playersControllerBtnEnabled.emit(False)
         self.gridLayout = QGridLayout(self)
         self.gridLayout.setObjectName("gridLayout")
@@ -191,6 +230,11 @@ class ConsolePage(QWidget):
         self.titleLabel.setObjectName("titleLabel")
 
         self.gridLayout_2.addWidget(self.titleLabel, 0, 0, 1, 1)
+        self.serverSelector = ComboBox(self.titleLimitWidget)
+        self.serverSelector.setMinimumSize(QSize(160, 0))
+        self.serverSelector.setObjectName("serverSelector")
+
+        self.gridLayout_2.addWidget(self.serverSelector, 0, 1, 1, 1)
         self.gridLayout.addWidget(self.titleLimitWidget, 1, 2, 4, 2)
         self.quickMenu = CardWidget(self)
         sizePolicy = QSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
@@ -198,7 +242,7 @@ class ConsolePage(QWidget):
         sizePolicy.setVerticalStretch(0)
         sizePolicy.setHeightForWidth(self.quickMenu.sizePolicy().hasHeightForWidth())
         self.quickMenu.setSizePolicy(sizePolicy)
-        self.quickMenu.setMinimumSize(QSize(100, 340))
+        self.quickMenu.setMinimumSize(QSize(100, 420))
         self.quickMenu.setMaximumSize(QSize(130, 16777215))
         self.quickMenu.setObjectName("quickMenu")
 
@@ -244,6 +288,16 @@ class ConsolePage(QWidget):
         self.saveServer.setObjectName("saveServer")
 
         self.verticalLayout.addWidget(self.saveServer)
+        self.backupServer = TransparentPushButton(self.quickMenu)
+        self.backupServer.setMinimumSize(QSize(0, 30))
+        self.backupServer.setObjectName("backupServer")
+
+        self.verticalLayout.addWidget(self.backupServer)
+        self.analyzeRegions = TransparentPushButton(self.quickMenu)
+        self.analyzeRegions.setMinimumSize(QSize(0, 30))
+        self.analyzeRegions.setObjectName("analyzeRegions")
+
+        self.verticalLayout.addWidget(self.analyzeRegions)
         self.exitServer = TransparentPushButton(self.quickMenu)
         self.exitServer.setMinimumSize(QSize(0, 30))
         self.exitServer.setObjectName("exitServer")
@@ -254,6 +308,16 @@ class ConsolePage(QWidget):
         self.killServer.setObjectName("killServer")
 
         self.verticalLayout.addWidget(self.killServer)
+        self.consoleHistory = TransparentPushButton(self.quickMenu)
+        self.consoleHistory.setMinimumSize(QSize(0, 30))
+        self.consoleHistory.setObjectName("consoleHistory")
+
+        self.verticalLayout.addWidget(self.consoleHistory)
+        self.searchLogs = TransparentPushButton(self.quickMenu)
+        self.searchLogs.setMinimumSize(QSize(0, 30))
+        self.searchLogs.setObjectName("searchLogs")
+
+        self.verticalLayout.addWidget(self.searchLogs)
         self.gridLayout.addWidget(self.quickMenu, 3, 4, 1, 1)
 
         self.setObjectName("ConsoleInterface")
@@ -270,8 +334,12 @@ class ConsolePage(QWidget):
         self.kickPlayers.setText("踢人")
         self.banPlayers.setText("封禁/解封")
         self.saveServer.setText("保存存档")
+        self.backupServer.setText("备份存档")
+        self.analyzeRegions.setText("存档分析")
         self.exitServer.setText("关闭服务器")
         self.killServer.setText("强制关闭")
+        self.consoleHistory.setText("历史日志")
+        self.searchLogs.setText("搜索日志")
         self.commandLineEdit.setPlaceholderText("在此输入指令，回车或点击右边按钮发送，不需要加/")
         self.serverOutput.setPlaceholderText("请先开启服务器！不开服务器没有日志的喂")
         self.sendCommandButton.setEnabled(False)
@@ -299,7 +367,11 @@ class ConsolePage(QWidget):
         self.kickPlayers.clicked.connect(self.initQuickMenu_Kick)
         self.banPlayers.clicked.connect(self.initQuickMenu_BanOrPardon)
         self.saveServer.clicked.connect(lambda: self.sendCommand("save-all"))
+        self.backupServer.clicked.connect(self.runQuickMenu_Backup)
+        self.analyzeRegions.clicked.connect(self.runQuickMenu_AnalyzeRegions)
         self.killServer.clicked.connect(self.runQuickMenu_KillServer)
+        self.consoleHistory.clicked.connect(self.showConsoleHistory)
+        self.searchLogs.clicked.connect(self.showConsoleSearch)
         intellisense = QCompleter(
             GlobalMCSL2Variables.MinecraftBuiltInCommand, self.commandLineEdit
         )
@@ -308,247 +380,256 @@ class ConsolePage(QWidget):
         self.commandLineEdit.setClearButtonEnabled(True)
         self.serverMemProgressRing.setTextVisible(True)
         self.serverCPUProgressRing.setTextVisible(True)
+        self.serverSelector.setPlaceholderText("未运行服务器")
+        self.serverSelector.currentTextChanged.connect(self.onServerSelectorChanged)
+
+    def refreshServerSelector(self):
+        """按运行时注册表刷新服务器选择框"""
+        self.serverSelector.blockSignals(True)
+        self.serverSelector.clear()
+        names = list(ServerHandler().runtimes)
+        self.serverSelector.addItems(names)
+        current = ServerHandler().currentServerName
+        if current in names:
+            self.serverSelector.setCurrentIndex(names.index(current))
+        self.serverSelector.blockSignals(False)
+
+    def onServerSelectorChanged(self, name: str):
+        if name:
+            ServerHandler().setCurrentServer(name)
+
+    @pyqtSlot(str)
+    def switchServer(self, name: str):
+        """
+        切换到另一个服务器的终端\n
+        重放该服务器最近的输出，重放期间不弹出提示
+        """
+        self.refreshServerSelector()
+        self.clearConsole()
+        self.resourceDetail = ""
+        self.telemetryDetail.clear()
+        self.updateResourceToolTip()
+        runtime = ServerHandler().getRuntime(name)
+        if runtime is None:
+            return
+        if not runtime.isServerRunning():
+            self.setMemView(0.0)
+            self.setCPUView(0.0)
+        self.replaying = True
+        self.serverOutput.setUpdatesEnabled(False)
+        try:
+            for serverOutput in runtime.recentLines:
+                self.colorConsoleText(serverOutput)
+        finally:
+            self.serverOutput.setUpdatesEnabled(True)
+            self.replaying = False
+        self.resourceDetail = ""
+        self.telemetryDetail = {}
+        self.lastOverloadTip = 0.0
+
+    def appendConsoleText(self, text: str):
+        """向终端追加文本，启用回滚上限时同时写入溢出文件"""
+        self.serverOutput.appendPlainText(text)
+        if self.scrollbackLimit:
+            self.spillFile.append(text)
+
+    def clearConsole(self):
+        """
+        清空终端，并按设置重新应用回滚上限\n
+        所有清空终端的地方(切换服务器、关闭服务器后清空等)都经过这里，溢出文件的行数随之清零
+        """
+        self.serverOutput.setPlainText("")
+        self.scrollbackLimit = max(
+            0, int(settingsController.fileSettings["consoleMaxBlockCount"])
+        )
+        self.serverOutput.setMaximumBlockCount(self.scrollbackLimit)
+        if self.scrollbackLimit:
+            self.spillFile.reset(
+                f"MCSL2/Logs/ConsoleSpill/{ServerHandler().currentServerName or 'console'}.log"
+            )
+        else:
+            self.spillFile.close()
+
+    def evictedLineCount(self) -> int:
+        """已被挤出终端、只能从溢出文件读回的行数"""
+        if not self.scrollbackLimit:
+            return 0
+        return max(0, self.spillFile.count - self.scrollbackLimit)
+
+    def showConsoleHistory(self):
+        """快捷菜单-查看已移出终端的历史日志"""
+        evicted = self.evictedLineCount()
+        if not evicted:
+            w = MessageBox(
+                title="历史日志",
+                content="终端里已经是全部日志了，没有被移出的历史日志。",
+                parent=self,
+            )
+            w.yesButton.setText("好")
+            w.cancelButton.deleteLater()
+            w.exec()
+            return
+        historyWidget = ConsoleHistoryWidget(self.spillFile, evicted)
+        w = MessageBox("历史日志", "超出终端显示上限的日志已转存到磁盘，可在此翻页查看。", self)
+        w.yesButton.setText("关闭")
+        w.cancelButton.deleteLater()
+        w.textLayout.addWidget(historyWidget.consoleHistoryMainWidget)
+        w.exec()
+
+    def showConsoleSearch(self):
+        """快捷菜单-搜索当前服务器的终端日志归档"""
+        serverName = ServerHandler().currentServerName
+        if not serverName:
+            w = MessageBox(
+                title="搜索日志",
+                content="请先选择一个服务器。",
+                parent=self,
+            )
+            w.yesButton.setText("好")
+            w.cancelButton.deleteLater()
+            w.exec()
+            return
+        searchWidget = ConsoleSearchWidget(serverName)
+        w = MessageBox("搜索日志", "按等级、时间段与关键字搜索服务器的终端日志归档。", self)
+        w.yesButton.setText("关闭")
+        w.cancelButton.deleteLater()
+        w.textLayout.addWidget(searchWidget.consoleSearchMainWidget)
+        w.exec()
 
     @pyqtSlot(float)
     def setMemView(self, mem):
-        self.serverMemLabel.setText(f"内存：{round(mem, 2)}{serverVariables.memUnit}")
-        self.serverMemProgressRing.setValue(
-            int(int(mem) / serverVariables.maxMem * 100)
-        )
+        variables = ServerHandler().currentVariables
+        self.serverMemLabel.setText(f"内存：{round(mem, 2)}{variables.memUnit}")
+        self.serverMemProgressRing.setValue(int(int(mem) / variables.maxMem * 100))
 
     @pyqtSlot(float)
     def setCPUView(self, cpuPercent):
         self.serverCPUProgressRing.setValue(int(cpuPercent))
 
+    @pyqtSlot(object)
+    def setResourceDetailView(self, sample):
+        """在资源卡片的提示中显示整棵进程树的统计"""
+        detail = (
+            f"进程数：{sample.processes}\n"
+            f"线程数：{sample.threads}\n"
+            f"文件句柄：{sample.handles}\n"
+            f"磁盘读取：{sample.readRate / 1048576:.2f}MB/s\n"
+            f"磁盘写入：{sample.writeRate / 1048576:.2f}MB/s"
+        )
+        self.resourceDetail = detail
+        self.updateResourceToolTip()
+
+    def updateResourceToolTip(self):
+        detail = "\n".join([self.resourceDetail, *self.telemetryDetail.values()]).strip()
+        self.serverCPUCardWidget.setToolTip(detail)
+        self.serverMemCardWidget.setToolTip(detail)
+
+    @pyqtSlot(object)
+    def onTelemetryEvent(self, event):
+        """显示性能遥测；服务器过载时提示(30秒内最多一次)"""
+        if event.kind == "startup":
+            self.telemetryDetail["startup"] = f"启动耗时：{event.values[0]:.1f}s(服务端) / {event.values[1]:.1f}s(实际)"
+        elif event.kind == "tps":
+            self.telemetryDetail["tps"] = "TPS(1m/5m/15m)：" + " / ".join(
+                f"{v:.2f}" for v in event.values
+            )
+        elif event.kind == "mspt":
+            self.telemetryDetail["mspt"] = "MSPT(平均/最低/最高)：" + " / ".join(
+                f"{v:.1f}" for v in event.values
+            )
+        elif event.kind in ("pregen", "pregenDone"):
+            self.telemetryDetail["pregen"] = (
+                f"区块预生成：{event.values[1]:.2f}%，{event.values[2]:.1f}区块/秒"
+                if event.kind == "pregen"
+                else "区块预生成：已完成"
+            )
+        elif event.kind == "overload":
+            self.telemetryDetail["overload"] = (
+                f"最近过载：{strftime('%H:%M:%S', localtime(event.time))}，落后{event.values[0]:.0f}ms({event.values[1]:.0f}刻)"
+            )
+            if event.time - self.lastOverloadTip > 30:
+                self.lastOverloadTip = event.time
+                InfoBar.warning(
+                    title="服务器过载",
+                    content=f"服务器落后{event.values[0]:.0f}ms({event.values[1]:.0f}刻)，可能出现卡顿。",
+                    orient=Qt.Horizontal,
+                    isClosable=True,
+                    position=InfoBarPosition.TOP,
+                    duration=3000,
+                    parent=self,
+                )
+        self.updateResourceToolTip()
+
     @pyqtSlot(str)
     def colorConsoleText(self, serverOutput):
-        fmt = QTextCharFormat()
-        greenText = ["INFO", "Info", "info", "tip", "tips", "hint", "提示"]
-        orangeText = [
-            "WARN",
-            "Warning",
-            "warn",
-            "alert",
-            "ALERT",
-            "Alert",
-            "CAUTION",
-            "Caution",
-            "警告",
-        ]
-        redText = [
-            "ERR",
-            "Err",
-            "Fatal",
-            "FATAL",
-            "Critical",
-            "Danger",
-            "DANGER",
-            "错",
-            "at java",
-            "at net",
-            "at oolloo",
-            "Caused by",
-            "at sun",
-        ]
-        blueText = [
-            "DEBUG",
-            "Debug",
-            "debug",
-            "调试",
-            "TEST",
-            "Test",
-            "Unknown command",
-            "MCSL2",
-        ]
-        color = [
-            QColor(52, 185, 96),
-            QColor(196, 139, 33),
-            QColor(214, 39, 21),
-            QColor(22, 122, 232),
-        ]
-        for keyword in greenText:
-            if keyword in serverOutput:
-                fmt.setForeground(QBrush(color[0]))
-        for keyword in orangeText:
-            if keyword in serverOutput:
-                fmt.setForeground(QBrush(color[1]))
-        for keyword in redText:
-            if keyword in serverOutput:
-                fmt.setForeground(QBrush(color[2]))
-        for keyword in blueText:
-            if keyword in serverOutput:
-                fmt.setForeground(QBrush(color[3]))
-        self.serverOutput.mergeCurrentCharFormat(fmt)
-        serverOutput = (
-            serverOutput
-            .replace("[38;2;170;170;170m", "")
-            .replace("[38;2;255;170;0m", "")
-            .replace("[38;2;255;255;255m", "")
-            .replace("[0m", "")
-            .replace("[38;2;255;255;85m", "")
-            .replace("[38;2;255;255;255m", "")
-            .replace("[3m", "")
-            .replace("[m[", "[")
-            .replace("[32m", "")
-            .replace("Preparing spawn area", "准备生成点区域中")
-            .replace("main/INFO", "主类/信息")
-            .replace("main/WARN", "主类/警告")
-            .replace("main/ERROR", "主类/错误")
-            .replace("main/FATAL", "主类/致命错误")
-            .replace("main/DEBUG", "主类/调试信息")
-            .replace("INFO", "信息")
-            .replace("WARN", "警告")
-            .replace("ERROR", "错误")
-            .replace("FATAL", "致命错误")
-            .replace("DEBUG", "调试信息")
-            .replace("Server thread", "服务器线程")
-            .replace("Server-Worker", "服务器工作进程")
-            .replace("DEBUG", "调试信息")
-            .replace("Forge Version Check", "Forge版本检查")
-            .replace("ModLauncher running: args", "ModLauncher运行中: 参数")
-            .replace("All chunks are saved", "所有区块已保存")
-            .replace("Saving the game (this may take a moment!)", "保存游戏存档中（可能需要一些时间）")
-            .replace("Saved the game", "已保存游戏存档")
-        )
-        if (
-            "Disabling terminal, you're running in an unsupported environment."
-            in serverOutput
-        ):
+        line = consoleLogClassifier.classify(serverOutput)
+        if line.level:
+            self.serverOutput.mergeCurrentCharFormat(self.levelFormats[line.level])
+        if line.events & LogEvent.HIDDEN:
             return
-        if (
-            "Advanced terminal features are not available in this environment"
-            in serverOutput
-        ):
-            return
-        if (
-            "Unable to instantiate org.fusesource.jansi.WindowsAnsiOutputStream"
-            in serverOutput
-        ):
-            return
-        if "Loading libraries, please wait..." in serverOutput:
-            self.playersList.clear()
+        serverOutput = line.text
+        if line.events & LogEvent.STARTING:
             serverOutput = "[MCSL2 | 提示]：服务器正在启动，请稍后...\n" + serverOutput
-            InfoBar.info(
-                title="提示",
-                content="服务器正在启动，请稍后...",
-                orient=Qt.Horizontal,
-                isClosable=False,
-                position=InfoBarPosition.TOP,
-                duration=2222,
-                parent=self,
-            )
-        self.serverOutput.appendPlainText(serverOutput)
-        self.serverOutput.setReadOnly(True)
-        self.serverOutput.setReadOnly(True)
-        self.serverOutput.setReadOnly(True)
-        self.serverOutput.setReadOnly(True)
-        self.serverOutput.setReadOnly(True)
-        self.serverOutput.setReadOnly(True)
-        self.serverOutput.setReadOnly(True)
-        self.serverOutput.setReadOnly(True)
-        if search(r"(?=.*Done)(?=.*!)", serverOutput):
-            fmt.setForeground(QBrush(color[3]))
-            self.serverOutput.mergeCurrentCharFormat(fmt)
-            self.serverOutput.appendPlainText(
+            if not self.replaying:
+                InfoBar.info(
+                    title="提示",
+                    content="服务器正在启动，请稍后...",
+                    orient=Qt.Horizontal,
+                    isClosable=False,
+                    position=InfoBarPosition.TOP,
+                    duration=2222,
+                    parent=self,
+                )
+        self.appendConsoleText(serverOutput)
+        if line.events & LogEvent.DONE:
+            self.serverOutput.mergeCurrentCharFormat(self.levelFormats[LogLevel.DEBUG])
+            self.appendConsoleText(
                 "[MCSL2 | 提示]：服务器启动完毕！\n[MCSL2 | 提示]：如果本机开服，IP 地址为127.0.0.1。\n[MCSL2 | 提示]：如果外网开服或使用了内网穿透等服务，连接地址为你的相关服务地址。"
             )
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            InfoBar.success(
-                title="提示",
-                content="服务器启动完毕！\n如果本机开服，IP 地址为127.0.0.1。\n如果外网开服或使用了内网穿透等服务，连接地址为你的相关服务地址。",
-                orient=Qt.Horizontal,
-                isClosable=False,
-                position=InfoBarPosition.TOP,
-                duration=5000,
-                parent=self,
-            )
-            readServerProperties()
+            if not self.replaying:
+                InfoBar.success(
+                    title="提示",
+                    content="服务器启动完毕！\n如果本机开服，IP 地址为127.0.0.1。\n如果外网开服或使用了内网穿透等服务，连接地址为你的相关服务地址。",
+                    orient=Qt.Horizontal,
+                    isClosable=False,
+                    position=InfoBarPosition.TOP,
+                    duration=5000,
+                    parent=self,
+                )
+            readServerProperties(ServerHandler().currentServerName)
             self.initQuickMenu_Difficulty()
-        if "�" in serverOutput:
-            fmt.setForeground(QBrush(color[1]))
-            self.serverOutput.mergeCurrentCharFormat(fmt)
-            self.serverOutput.appendPlainText(
+        if line.events & LogEvent.MOJIBAKE:
+            self.serverOutput.mergeCurrentCharFormat(self.levelFormats[LogLevel.WARN])
+            self.appendConsoleText(
                 "[MCSL2 | 警告]：服务器疑似输出非法字符，也有可能是无法被当前编码解析的字符。请尝试更换编码。"
             )
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            self.serverOutput.setReadOnly(True)
-            InfoBar.warning(
-                title="警告",
-                content="服务器疑似输出非法字符，也有可能是无法被当前编码解析的字符。\n请尝试更换编码。",
-                orient=Qt.Horizontal,
-                isClosable=False,
-                position=InfoBarPosition.TOP,
-                duration=2222,
-                parent=self,
-            )
-        if (
-            "logged in with entity id" in serverOutput
-            or " left the game" in serverOutput
-        ):
-            self.recordPlayers(serverOutput)
-
-    def recordPlayers(self, serverOutput: str):
-        if "logged in with entity id" in serverOutput:
-            try:
-                self.playersList.append(
-                    str(str(serverOutput).split("INFO]: ")[1].split("[/")[0])
-                )
-                return
-            except Exception:
-                pass
-
-            try:  # 若不成功，尝试提取玩家名字
-                # [11:49:05] [Server thread/INFO] [minecraft/PlayerList]: Ares_Connor[/127.0.0.1:63854] logged in with entity id 229 at (7.258252218995321, 65.0, 11.09627995098097)
-                # 提取玩家名字
-                name = serverOutput
-                name = name.split("]: ")[1].split("[/")[0]
-                self.playersList.append(name)
-            except Exception as e:
-                MCSL2Logger.error(
-                    f"extract player name failed",
-                    "onRecordPlayers::login {serverOutput}",
-                    exc=e,
-                )
-
-        elif " left the game" in serverOutput:
-            try:
-                self.playersList.pop(
-                    self.playersList.index(
-                        str(
-                            str(serverOutput)
-                            .split("INFO]: ")[1]
-                            .split(" left the game")[0]
-                        )
-                    )
+            if not self.replaying:
+                InfoBar.warning(
+                    title="警告",
+                    content="服务器疑似输出非法字符，也有可能是无法被当前编码解析的字符。\n请尝试更换编码。",
+                    orient=Qt.Horizontal,
+                    isClosable=False,
+                    position=InfoBarPosition.TOP,
+                    duration=2222,
+                    parent=self,
                 )
-                return
-            except Exception:
-                pass
 
-            try:  # 若不成功，尝试提取玩家名字
-                # [11:53:52] [Server thread/INFO] [minecraft/DedicatedServer]: Ares_Connor left the game
-                name = serverOutput
-                name = name.split("]: ")[1].split(" left the game")[0].strip()
-                self.playersList.pop(self.playersList.index(name))
-            except Exception as e:
-                MCSL2Logger.error(
-                    f"extract player name failed",
-                    "onRecordPlayers::logout {serverOutput}",
-                    exc=e,
-                )
+    @pyqtSlot(list)
+    def colorConsoleTextBatch(self, serverOutputs: list):
+        """批量模式下处理一帧日志，期间暂停重绘"""
+        self.serverOutput.setUpdatesEnabled(False)
+        try:
+            for serverOutput in serverOutputs:
+                self.colorConsoleText(serverOutput)
+        finally:
+            self.serverOutput.setUpdatesEnabled(True)
+
+    @pyqtSlot(int)
+    def onServerLogOverflow(self, dropped: int):
+        self.serverOutput.mergeCurrentCharFormat(self.levelFormats[LogLevel.WARN])
+        self.appendConsoleText(
+            f"[MCSL2 | 警告]：服务器输出过快，已丢弃{dropped}行日志。完整日志请查看服务器logs文件夹。"
+        )
 
     def showServerNotOpenMsg(self):
         """弹出服务器未开启提示"""
@@ -587,14 +668,11 @@ class ConsolePage(QWidget):
             self.playersControllerBtnEnabled.emit(False)
 
     def getKnownServerPlayers(self) -> str:
-        players = "无玩家加入"
-        if len(self.playersList):
-            players = ""
-            for player in self.playersList:
-                players += f"{player}\n"
-        else:
-            pass
-        return players
+        """在线玩家(按名字排序)，由当前服务器的PlayerSessionTracker维护"""
+        runtime = ServerHandler().current
+        if runtime is None or not len(runtime.players):
+            return "无玩家加入"
+        return "".join(f"{player}\n" for player in runtime.players.sortedNames())
 
     def initQuickMenu_Difficulty(self):
         """快捷菜单-服务器游戏难度"""
@@ -619,9 +697,15 @@ class ConsolePage(QWidget):
 
     def runQuickMenu_Difficulty(self):
         textDiffiultyList = ["peaceful", "easy", "normal", "hard"]
-        self.sendCommand(
-            f"difficulty {textDiffiultyList[self.difficulty.currentIndex()]}"
-        )
+        difficulty = textDiffiultyList[self.difficulty.currentIndex()]
+        self.sendCommand(f"difficulty {difficulty}")
+        # 同时写入server.properties，重启后不会被改回去
+        try:
+            updateServerProperties(
+                ServerHandler().currentServerName, {"difficulty": difficulty}
+            )
+        except OSError:
+            pass
 
     def initQuickMenu_GameMode(self):
         """快捷菜单-游戏模式"""
@@ -650,8 +734,8 @@ class ConsolePage(QWidget):
 
     def runQuickMenu_GameMode(self, gamemode: int, player: str):
         gameModeList = ["survival", "creative", "adventure", "spectator"]
-        ServerHandler().sendCommand(
-            command=f"gamemode {gameModeList[gamemode]} {player}"
+        ServerHandler().sendCommands(
+            [f"gamemode {gameModeList[gamemode]} {p}" for p in splitPlayers(player)]
         )
 
     def initQuickMenu_WhiteList(self):
@@ -687,7 +771,9 @@ class ConsolePage(QWidget):
 
     def runQuickMenu_WhiteList(self, mode: int, player: str):
         whiteListMode = ["add", "remove"]
-        ServerHandler().sendCommand(command=f"whitelist {whiteListMode[mode]} {player}")
+        ServerHandler().sendCommands(
+            [f"whitelist {whiteListMode[mode]} {p}" for p in splitPlayers(player)]
+        )
 
     def initQuickMenu_Operator(self):
         """快捷菜单-服务器管理员"""
@@ -715,7 +801,9 @@ class ConsolePage(QWidget):
 
     def runQuickMenu_Operator(self, mode: int, player: str):
         commandPrefixList = ["op", "deop"]
-        ServerHandler().sendCommand(command=f"{commandPrefixList[mode]} {player}")
+        ServerHandler().sendCommands(
+            [f"{commandPrefixList[mode]} {p}" for p in splitPlayers(player)]
+        )
 
     def initQuickMenu_Kick(self):
         """快捷菜单-踢人"""
@@ -739,7 +827,7 @@ class ConsolePage(QWidget):
             self.showServerNotOpenMsg()
 
     def runQuickMenu_Kick(self, player: str):
-        ServerHandler().sendCommand(command=f"kick {player}")
+        ServerHandler().sendCommands([f"kick {p}" for p in splitPlayers(player)])
 
     def initQuickMenu_BanOrPardon(self):
         """快捷菜单-封禁或解禁玩家"""
@@ -768,10 +856,120 @@ class ConsolePage(QWidget):
 
     def runQuickMenu_BanOrPardon(self, mode: int, player: str):
         commandPrefixList = ["ban", "pardon"]
-        ServerHandler().sendCommand(command=f"{commandPrefixList[mode]} {player}")
+        ServerHandler().sendCommands(
+            [f"{commandPrefixList[mode]} {p}" for p in splitPlayers(player)]
+        )
+
+    def runQuickMenu_Backup(self):
+        """快捷菜单-增量备份存档"""
+        runtime = ServerHandler().current
+        if runtime is None or not runtime.isServerRunning():
+            self.showServerNotOpenMsg()
+        elif not runtime.backupWorld():
+            InfoBar.warning(
+                title="请稍候",
+                content="上一次备份或还原仍在进行中。",
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=2222,
+                parent=self,
+            )
+
+    def runQuickMenu_AnalyzeRegions(self):
+        """快捷菜单-区域文件分析与区块清理"""
+        serverName = ServerHandler().currentServerName
+        if not serverName:
+            self.showServerNotOpenMsg()
+            return
+        self.analyzeRegions.setEnabled(False)
+        self.regionAnalyzeThread = RegionAnalyzeThread(f"Servers//{serverName}", self)
+        self.regionAnalyzeThread.done.connect(
+            lambda regions: self.showRegionReport(serverName, regions)
+        )
+        self.regionAnalyzeThread.finished.connect(
+            lambda: self.analyzeRegions.setEnabled(True)
+        )
+        self.regionAnalyzeThread.start()
+
+    def showRegionReport(self, serverName: str, regions: list):
+        if not regions:
+            w = MessageBox("存档分析", f"服务器{serverName}没有找到区域文件。", self)
+            w.yesButton.setText("好")
+            w.cancelButton.deleteLater()
+            w.exec()
+            return
+        content = "".join(
+            f"{dimension}：{s['regions']}个区域文件，{s['chunks']}个区块，"
+            f"{s['fileSize'] / 1048576:.1f}MB，可整理{s['wastedBytes'] / 1048576:.1f}MB\n"
+            for dimension, s in summarize(regions).items()
+        )
+        content += "\n最大的区域文件：\n" + "".join(
+            f"{r.dimension} r.{r.x}.{r.z}.mca  {r.fileSize / 1048576:.1f}MB，{r.chunks}个区块，"
+            f"最后修改于{strftime('%Y-%m-%d %H:%M', localtime(r.lastModified))}\n"
+            for r in sorted(regions, key=lambda r: r.fileSize, reverse=True)[:5]
+        )
+        minInhabitedTime = settingsController.fileSettings["regionPruneMinInhabitedTime"]
+        canPrune = not ServerHandler().isServerActive(serverName)
+        if canPrune:
+            content += (
+                f"\n可以删除玩家停留时间(InhabitedTime)少于{minInhabitedTime}刻"
+                f"(约{minInhabitedTime / 20:.0f}秒)的区块，它们会在下次被访问时重新生成。"
+                f"清理前请先备份存档。"
+            )
+        else:
+            content += "\n服务器运行中，关闭服务器后才能清理区块。"
+        w = MessageBox("存档分析", content, self)
+        if canPrune:
+            w.yesButton.setText("清理区块")
+            w.cancelButton.setText("关闭")
+            w.yesSignal.connect(
+                lambda: self.pruneRegions(
+                    serverName, [r.path for r in regions], minInhabitedTime
+                )
+            )
+        else:
+            w.yesButton.setText("好")
+            w.cancelButton.deleteLater()
+        w.exec()
+
+    def pruneRegions(self, serverName: str, paths: list, minInhabitedTime: int):
+        if ServerHandler().isServerActive(serverName):
+            self.showServerNotOpenMsg()
+            return
+        self.analyzeRegions.setEnabled(False)
+        self.regionPruneThread = RegionPruneThread(
+            serverName, paths, minInhabitedTime, self
+        )
+        self.regionPruneThread.done.connect(
+            lambda result: InfoBar.success(
+                title="清理完成",
+                content=f"已删除{result[0]}个区块，释放{result[1] / 1048576:.1f}MB。",
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=5000,
+                parent=self,
+            )
+        )
+        self.regionPruneThread.failed.connect(
+            lambda message: InfoBar.error(
+                title="清理失败",
+                content=message,
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=5000,
+                parent=self,
+            )
+        )
+        self.regionPruneThread.finished.connect(
+            lambda: self.analyzeRegions.setEnabled(True)
+        )
+        self.regionPruneThread.start()
 
     def runQuickMenu_StopServer(self):
-        if ServerHandler().isServerRunning():
+        if ServerHandler().isServerActive():
             box = MessageBox("正常关闭服务器", "你确定要关闭服务器吗？", self)
             box.yesSignal.connect(ServerHandler().stopServer)
             box.exec()
@@ -780,7 +978,7 @@ class ConsolePage(QWidget):
 
     def runQuickMenu_KillServer(self):
         """快捷菜单-强制关闭服务器"""
-        if ServerHandler().isServerRunning():
+        if ServerHandler().isServerActive():
             w = MessageBox("强制关闭服务器", "确定要强制关闭服务器吗？\n有可能导致数据丢失！\n请确保存档已经保存！", self)
             w.yesButton.setText("算了")
             w.cancelButton.setText("强制关闭")
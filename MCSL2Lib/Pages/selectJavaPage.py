@@ -132,6 +132,9 @@ class SelectJavaPage(QWidget):
             self.tmpSingleJavaWidget.finishSelectJavaBtn.clicked.connect(self.backBtn.click)
             self.tmpSingleJavaWidget.javaPath.setText(str(JavaPath[i].path))
             self.tmpSingleJavaWidget.javaVer.setText(str(JavaPath[i].version))
+            self.tmpSingleJavaWidget.javaVer.setToolTip(
+                " ".join(filter(None, (JavaPath[i].vendor, JavaPath[i].arch)))
+            )
             self.tmpSingleJavaWidget.javaVer.setReadOnly(True)
             self.tmpSingleJavaWidget.javaVer.setReadOnly(True)
             self.tmpSingleJavaWidget.javaVer.setReadOnly(True)
@@ -14,7 +14,7 @@
 Manage exists Minecraft servers.
 """
 
-from json import dump, loads, dumps
+from json import loads, dumps
 from os import getcwd, rename, path as osp, remove
 from shutil import copy, rmtree
 
@@ -52,8 +52,16 @@ from qfluentwidgets import (
 )
 
 from MCSL2Lib.Controllers import javaDetector
+from MCSL2Lib.Controllers.encodingDetector import settingEncoding
 from MCSL2Lib.Controllers.serverController import ServerHelper
 from MCSL2Lib.Controllers.serverInstaller import ForgeInstaller
+from MCSL2Lib.Controllers.serverProperties import (
+    PropertiesFile,
+    escape,
+    loadServerProperties,
+    serverPropertiesPath,
+    updateServerProperties,
+)
 from MCSL2Lib.Controllers.settingsController import SettingsController
 from MCSL2Lib.Resources.icons import *
 from MCSL2Lib.Widgets.myScrollArea import MySmoothScrollArea  # noqa: F401
@@ -473,6 +481,35 @@ class ServerManagerPage(QWidget):
 
         self.gridLayout_10.addWidget(self.JVMArgPlainTextEdit, 1, 0, 1, 1)
         self.editNewServerScrollAreaVerticalLayout_2.addWidget(self.editSetJVMArgWidget)
+        self.editSetPropertiesWidget = QWidget(self.editServerScrollAreaContents)
+        self.editSetPropertiesWidget.setObjectName("editSetPropertiesWidget")
+
+        self.gridLayout_11 = QGridLayout(self.editSetPropertiesWidget)
+        self.gridLayout_11.setObjectName("gridLayout_11")
+
+        self.editPropertiesSubtitleLabel = SubtitleLabel(self.editSetPropertiesWidget)
+        sizePolicy = QSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(
+            self.editPropertiesSubtitleLabel.sizePolicy().hasHeightForWidth()
+        )
+        self.editPropertiesSubtitleLabel.setSizePolicy(sizePolicy)
+        self.editPropertiesSubtitleLabel.setObjectName("editPropertiesSubtitleLabel")
+
+        self.gridLayout_11.addWidget(self.editPropertiesSubtitleLabel, 0, 0, 1, 1)
+        self.editSavePropertiesPushBtn = PushButton(self.editSetPropertiesWidget)
+        self.editSavePropertiesPushBtn.setObjectName("editSavePropertiesPushBtn")
+
+        self.gridLayout_11.addWidget(self.editSavePropertiesPushBtn, 0, 1, 1, 1)
+        self.editPropertiesPlainTextEdit = PlainTextEdit(self.editSetPropertiesWidget)
+        self.editPropertiesPlainTextEdit.setMinimumSize(QSize(0, 200))
+        self.editPropertiesPlainTextEdit.setObjectName("editPropertiesPlainTextEdit")
+
+        self.gridLayout_11.addWidget(self.editPropertiesPlainTextEdit, 1, 0, 1, 2)
+        self.editNewServerScrollAreaVerticalLayout_2.addWidget(
+            self.editSetPropertiesWidget
+        )
         self.editSetServerIconWidget = QWidget(self.editServerScrollAreaContents)
         self.editSetServerIconWidget.setObjectName("editSetServerIconWidget")
 
@@ -619,6 +656,11 @@ class ServerManagerPage(QWidget):
         self.editInputDeEncodingLabel.setText("指令输入编码（优先级高于全局设置）")
         self.editJVMArgSubtitleLabel.setText("JVM参数：")
         self.JVMArgPlainTextEdit.setPlaceholderText("可选，用一个空格分组")
+        self.editPropertiesSubtitleLabel.setText("server.properties：")
+        self.editSavePropertiesPushBtn.setText("保存server.properties")
+        self.editPropertiesPlainTextEdit.setPlaceholderText(
+            "每行一项，形如 键=值。服务器首次启动后才会生成该文件"
+        )
         self.editServerIconSubtitleLabel.setText("服务器图标：")
         self.tipLabel.setText("提示：此处设置的是服务器在MCSL2中显示的图标，不能代表服务器MOTD的图标。")
         self.editServerNameSubtitleLabel.setText("服务器名称：")
@@ -634,7 +676,7 @@ class ServerManagerPage(QWidget):
         self.editServerNameLineEdit.setPlaceholderText("不能包含非法字符")
         self.JVMArgPlainTextEdit.setPlaceholderText("可选，用一个空格分组")
         self.editOutputDeEncodingComboBox.addItems(
-            ["跟随全局", "UTF-8", "GB18030", "ANSI(推荐)"]
+            ["跟随全局", "UTF-8", "GB18030", "ANSI(推荐)", "自动检测"]
         )
         self.editInputDeEncodingComboBox.addItems(
             ["跟随全局", "UTF-8", "GB18030", "ANSI(推荐)"]
@@ -644,6 +686,7 @@ class ServerManagerPage(QWidget):
         self.editManuallyAddJavaPrimaryPushBtn.clicked.connect(self.replaceJavaManually)
         self.editAutoDetectJavaPrimaryPushBtn.clicked.connect(self.autoDetectJava)
         self.editSaveServerPrimaryPushBtn.clicked.connect(self.finishEditServer)
+        self.editSavePropertiesPushBtn.clicked.connect(self.saveServerProperties)
         self.coreLineEdit.setEnabled(False)
         self.iconsList = [
             "铁砧",
@@ -865,12 +908,12 @@ class ServerManagerPage(QWidget):
         self.editMaxMemLineEdit.setText(str(globalConfig[index]["max_memory"]))
         self.editOutputDeEncodingComboBox.setCurrentIndex(
             editServerVariables.consoleDeEncodingList.index(
-                globalConfig[index]["output_decoding"]
+                self.deEncodingSetting(globalConfig[index]["output_decoding"])
             )
         )
         self.editInputDeEncodingComboBox.setCurrentIndex(
             editServerVariables.consoleDeEncodingList.index(
-                globalConfig[index]["input_encoding"]
+                self.deEncodingSetting(globalConfig[index]["input_encoding"])
             )
         )
         self.editMemUnitComboBox.setCurrentIndex(
@@ -883,6 +926,7 @@ class ServerManagerPage(QWidget):
         totalJVMArg = totalJVMArg.strip()
         self.JVMArgPlainTextEdit.setPlainText(totalJVMArg)
         self.editServerNameLineEdit.setText(globalConfig[index]["name"])
+        self.loadServerPropertiesText(globalConfig[index]["name"])
 
         self.editServerPixmapLabel.setPixmap(
             QPixmap(f":/built-InIcons/{globalConfig[index]['icon']}")
@@ -916,10 +960,10 @@ class ServerManagerPage(QWidget):
         ) = globalConfig[index]["name"]
         editServerVariables.oldConsoleOutputDeEncoding = (
             editServerVariables.consoleOutputDeEncoding
-        ) = globalConfig[index]["output_decoding"]
+        ) = self.deEncodingSetting(globalConfig[index]["output_decoding"])
         editServerVariables.oldConsoleInputDeEncoding = (
             editServerVariables.consoleInputDeEncoding
-        ) = globalConfig[index]["input_encoding"]
+        ) = self.deEncodingSetting(globalConfig[index]["input_encoding"])
         editServerVariables.oldIcon = editServerVariables.icon = globalConfig[index][
             "icon"
         ]
@@ -935,6 +979,60 @@ class ServerManagerPage(QWidget):
         # 初始化QtSlot
         self.connectEditServerSlot()
 
+    def loadServerPropertiesText(self, serverName: str):
+        """
+        在编辑框中显示server.properties\n
+        每行一项，键与值按Properties格式转义，多行的值与含"="的键也能原样改回
+        """
+        try:
+            properties = loadServerProperties(serverName)
+        except FileNotFoundError:
+            self.editPropertiesPlainTextEdit.setPlainText("")
+            self.editSetPropertiesWidget.setEnabled(False)
+            return
+        self.editSetPropertiesWidget.setEnabled(True)
+        self.editPropertiesPlainTextEdit.setPlainText(
+            "\n".join(
+                f"{escape(key, True, False)}={escape(value, asciiOnly=False)}"
+                for key, value in properties.items()
+            )
+        )
+
+    def saveServerProperties(self):
+        """只把有改动的键写回server.properties，注释与顺序保持不变"""
+        serverName = editServerVariables.oldServerName
+        # 按server.properties的规则解析，注释、空行与续行都能处理
+        edited = PropertiesFile(serverPropertiesPath(serverName))
+        edited.parse(self.editPropertiesPlainTextEdit.toPlainText())
+        edited = {key: value for key, value in edited.items() if key}
+        try:
+            properties = loadServerProperties(serverName)
+            changes = dict(edited)
+            changes.update({key: None for key in properties if key not in edited})
+            changed = updateServerProperties(serverName, changes)
+        except OSError as e:
+            InfoBar.error(
+                title="失败",
+                content=f"保存server.properties失败：\n{e}",
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=3000,
+                parent=self,
+            )
+            return
+        InfoBar.success(
+            title="成功",
+            content=f"已修改{len(changed)}项，重启服务器后生效。"
+            if changed
+            else "server.properties没有变化。",
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.TOP,
+            duration=3000,
+            parent=self,
+        )
+
     def connectEditServerSlot(self):
         self.editJavaTextEdit.textChanged.connect(self.changeJavaPath)
         self.editMinMemLineEdit.textChanged.connect(self.changeMinMem)
@@ -1014,6 +1112,16 @@ class ServerManagerPage(QWidget):
                 parent=self,
             )
 
+    @staticmethod
+    def deEncodingSetting(value: str) -> str:
+        """
+        把配置中的编码换成编码选项列表里的取值\n
+        旧版本自动检测可能写入了gbk、cp936等，无法对应时按"follow"处理
+        """
+        if value in editServerVariables.consoleDeEncodingList:
+            return value
+        return settingEncoding(value) or "follow"
+
     def changeOutputDeEncoding(self):
         editServerVariables.consoleOutputDeEncoding = (
             editServerVariables.consoleDeEncodingList[
@@ -1038,10 +1146,13 @@ class ServerManagerPage(QWidget):
         )
         if tmpJavaPath != "":
             tmpJavaPath = tmpJavaPath.replace("/", "\\")
-            if v := javaDetector.getJavaVersion(tmpJavaPath):
+            if info := javaDetector.probeJavaInfo(tmpJavaPath):
+                v = info.version
                 tmpNewJavaPath = editServerVariables.javaPath.copy()
-                if javaDetector.Java(tmpJavaPath, v) not in tmpNewJavaPath:
-                    tmpNewJavaPath.append(javaDetector.Java(tmpJavaPath, v))
+                if (
+                    java := javaDetector.Java(tmpJavaPath, v, info.vendor, info.arch)
+                ) not in tmpNewJavaPath:
+                    tmpNewJavaPath.append(java)
                     InfoBar.success(
                         title="已添加",
                         content=f"Java路径：{tmpJavaPath}\n版本：{v}\n但你还需要继续到Java列表中选取。",
@@ -1098,35 +1209,17 @@ class ServerManagerPage(QWidget):
         if osp.exists("MCSL2/AutoDetectJavaHistory.json"):
             remove("MCSL2/AutoDetectJavaHistory.json")
 
-        with open(
-                "MCSL2/MCSL2_DetectedJava.json", "w+", encoding="utf-8"
-        ) as SaveFoundedJava:
-            tmpNewJavaPath = editServerVariables.javaPath
-            editServerVariables.javaPath = list(
-                {p[:-1] for p in SaveFoundedJava.readlines()}
-                .union(set(editServerVariables.javaPath))
-                .union(set(_JavaPaths))
-            )
-            editServerVariables.javaPath.sort(key=lambda x: x.version, reverse=False)
-            for d in editServerVariables.javaPath:
-                if d not in tmpNewJavaPath:
-                    tmpNewJavaPath.append(d)
-                else:
-                    pass
-            editServerVariables.javaPath.clear()
-            editServerVariables.javaPath = tmpNewJavaPath
-
-            JavaPathList = [
-                {"Path": e.path, "Version": e.version}
-                for e in editServerVariables.javaPath
-            ]
-            dump(
-                {"java": JavaPathList},
-                SaveFoundedJava,
-                sort_keys=True,
-                indent=4,
-                ensure_ascii=False,
+        tmpNewJavaPath = editServerVariables.javaPath
+        for d in javaDetector.sortedJavaList(
+            javaDetector.combineJavaList(
+                javaDetector.loadJavaList(), _JavaPaths, invaild=None, check=False
             )
+        ):
+            if d not in tmpNewJavaPath:
+                tmpNewJavaPath.append(d)
+        editServerVariables.javaPath = tmpNewJavaPath
+        # 通过saveJavaList写入，保留查找Java的探测缓存
+        javaDetector.saveJavaList(editServerVariables.javaPath)
 
     @pyqtSlot(int)
     def onJavaFindWorkThreadFinished(self, sequenceNumber):
@@ -1332,7 +1332,9 @@ class SettingsPage(QWidget):
         self.aria2ThreadSlider.valueChanged.connect(
             lambda: self.aria2ThreadNum.setText(str(self.aria2ThreadSlider.value()))
         )
-        self.outputDeEncodingComboBox.addItems(["UTF-8", "GB18030", "ANSI(推荐)"])
+        self.outputDeEncodingComboBox.addItems(
+            ["UTF-8", "GB18030", "ANSI(推荐)", "自动检测"]
+        )
         self.outputDeEncodingComboBox.setCurrentIndex(0)
         self.inputDeEncodingComboBox.addItems(
             ["跟随控制台输出", "UTF-8", "GB18030", "ANSI(推荐)"]
@@ -0,0 +1,78 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Widget for paging back console lines evicted from the scrollback.
+"""
+from PyQt5.QtCore import QSize
+from PyQt5.QtWidgets import QWidget, QSizePolicy, QGridLayout, QFrame
+from qfluentwidgets import BodyLabel, PlainTextEdit, PushButton, FluentIcon as FIF
+
+from MCSL2Lib.Controllers.consoleScrollback import ConsoleSpillFile
+
+
+class ConsoleHistoryWidget(QWidget):
+    def __init__(self, spillFile: ConsoleSpillFile, evictedCount: int, pageSize=500):
+        super().__init__()
+        self.spillFile = spillFile
+        self.evictedCount = evictedCount
+        self.pageSize = pageSize
+        self.pageCount = max(1, -(-evictedCount // pageSize))
+        self.page = self.pageCount - 1
+
+        self.setObjectName("ConsoleHistoryWidget")
+
+        self.consoleHistoryMainWidget = QWidget(self)
+        sizePolicy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        self.consoleHistoryMainWidget.setSizePolicy(sizePolicy)
+        self.consoleHistoryMainWidget.setMinimumSize(QSize(560, 360))
+        self.consoleHistoryMainWidget.setObjectName("consoleHistoryMainWidget")
+
+        self.gridLayout = QGridLayout(self.consoleHistoryMainWidget)
+        self.gridLayout.setContentsMargins(0, 0, 0, 0)
+        self.gridLayout.setObjectName("gridLayout")
+
+        self.historyOutput = PlainTextEdit(self.consoleHistoryMainWidget)
+        self.historyOutput.setFrameShape(QFrame.NoFrame)
+        self.historyOutput.setReadOnly(True)
+        self.historyOutput.setObjectName("historyOutput")
+
+        self.gridLayout.addWidget(self.historyOutput, 0, 0, 1, 3)
+        self.earlierBtn = PushButton(FIF.UP, "更早", self.consoleHistoryMainWidget)
+        self.earlierBtn.setObjectName("earlierBtn")
+
+        self.gridLayout.addWidget(self.earlierBtn, 1, 0, 1, 1)
+        self.pageLabel = BodyLabel(self.consoleHistoryMainWidget)
+        self.pageLabel.setObjectName("pageLabel")
+
+        self.gridLayout.addWidget(self.pageLabel, 1, 1, 1, 1)
+        self.laterBtn = PushButton(FIF.DOWN, "更晚", self.consoleHistoryMainWidget)
+        self.laterBtn.setObjectName("laterBtn")
+
+        self.gridLayout.addWidget(self.laterBtn, 1, 2, 1, 1)
+
+        self.earlierBtn.clicked.connect(lambda: self.turnPage(-1))
+        self.laterBtn.clicked.connect(lambda: self.turnPage(1))
+        self.turnPage(0)
+
+    def turnPage(self, step: int):
+        self.page = min(max(self.page + step, 0), self.pageCount - 1)
+        start = self.page * self.pageSize
+        count = min(self.pageSize, self.evictedCount - start)
+        self.historyOutput.setPlainText("\n".join(self.spillFile.readLines(start, count)))
+        self.pageLabel.setText(
+            f"第{self.page + 1}/{self.pageCount}页，共{self.evictedCount}行已移出终端的日志"
+        )
+        self.earlierBtn.setEnabled(self.page > 0)
+        self.laterBtn.setEnabled(self.page < self.pageCount - 1)
@@ -0,0 +1,155 @@
+#     Copyright 2023, MCSL Team, mailto:lxhtt@vip.qq.com
+#
+#     Part of "MCSL2", a simple and multifunctional Minecraft server launcher.
+#
+#     Licensed under the GNU General Public License, Version 3.0, with our
+#     additional agreements. (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#        https://github.com/MCSLTeam/MCSL2/raw/master/LICENSE
+#
+################################################################################
+"""
+Widget for searching a server's console archive.
+"""
+from datetime import datetime
+from typing import Optional, Set
+
+from PyQt5.QtCore import QSize
+from PyQt5.QtWidgets import QWidget, QSizePolicy, QGridLayout, QFrame
+from qfluentwidgets import (
+    BodyLabel,
+    ComboBox,
+    LineEdit,
+    PlainTextEdit,
+    PrimaryPushButton,
+    FluentIcon as FIF,
+)
+
+from MCSL2Lib.Controllers.consoleLogClassifier import LogLevel
+from MCSL2Lib.Controllers.serverLogArchive import ServerLogSearchThread
+
+# 搜索线程不随对话框销毁，结束前在这里保留引用
+searchThreads: Set[ServerLogSearchThread] = set()
+
+
+def parseTime(text: str) -> Optional[datetime]:
+    """解析"2023-10-17 02:00"、"2023-10-17 02:00:00"或当天的"02:00"，留空表示不限"""
+    text = text.strip()
+    if not text:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try:
+            t = datetime.strptime(text, fmt)
+            return datetime.now().replace(
+                hour=t.hour, minute=t.minute, second=t.second, microsecond=0
+            )
+        except ValueError:
+            pass
+    raise ValueError(text)
+
+
+class ConsoleSearchWidget(QWidget):
+    limit = 5000
+    levelOptions = [
+        ("全部", None),
+        ("信息", [LogLevel.INFO]),
+        ("警告", [LogLevel.WARN]),
+        ("错误", [LogLevel.ERROR]),
+        ("调试", [LogLevel.DEBUG]),
+        ("警告及错误", [LogLevel.WARN, LogLevel.ERROR]),
+    ]
+
+    def __init__(self, serverName: str):
+        super().__init__()
+        self.serverName = serverName
+
+        self.setObjectName("ConsoleSearchWidget")
+
+        self.consoleSearchMainWidget = QWidget(self)
+        sizePolicy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        self.consoleSearchMainWidget.setSizePolicy(sizePolicy)
+        self.consoleSearchMainWidget.setMinimumSize(QSize(620, 400))
+        self.consoleSearchMainWidget.setObjectName("consoleSearchMainWidget")
+
+        self.gridLayout = QGridLayout(self.consoleSearchMainWidget)
+        self.gridLayout.setContentsMargins(0, 0, 0, 0)
+        self.gridLayout.setObjectName("gridLayout")
+
+        self.level = ComboBox(self.consoleSearchMainWidget)
+        self.level.setObjectName("level")
+
+        self.gridLayout.addWidget(self.level, 0, 0, 1, 1)
+        self.startTime = LineEdit(self.consoleSearchMainWidget)
+        self.startTime.setObjectName("startTime")
+
+        self.gridLayout.addWidget(self.startTime, 0, 1, 1, 1)
+        self.endTime = LineEdit(self.consoleSearchMainWidget)
+        self.endTime.setObjectName("endTime")
+
+        self.gridLayout.addWidget(self.endTime, 0, 2, 1, 1)
+        self.keyword = LineEdit(self.consoleSearchMainWidget)
+        self.keyword.setObjectName("keyword")
+
+        self.gridLayout.addWidget(self.keyword, 1, 0, 1, 2)
+        self.searchBtn = PrimaryPushButton(FIF.SEARCH, "搜索", self.consoleSearchMainWidget)
+        self.searchBtn.setObjectName("searchBtn")
+
+        self.gridLayout.addWidget(self.searchBtn, 1, 2, 1, 1)
+        self.resultOutput = PlainTextEdit(self.consoleSearchMainWidget)
+        self.resultOutput.setFrameShape(QFrame.NoFrame)
+        self.resultOutput.setReadOnly(True)
+        self.resultOutput.setObjectName("resultOutput")
+
+        self.gridLayout.addWidget(self.resultOutput, 2, 0, 1, 3)
+        self.statusLabel = BodyLabel(self.consoleSearchMainWidget)
+        self.statusLabel.setObjectName("statusLabel")
+
+        self.gridLayout.addWidget(self.statusLabel, 3, 0, 1, 3)
+
+        self.level.addItems([name for name, _ in self.levelOptions])
+        self.startTime.setPlaceholderText("开始时间，如 2023-10-17 02:00")
+        self.endTime.setPlaceholderText("结束时间，如 2023-10-17 03:00")
+        self.keyword.setPlaceholderText("关键字(可选)")
+        self.statusLabel.setText(f"搜索服务器 {serverName} 的终端日志归档")
+        self.searchBtn.clicked.connect(self.search)
+        self.keyword.returnPressed.connect(self.search)
+
+    def search(self):
+        try:
+            start = parseTime(self.startTime.text())
+            end = parseTime(self.endTime.text())
+        except ValueError as e:
+            self.statusLabel.setText(f"无法识别的时间：{e}")
+            return
+        self.searchBtn.setEnabled(False)
+        self.statusLabel.setText("正在搜索...")
+        thread = ServerLogSearchThread(
+            self.serverName,
+            levels=self.levelOptions[self.level.currentIndex()][1],
+            start=start,
+            end=end,
+            keyword=self.keyword.text(),
+            limit=self.limit,
+        )
+        thread.done.connect(self.showResult)
+        thread.finished.connect(lambda: searchThreads.discard(thread))
+        thread.finished.connect(thread.deleteLater)
+        searchThreads.add(thread)
+        thread.start()
+
+    def showResult(self, result: list):
+        self.searchBtn.setEnabled(True)
+        self.resultOutput.setPlainText("\n".join(result))
+        self.statusLabel.setText(
+            f"找到{len(result)}行"
+            + (f"，仅显示前{self.limit}行" if len(result) >= self.limit else "")
+        )
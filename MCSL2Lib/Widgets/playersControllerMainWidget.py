@@ -50,6 +50,7 @@ class playersController(QWidget):
 
         self.who = LineEdit(self.playersControllerMainWidget)
         self.who.setObjectName("who")
+        self.who.setPlaceholderText("玩家名，多名玩家用空格或逗号分隔")
 
         self.gridLayout.addWidget(self.who, 0, 0, 1, 1)
         self.mode = ComboBox(self.playersControllerMainWidget)
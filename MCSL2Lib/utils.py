@@ -17,6 +17,7 @@ import enum
 import functools
 import hashlib
 import inspect
+import sys
 # import sqlite3  # dont delete this
 # added in nuitka_build
 from json import loads, dumps
@@ -26,10 +27,7 @@ from subprocess import Popen
 from types import TracebackType
 from typing import Type, Optional, Iterable, Callable, Dict, List
 
-import aria2p
 from PyQt5.QtCore import QUrl, QThread
-from PyQt5.QtGui import QDesktopServices
-from darkdetect import theme as currentTheme
 
 from MCSL2Lib.Controllers.logController import _MCSL2Logger
 from MCSL2Lib.Controllers.settingsController import SettingsController
@@ -50,7 +48,7 @@ configTemplate = {
     "alwaysAskSaveDirectory": False,
     "aria2Thread": 8,
     "saveSameFileException": "ask",
-    "outputDeEncoding": "ansi",
+    "outputDeEncoding": "auto",
     "inputDeEncoding": "follow",
     "quickMenu": True,
     "clearConsoleWhenStopServer": False,
@@ -62,6 +60,36 @@ configTemplate = {
     "lastServer": "",
     "nodeMCSLAPI": "https://hardbin.com",
     "enableExperimentalFeatures": False,
+    "consoleOutputBatching": True,
+    "consoleFlushInterval": 50,
+    "consoleFlushMaxLines": 500,
+    "consoleBufferCapacity": 20000,
+    "consoleMaxBlockCount": 5000,
+    "serverConsoleArchive": True,
+    "logLevel": "DEBUG",
+    "monitorUseUSS": False,
+    "monitorHistorySize": 3600,
+    "controlApi": False,
+    "controlApiHost": "127.0.0.1",
+    "controlApiPort": 26580,
+    "controlApiUnixSocket": "",
+    "controlApiToken": "",
+    "serverStopTimeout": 60,
+    "crashRestartBaseDelay": 5,
+    "crashRestartMaxDelay": 300,
+    "crashLoopWindow": 600,
+    "crashLoopLimit": 5,
+    "consoleMaxLineBytes": 65536,
+    "commandQueueMaxPendingBytes": 65536,
+    "autoSaveInterval": 0,
+    "autoBackupInterval": 0,
+    "backupKeepSnapshots": 10,
+    "backupWorkers": 0,
+    "backupSaveTimeout": 60,
+    "regionPruneMinInhabitedTime": 1200,
+    "javaProbeWorkers": 0,
+    "jvmFlagProfile": "none",
+    "appCdsEnabled": False,
 }
 
 
@@ -177,6 +205,8 @@ def private(func):
 
 def isDarkTheme():
     if settingsController.fileSettings["theme"] == "auto":
+        # 延迟导入，无界面模式下不需要
+        from darkdetect import theme as currentTheme
         return currentTheme() == "Dark"
     else:
         return settingsController.fileSettings["theme"] == "dark"
@@ -184,6 +214,8 @@ def isDarkTheme():
 
 def openWebUrl(Url):
     """打开网址"""
+    from PyQt5.QtGui import QDesktopServices
+
     QDesktopServices.openUrl(QUrl(Url))
 
 
@@ -201,7 +233,9 @@ def exceptionFilter(
     """
     if isinstance(value, AttributeError) and "MessageBox" in str(value):
         return ExceptionFilterMode.PASS
-    if isinstance(
+    # aria2p只在下载时才会被导入，未导入则不可能是它的异常
+    aria2p = sys.modules.get("aria2p", None)
+    if aria2p is not None and isinstance(
             value, aria2p.ClientException
     ) and "Active Download not found for GID" in str(value):
         return ExceptionFilterMode.RAISE
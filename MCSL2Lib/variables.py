@@ -33,10 +33,11 @@ class ConfigureServerVariables:
         self.coreFileName: str = ""
         self.selectedJavaPath: str = ""
         self.selectedJavaVersion: str = ""
+        self.javaAutoSelected: bool = False
         self.memUnit: str = ""
         self.consoleOutputDeEncoding: str = "follow"
         self.consoleInputDeEncoding: str = "follow"
-        self.consoleDeEncodingList = ["follow", "utf-8", "GB18030", "ansi"]
+        self.consoleDeEncodingList = ["follow", "utf-8", "GB18030", "ansi", "auto"]
         self.memUnitList = ["M", "G"]
         self.jvmArg: list[str] = [""]
         self.serverName: str = ""
@@ -59,6 +60,7 @@ class ConfigureServerVariables:
         self.coreFileName: str = ""
         self.selectedJavaPath: str = ""
         self.selectedJavaVersion: str = ""
+        self.javaAutoSelected: bool = False
         self.memUnit: str = ""
         self.consoleOutputDeEncoding: str = "follow"
         self.consoleInputDeEncoding: str = "follow"
@@ -100,7 +102,7 @@ class EditServerVariables:
         self.consoleInputDeEncoding: str = "follow"
         self.icon: str = "Grass.png"
 
-        self.consoleDeEncodingList = ["follow", "utf-8", "GB18030", "ansi"]
+        self.consoleDeEncodingList = ["follow", "utf-8", "GB18030", "ansi", "auto"]
         self.memUnitList = ["M", "G"]
         self.iconsFileNameList = [
             "Anvil.png",
@@ -370,7 +372,7 @@ class SettingsVariables:
         self.newServerTypeList = ["Default", "Noob", "Extended", "Import"]
         self.downloadSourceList = ["FastMirror", "MCSLAPI"]
         self.saveSameFileExceptionList = ["ask", "overwrite", "stop"]
-        self.outputDeEncodingList = ["utf-8", "GB18030", "ansi"]
+        self.outputDeEncodingList = ["utf-8", "GB18030", "ansi", "auto"]
         self.inputDeEncodingList = ["follow", "utf-8", "GB18030", "ansi"]
         self.themeList = ["auto", "dark", "light"]
 
@@ -395,7 +397,7 @@ class MCSLv1ImportVariables:
             "-XX:+AlwaysPreTouch",
             "-XX:+ParallelRefProcEnabled",
         ]
-        self.consoleDeEncodingList = ["follow", "utf-8", "GB18030", "ansi"]
+        self.consoleDeEncodingList = ["follow", "utf-8", "GB18030", "ansi", "auto"]
         self.memUnitList = ["M", "G"]
         self.consoleOutputDeEncoding: str = "follow"
         self.consoleInputDeEncoding: str = "follow"
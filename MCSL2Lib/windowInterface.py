@@ -16,7 +16,7 @@ The main window of MCSL2.
 import sys
 from traceback import format_exception
 from types import TracebackType
-from typing import Type
+from typing import Optional, Type
 from platform import system
 from PyQt5.QtCore import (
     QEvent,
@@ -50,14 +50,19 @@ from MCSL2Lib.Controllers.aria2ClientController import (
     initializeAria2Configuration,
     Aria2BootThread,
 )
+from MCSL2Lib.Controllers.controlApiController import (
+    ControlApiServer,
+    startControlApi,
+)
 from MCSL2Lib.Controllers.serverController import (
-    MinecraftServerResMonitorUtil,
+    LaunchResult,
     MojangEula,
     ServerHandler,
     ServerHelper,
     ServerLauncher,
 )
 from MCSL2Lib.Controllers.settingsController import SettingsController
+from MCSL2Lib.Controllers.startupProfiler import profiler
 from MCSL2Lib.utils import MCSL2Logger
 from MCSL2Lib.Pages.configurePage import ConfigurePage
 from MCSL2Lib.Pages.consolePage import ConsolePage
@@ -225,7 +230,9 @@ class Window(FluentWindow):
     def __init__(self):
         super().__init__()
         # 读取程序设置，不放在第一位就会爆炸！
-        settingsController.initialize(firstLoad=True)
+        with profiler.span("read settings", "config"):
+            settingsController.initialize(firstLoad=True)
+        MCSL2Logger.setLevel(settingsController.fileSettings["logLevel"])
         self.mySetTheme()
         self.initWindow()
         self.setWindowTitle(f"MCSL {MCSL2VERSION}")
@@ -239,6 +246,7 @@ class Window(FluentWindow):
         # ):
         #     MCSL2Logger.warning(f"实验性功能已设置为{experiment}")
 
+        self.controlApi: Optional[ControlApiServer] = None
         self.homeInterface = None  # type: HomePage
         self.configureInterface = None  # type: ConfigurePage
         self.downloadInterface = None  # type: DownloadPage
@@ -263,7 +271,8 @@ class Window(FluentWindow):
         for loader in loaders:
             loader.start()
 
-        initializeAria2Configuration()
+        with profiler.span("initializeAria2Configuration", "aria2"):
+            initializeAria2Configuration()
 
         self.initSafeQuitController()
 
@@ -274,13 +283,19 @@ class Window(FluentWindow):
 
     @pyqtSlot(object, str, str)
     def onPageLoaded(self, pageType, targetObj, flag):
-        setattr(self, targetObj, pageType(self))
+        with profiler.span(pageType.__name__, "page"):
+            setattr(self, targetObj, pageType(self))
         setattr(loaded, flag, True)
         if loaded.allPageLoaded():
-            self.initNavigation()
-            serverHelper.loadAtLaunch()
-            self.initQtSlot()
-            self.initPluginSystem()
+            with profiler.span("initNavigation"):
+                self.initNavigation()
+            with profiler.span("loadAtLaunch", "config"):
+                serverHelper.loadAtLaunch()
+            with profiler.span("initQtSlot"):
+                self.initQtSlot()
+            with profiler.span("initPluginSystem", "plugin"):
+                self.initPluginSystem()
+            self.controlApi = startControlApi(self)
             if settingsController.fileSettings["checkUpdateOnStart"]:
                 self.settingsInterface.checkUpdate(parent=self)
             self.consoleInterface.installEventFilter(self)
@@ -289,6 +304,7 @@ class Window(FluentWindow):
             self.splashScreen.finish()
             self.splashScreen.deleteLater()
             self.update()
+            profiler.finish()
 
     @pyqtSlot(bool)
     def onAria2Loaded(self, flag: bool):
@@ -314,8 +330,13 @@ class Window(FluentWindow):
             )
 
     def closeEvent(self, a0) -> None:
-        if ServerHandler().isServerRunning():
-            box = MessageBox("是否退出MCSL2？", "服务器正在运行。\n\n请在退出前先关闭服务器。", parent=self)
+        runningServers = ServerHandler().activeServers()
+        if runningServers:
+            box = MessageBox(
+                "是否退出MCSL2？",
+                f"{len(runningServers)}个服务器正在运行：{'、'.join(runningServers)}\n\n请在退出前先关闭服务器。",
+                parent=self,
+            )
             box.yesButton.setText("取消")
             box.cancelButton.setText("安全关闭并退出")
             box.cancelButton.setStyleSheet(
@@ -327,15 +348,23 @@ class Window(FluentWindow):
                 a0.ignore()
                 return
 
-            process = ServerHandler().Server.serverProcess
-            process.finished.connect(self.close)
-            process.write(b"stop\n")
-            self.exitingMsgBox.show()
-            self.quitTimer.start()
+            ServerHandler().stopAllServers()
+            # 全部服务器都关闭后才真正退出；只在等待崩溃重启的会立即停止
+            if ServerHandler().isAnyServerActive():
+                for name in ServerHandler().activeServers():
+                    ServerHandler().getRuntime(name).stateChanged.connect(
+                        lambda _: self.close()
+                        if not ServerHandler().isAnyServerActive()
+                        else None
+                    )
+                self.exitingMsgBox.show()
+                self.quitTimer.start()
 
-            a0.ignore()
-            return
+                a0.ignore()
+                return
         try:
+            if self.controlApi is not None:
+                self.controlApi.stop()
             workingThreads.closeAllThreads()
             if Aria2Controller.shutDown():
                 super().closeEvent(a0)
@@ -343,8 +372,8 @@ class Window(FluentWindow):
             super().closeEvent(a0)
 
     def onForceExit(self):
-        process = ServerHandler().Server.serverProcess
-        process.kill()
+        for runtime in ServerHandler().runtimes.values():
+            runtime.haltServer()
 
     def catchExceptions(
         self, ty: Type[BaseException], value: BaseException, _traceback: TracebackType
@@ -592,10 +621,32 @@ class Window(FluentWindow):
 
         # 终端
         ServerHandler().serverLogOutput.connect(self.consoleInterface.colorConsoleText)
+        ServerHandler().serverLogOutputBatch.connect(
+            self.consoleInterface.colorConsoleTextBatch
+        )
+        ServerHandler().serverLogOverflow.connect(
+            self.consoleInterface.onServerLogOverflow
+        )
         if settingsController.fileSettings["clearConsoleWhenStopServer"]:
             ServerHandler().serverClosed.connect(
-                lambda: self.consoleInterface.serverOutput.setPlainText("")
+                lambda: self.consoleInterface.clearConsole()
             )
+        ServerHandler().stateChanged.connect(
+            lambda _: self.updateConsoleExitButton(ServerHandler().isServerActive())
+        )
+        ServerHandler().currentServerChanged.connect(
+            self.consoleInterface.switchServer
+        )
+        ServerHandler().currentServerChanged.connect(
+            lambda: self.updateConsoleExitButton(ServerHandler().isServerActive())
+        )
+        ServerHandler().runtimesChanged.connect(self.consoleInterface.refreshServerSelector)
+        ServerHandler().memPercent.connect(self.consoleInterface.setMemView)
+        ServerHandler().cpuPercent.connect(self.consoleInterface.setCPUView)
+        ServerHandler().resourceSampled.connect(
+            self.consoleInterface.setResourceDetailView
+        )
+        ServerHandler().telemetryEvent.connect(self.consoleInterface.onTelemetryEvent)
 
         # 性能优化
         self.stackedWidget.currentChanged.connect(
@@ -611,7 +662,17 @@ class Window(FluentWindow):
     def startServer(self):
         """启动服务器总函数，直接放这里得了"""
         firstTry = ServerLauncher().startServer()
-        if not firstTry:
+        if firstTry == LaunchResult.PRUNING:
+            InfoBar.warning(
+                title="无法启动",
+                content=f"服务器{serverVariables.serverName}正在清理区块，请在清理完成后再启动。",
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP,
+                duration=3000,
+                parent=self,
+            )
+        elif firstTry == LaunchResult.EULA:
             w = MessageBox(
                 title="提示",
                 content="你并未同意Minecraft的最终用户许可协议。\n未同意，服务器将无法启动。\n可点击下方的按钮查看Eula。\n同意Eula后，服务器将会启动。",
@@ -629,33 +690,25 @@ class Window(FluentWindow):
         else:
             self.switchTo(self.consoleInterface)
             self.navigationInterface.setCurrentItem(self.consoleInterface.objectName())
-            self.consoleInterface.serverOutput.setPlainText("")
-            self.serverMemThread = MinecraftServerResMonitorUtil(self)
-            self.serverMemThread.memPercent.connect(self.consoleInterface.setMemView)
-            self.serverMemThread.cpuPercent.connect(self.consoleInterface.setCPUView)
-            try:
-                self.consoleInterface.exitServer.clicked.disconnect()
-            except TypeError:
-                pass
-            ServerHandler().serverClosed.connect(
-                self.serverMemThread.onServerClosedHandler
-            )
-            ServerHandler().serverClosed.connect(
-                self.consoleInterface.exitServer.clicked.disconnect
-            )
-            ServerHandler().serverClosed.connect(
-                lambda: self.consoleInterface.exitServer.clicked.connect(
-                    self.homeInterface.startServerBtn.click
-                )
-            )
-            ServerHandler().serverClosed.connect(
-                lambda: self.consoleInterface.exitServer.setText("开启服务器")
-            )
+            self.updateConsoleExitButton(True)
+            GlobalMCSL2Variables.isLoadFinished = True
+
+    def updateConsoleExitButton(self, running: bool):
+        """按当前服务器是否在运行，切换终端页的开启/关闭服务器按钮"""
+        try:
+            self.consoleInterface.exitServer.clicked.disconnect()
+        except TypeError:
+            pass
+        if running:
             self.consoleInterface.exitServer.clicked.connect(
                 self.consoleInterface.runQuickMenu_StopServer
             )
             self.consoleInterface.exitServer.setText("关闭服务器")
-            GlobalMCSL2Variables.isLoadFinished = True
+        else:
+            self.consoleInterface.exitServer.clicked.connect(
+                self.homeInterface.startServerBtn.click
+            )
+            self.consoleInterface.exitServer.setText("开启服务器")
 
     def eventFilter(self, a0: QObject, a1: QEvent) -> bool:
         if not GlobalMCSL2Variables.isLoadFinished:
@@ -710,6 +763,8 @@ class Window(FluentWindow):
 
     def startAria2Client(self):
         bootThread = Aria2BootThread(self)
+        aria2Boot = profiler.begin("aria2 boot", "aria2")
+        bootThread.loaded.connect(lambda _: profiler.end(aria2Boot))
         bootThread.loaded.connect(self.onAria2Loaded)
         bootThread.finished.connect(bootThread.deleteLater)
         bootThread.finished.connect(self.splashScreen.finish)
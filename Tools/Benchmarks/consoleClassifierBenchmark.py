@@ -0,0 +1,124 @@
+"""
+终端日志分类器基准测试。
+
+用法（在仓库根目录执行）：
+    python Tools/Benchmarks/consoleClassifierBenchmark.py [日志文件]
+
+不指定日志文件时，会按Paper/Forge的典型输出合成100k行日志。
+分别测量旧版colorConsoleText的关键字循环+链式replace与ConsoleLogClassifier的每秒处理行数。
+"""
+import sys
+from os import path as osp
+from random import Random
+from re import search
+from time import perf_counter
+
+sys.path.insert(0, osp.abspath(osp.join(osp.dirname(__file__), "..", "..")))
+
+from MCSL2Lib.Controllers.consoleLogClassifier import ConsoleLogClassifier  # noqa: E402
+
+sampleLines = [
+    "[12:00:01] [main/INFO]: Environment: authHost='https://authserver.mojang.com'",
+    "[12:00:02] [main/INFO] [cpw.mods.modlauncher.LaunchServiceHandler/MODLAUNCHER]: ModLauncher running: args [--launchTarget, forgeserver]",
+    "[12:00:03] [main/WARN] [mixin/]: Reference map 'examplemod.refmap.json' could not be read.",
+    "[12:00:04] [Server thread/INFO]: Preparing spawn area: 42%",
+    "[12:00:05] [Server-Worker-3/ERROR]: Failed to load chunk [12, -7]",
+    "\tat java.base/java.lang.Thread.run(Thread.java:833)",
+    "\tat net.minecraft.server.MinecraftServer.runServer(MinecraftServer.java:677)",
+    "[12:00:06] [Forge Version Check/DEBUG]: Received update check data",
+    "[12:00:07] [Server thread/INFO]: Done (23.456s)! For help, type \"help\"",
+    "[12:00:08] [Server thread/INFO]: Steve[/127.0.0.1:51234] logged in with entity id 233 at (1.5, 64.0, 2.5)",
+    "[12:00:09] [Server thread/INFO]: Steve left the game",
+    "[38;2;170;170;170m[12:00:10 INFO]: [38;2;255;255;85m[PluginManager] Loading 12 plugins[0m",
+    "[12:00:11] [Server thread/INFO]: Saving the game (this may take a moment!)",
+    "[12:00:12] [Server thread/INFO]: Saved the game",
+    "[12:00:13] [Server thread/WARN]: Can't keep up! Is the server overloaded? Running 2034ms or 40 ticks behind",
+]
+
+
+def legacyColorConsoleText(serverOutput):
+    """旧版colorConsoleText中与Qt无关的部分，用作对照"""
+    greenText = ["INFO", "Info", "info", "tip", "tips", "hint", "提示"]
+    orangeText = ["WARN", "Warning", "warn", "alert", "ALERT", "Alert", "CAUTION", "Caution", "警告"]
+    redText = [
+        "ERR", "Err", "Fatal", "FATAL", "Critical", "Danger", "DANGER", "错",
+        "at java", "at net", "at oolloo", "Caused by", "at sun",
+    ]
+    blueText = ["DEBUG", "Debug", "debug", "调试", "TEST", "Test", "Unknown command", "MCSL2"]
+    level = 0
+    for keyword in greenText:
+        if keyword in serverOutput:
+            level = 1
+    for keyword in orangeText:
+        if keyword in serverOutput:
+            level = 2
+    for keyword in redText:
+        if keyword in serverOutput:
+            level = 3
+    for keyword in blueText:
+        if keyword in serverOutput:
+            level = 4
+    serverOutput = (
+        serverOutput
+        .replace("[38;2;170;170;170m", "")
+        .replace("[38;2;255;170;0m", "")
+        .replace("[38;2;255;255;255m", "")
+        .replace("[0m", "")
+        .replace("[38;2;255;255;85m", "")
+        .replace("[38;2;255;255;255m", "")
+        .replace("[3m", "")
+        .replace("[m[", "[")
+        .replace("[32m", "")
+        .replace("Preparing spawn area", "准备生成点区域中")
+        .replace("main/INFO", "主类/信息")
+        .replace("main/WARN", "主类/警告")
+        .replace("main/ERROR", "主类/错误")
+        .replace("main/FATAL", "主类/致命错误")
+        .replace("main/DEBUG", "主类/调试信息")
+        .replace("INFO", "信息")
+        .replace("WARN", "警告")
+        .replace("ERROR", "错误")
+        .replace("FATAL", "致命错误")
+        .replace("DEBUG", "调试信息")
+        .replace("Server thread", "服务器线程")
+        .replace("Server-Worker", "服务器工作进程")
+        .replace("DEBUG", "调试信息")
+        .replace("Forge Version Check", "Forge版本检查")
+        .replace("ModLauncher running: args", "ModLauncher运行中: 参数")
+        .replace("All chunks are saved", "所有区块已保存")
+        .replace("Saving the game (this may take a moment!)", "保存游戏存档中（可能需要一些时间）")
+        .replace("Saved the game", "已保存游戏存档")
+    )
+    done = bool(search(r"(?=.*Done)(?=.*!)", serverOutput))
+    return level, serverOutput, done
+
+
+def loadLines(argv):
+    if len(argv) > 1:
+        with open(argv[1], "r", encoding="utf-8", errors="replace") as f:
+            return f.read().splitlines()
+    rng = Random(2023)
+    return [rng.choice(sampleLines) for _ in range(100000)]
+
+
+def measure(name, func, lines):
+    begin = perf_counter()
+    for line in lines:
+        func(line)
+    cost = perf_counter() - begin
+    print(f"{name:<12}{len(lines) / cost:>14,.0f} 行/秒  ({cost:.3f}s)")
+    return cost
+
+
+if __name__ == "__main__":
+    lines = loadLines(sys.argv)
+    classifier = ConsoleLogClassifier()
+    mismatch = sum(
+        1
+        for line in lines[:5000]
+        if classifier.classify(line).level != legacyColorConsoleText(line)[0]
+    )
+    print(f"共{len(lines)}行，前5000行中等级与旧版不一致的行数：{mismatch}")
+    old = measure("旧版", legacyColorConsoleText, lines)
+    new = measure("分类器", classifier.classify, lines)
+    print(f"加速比：{old / new:.2f}x")
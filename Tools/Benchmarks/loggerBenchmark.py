@@ -0,0 +1,70 @@
+"""
+MCSL2Logger基准测试。
+
+用法（在仓库根目录执行）：
+    python Tools/Benchmarks/loggerBenchmark.py [调用次数]
+
+对比旧版(每次调用inspect.getframeinfo读取源码行)与新版(loguru opt(depth=1))每秒可处理的日志调用数，
+以及被等级过滤掉的DEBUG调用的开销。日志写入空sink，只测前端开销。
+"""
+import sys
+from inspect import getframeinfo, getmodulename, currentframe
+from os import path as osp
+from time import perf_counter
+
+sys.path.insert(0, osp.abspath(osp.join(osp.dirname(__file__), "..", "..")))
+
+from loguru import logger  # noqa: E402
+
+from MCSL2Lib.Controllers.logController import _MCSL2Logger  # noqa: E402
+
+
+class LegacyLogger:
+    """旧版_MCSL2Logger.info的实现，用作对照"""
+
+    def __init__(self):
+        self.logger = logger
+
+    def _template(self, caller_info, msg) -> str:
+        return f"{caller_info['module']}.{caller_info['function']}, at line {caller_info['line']} | {msg}"
+
+    def info(self, msg: str):
+        frame = getframeinfo(currentframe().f_back)
+        caller_info = {
+            "module": getmodulename(frame.filename),
+            "filename": frame.filename,
+            "line": frame.lineno,
+            "function": frame.function,
+        }
+        self.logger.info(self._template(caller_info, msg))
+
+    def debug(self, msg: str):
+        frame = getframeinfo(currentframe().f_back)
+        caller_info = {
+            "module": getmodulename(frame.filename),
+            "filename": frame.filename,
+            "line": frame.lineno,
+            "function": frame.function,
+        }
+        self.logger.debug(self._template(caller_info, msg))
+
+
+def measure(name, func, times):
+    begin = perf_counter()
+    for i in range(times):
+        func("[12:00:00] [Server thread/INFO]: benchmark line")
+    cost = perf_counter() - begin
+    print(f"{name:<28}{times / cost:>14,.0f} 次/秒")
+
+
+if __name__ == "__main__":
+    times = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    logger.remove()
+    legacy = LegacyLogger()
+    logger.add(lambda _: None, level="DEBUG", format="{message}")
+    new = _MCSL2Logger(sink=lambda _: None)
+    measure("旧版 info", legacy.info, times)
+    measure("新版 info", new.info, times)
+    new.setLevel("INFO")
+    measure("旧版 debug(无过滤)", legacy.debug, times)
+    measure("新版 debug(已被INFO过滤)", new.debug, times)